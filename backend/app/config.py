@@ -1,3 +1,5 @@
+import os
+import socket
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 from typing import List
@@ -10,12 +12,87 @@ class Settings(BaseSettings):
     # Cal.com
     calcom_api_key: str = ""
     calcom_event_type_id: str = ""
+    calcom_api_url: str = "https://api.cal.com/v1"
+    # One pooled client serves every tool call; HTTP/2 needs the optional h2 package
+    calcom_connect_timeout_seconds: float = 3.0
+    calcom_timeout_seconds: float = 10.0
+    calcom_max_connections: int = 20
+    calcom_keepalive_seconds: float = 60.0
+    calcom_http2: bool = False
+    # Tool calls answer within these budgets so a slow calendar cannot stall a live voice turn
+    calcom_read_budget_seconds: float = 2.5
+    calcom_booking_budget_seconds: float = 6.0
+    # Send a second availability request if the first has not answered after this long (0 disables)
+    calcom_hedge_after_seconds: float = 0.0
+    # Each Cal.com endpoint fails fast after this many failures in a row, until a trial call succeeds
+    calcom_breaker_failure_threshold: int = 5
+    calcom_breaker_reset_seconds: float = 30.0
+    # Demo only: answer with made-up slots and bookings when Cal.com cannot be reached
+    calcom_mock_fallback: bool = False
+    # check_availability answers are cached briefly; bookings and cancellations invalidate them
+    availability_cache_ttl_seconds: float = 30.0
+    availability_cache_max_entries: int = 1024
+    # Days of free slots kept loaded per event type (0 disables prefetching) and how often they are reloaded
+    availability_prefetch_days: int = 7
+    availability_prefetch_interval_seconds: float = 60.0
+    # A slot is held while its booking request is in flight (longer than the Cal.com timeout),
+    # then kept hidden after booking until availability refreshes would show it taken
+    slot_hold_seconds: float = 30.0
+    slot_booked_hold_seconds: float = 600.0
     
     # Resend Email
     resend_api_key: str = ""
     email_from: str = ""
+    # Point at a local fake provider (benchmarks/fake_resend.py) to test sends offline
+    resend_api_url: str = "https://api.resend.com"
+    # Provider requests share a pooled connection and give up after these timeouts
+    email_timeout_seconds: float = 10.0
+    email_connect_timeout_seconds: float = 5.0
+    email_max_connections: int = 10
+    
+    # Campaign sending (defaults match Resend's default quota of 2 req/s)
+    email_send_concurrency: int = 4
+    email_rate_limit_per_second: float = 2.0
+    email_rate_limit_burst: int = 2
+    email_max_retries: int = 3
+    email_retry_base_delay: float = 1.0
+    # Emails per provider batch request (Resend accepts up to 100); 1 sends one request per email
+    email_batch_size: int = 100
+    
+    # Transactional email outbox (booking confirmations are delivered in the background)
+    outbox_poll_interval_seconds: float = 2.0
+    outbox_batch_size: int = 20
+    outbox_max_attempts: int = 8
+    outbox_retry_base_delay: float = 5.0
+    outbox_retry_max_delay: float = 600.0
+    
+    # Text chat: tool calls in one model turn run concurrently and share this deadline;
+    # the model may call tools again after seeing results, up to this many rounds
+    chat_tool_timeout_seconds: float = 15.0
+    chat_max_tool_rounds: int = 3
+    # Prompt budget per chat turn; older turns are summarized in the background to stay within it
+    chat_context_budget_tokens: int = 4000
+    chat_summary_max_tokens: int = 400
     
     frontend_url: str = ""
+    
+    # Storage: "sqlite" for a persistent database file, "memory" for tests
+    storage_backend: str = "sqlite"
+    sqlite_path: str = "data/callai.db"
+    # Chat sessions with STORAGE_BACKEND=memory: idle ones are evicted after the TTL and the least
+    # recently used beyond either cap (0 = no limit); with a spill directory they are saved there instead of dropped
+    session_idle_ttl_seconds: float = 3600.0
+    session_max_entries: int = 1000
+    session_max_bytes: int = 64 * 1024 * 1024
+    session_spill_dir: str = ""
+    
+    # Worker processes sharing the store (uvicorn reads the same WEB_CONCURRENCY variable)
+    web_concurrency: int = 1
+    # How long a worker's claim on a dispatch job or realtime session lasts without a heartbeat
+    worker_lease_seconds: float = 30.0
+    
+    # Enables expensive internal consistency checks
+    debug: bool = False
     # Note: CORS origins removed for now
     
     class Config:
@@ -23,6 +100,10 @@ class Settings(BaseSettings):
         extra = "ignore"  # Ignore extra fields in .env
 
 
+# Identifies this process among the workers sharing the store
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
@@ -1,14 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import get_settings
-from app.routes import agents, campaigns, realtime
+from app.routes import agents, campaigns, realtime, outbox, calendar, analytics
+from app.services.agent import agent_service
+from app.services.calcom import calcom_service
+from app.services.dispatch import campaign_dispatcher
+from app.services.email import email_service
+from app.services.outbox import email_outbox
+from app.services.realtime import realtime_service
 
 settings = get_settings()
 
+
+async def heartbeat():
+    """Renew this worker's leases on the shared store, adopt orphaned work and evict idle chat sessions"""
+    while True:
+        await asyncio.sleep(settings.worker_lease_seconds / 3)
+        try:
+            campaign_dispatcher.heartbeat()
+            realtime_service.heartbeat()
+            agent_service.sessions.evict_idle()
+        except Exception as e:
+            print(f"Worker heartbeat failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick up campaign sends that were interrupted by a restart
+    campaign_dispatcher.resume_interrupted()
+    heartbeat_task = asyncio.create_task(heartbeat())
+    email_outbox.start()
+    calcom_service.start()
+    yield
+    heartbeat_task.cancel()
+    await email_outbox.shutdown()
+    await campaign_dispatcher.shutdown()
+    await agent_service.context.shutdown()
+    realtime_service.shutdown()
+    await email_service.close()
+    await calcom_service.close()
+
+
 app = FastAPI(
     title="Voice Agent API",
     description="AI-powered voice agent for sales campaigns and appointment booking",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -24,6 +63,9 @@ app.add_middleware(
 app.include_router(agents.router, prefix="/api")
 app.include_router(campaigns.router, prefix="/api")
 app.include_router(realtime.router, prefix="/api")
+app.include_router(outbox.router, prefix="/api")
+app.include_router(calendar.router, prefix="/api")
+app.include_router(analytics.router, prefix="/api")
 
 
 @app.get("/")
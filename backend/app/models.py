@@ -97,6 +97,7 @@ class CampaignStatus(str, Enum):
 
 class ContactStatus(str, Enum):
     PENDING = "pending"
+    EMAIL_QUEUED = "email_queued"
     EMAIL_SENT = "email_sent"
     EMAIL_OPENED = "email_opened"
     CALL_STARTED = "call_started"
@@ -105,6 +106,44 @@ class ContactStatus(str, Enum):
     NOT_INTERESTED = "not_interested"
 
 
+class DispatchJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class DispatchCheckpoint(str, Enum):
+    QUEUED = "queued"          # claimed by the job, not yet handed to the provider
+    SENDING = "sending"        # handed to the provider, outcome not yet recorded
+    SENT = "sent"
+    FAILED = "failed"
+    IN_DOUBT = "in_doubt"      # outcome unknown; never retried until an operator resolves it
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"        # waiting for its next delivery attempt
+    SENDING = "sending"        # claimed by a worker, delivery in progress
+    SENT = "sent"
+    DEAD = "dead"              # gave up after a permanent error or too many attempts
+
+
+class SlotHoldState(str, Enum):
+    HELD = "held"              # claimed by a caller while the booking request is in flight
+    BOOKED = "booked"          # booked; kept until the calendar's availability reflects it
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"          # calls go through
+    OPEN = "open"              # too many failures in a row; calls fail fast
+    HALF_OPEN = "half_open"    # one trial call decides whether to close again
+
+
+class AnalyticsGroup(str, Enum):
+    CAMPAIGN = "campaign"
+    AGENT = "agent"
+
+
 class Contact(BaseModel):
     id: str
     name: str
@@ -137,7 +176,8 @@ class Campaign(BaseModel):
         "total_contacts": 0,
         "emails_sent": 0,
         "calls_started": 0,
-        "meetings_booked": 0
+        "meetings_booked": 0,
+        "not_interested": 0
     }
 
 
@@ -0,0 +1,60 @@
+# Storage backends for agents, sessions, campaigns, live realtime sessions, the email outbox and slot holds
+from app.config import get_settings
+from app.repositories.base import (
+    AgentRepository, SessionRepository, CampaignRepository, RealtimeSessionRepository, OutboxRepository,
+    SlotHoldRepository
+)
+
+settings = get_settings()
+
+
+def create_repositories(backend: str, sqlite_path: str = ""):
+    """Build the (agent, session, campaign, realtime session, outbox, slot hold) repositories for a storage backend"""
+    if backend == "memory":
+        from app.repositories.memory import (
+            MemoryAgentRepository, MemorySessionRepository, MemoryCampaignRepository,
+            MemoryRealtimeSessionRepository, MemoryOutboxRepository, MemorySlotHoldRepository
+        )
+        return (
+            MemoryAgentRepository(),
+            MemorySessionRepository(
+                settings.session_idle_ttl_seconds,
+                settings.session_max_entries,
+                settings.session_max_bytes,
+                settings.session_spill_dir
+            ),
+            MemoryCampaignRepository(),
+            MemoryRealtimeSessionRepository(),
+            MemoryOutboxRepository(),
+            MemorySlotHoldRepository()
+        )
+
+    if backend == "sqlite":
+        from app.repositories.sqlite import (
+            SQLiteDatabase, SQLiteAgentRepository, SQLiteSessionRepository, SQLiteCampaignRepository,
+            SQLiteRealtimeSessionRepository, SQLiteOutboxRepository, SQLiteSlotHoldRepository
+        )
+        db = SQLiteDatabase(sqlite_path)
+        return (
+            SQLiteAgentRepository(db),
+            SQLiteSessionRepository(db),
+            SQLiteCampaignRepository(db),
+            SQLiteRealtimeSessionRepository(db),
+            SQLiteOutboxRepository(db),
+            SQLiteSlotHoldRepository(db)
+        )
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+if settings.storage_backend == "memory" and settings.web_concurrency > 1:
+    # Each worker would see only its own copy of the data
+    raise RuntimeError("STORAGE_BACKEND=memory cannot be shared between workers; use sqlite with WEB_CONCURRENCY > 1")
+
+(
+    agent_repository, session_repository, campaign_repository, realtime_session_repository, outbox_repository,
+    slot_hold_repository
+) = create_repositories(
+    settings.storage_backend,
+    settings.sqlite_path
+)
@@ -0,0 +1,410 @@
+import base64
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Optional, Set, Tuple
+from app.models import ContactStatus, DispatchCheckpoint
+
+# Statuses that mean no campaign email has gone out yet
+NOT_SENT_STATUSES = (
+    ContactStatus.PENDING.value,
+    ContactStatus.EMAIL_QUEUED.value
+)
+
+# Statuses that mean the contact has opened the call link
+CALL_STARTED_STATUSES = (
+    ContactStatus.CALL_STARTED.value,
+    ContactStatus.CALL_COMPLETED.value,
+    ContactStatus.MEETING_BOOKED.value,
+    ContactStatus.NOT_INTERESTED.value
+)
+
+# Checkpoints that are final outcomes, counted on the job
+JOB_COUNTERS = {
+    DispatchCheckpoint.SENT.value: "sent",
+    DispatchCheckpoint.FAILED.value: "failed",
+    DispatchCheckpoint.IN_DOUBT.value: "in_doubt"
+}
+
+# Contact errors returned with a job
+MAX_JOB_ERRORS = 100
+
+# Orders contacts can be listed in
+CONTACT_SORTS = ("created_at", "last_activity")
+
+
+def stats_from_counts(counts: Dict[str, int]) -> Dict[str, int]:
+    """Derive the campaign stats from a status histogram"""
+    total = sum(counts.values())
+    return {
+        "total_contacts": total,
+        "emails_sent": total - sum(counts.get(s, 0) for s in NOT_SENT_STATUSES),
+        "calls_started": sum(counts.get(s, 0) for s in CALL_STARTED_STATUSES),
+        "meetings_booked": counts.get(ContactStatus.MEETING_BOOKED.value, 0),
+        "not_interested": counts.get(ContactStatus.NOT_INTERESTED.value, 0)
+    }
+
+
+def encode_cursor(position: List[Any]) -> str:
+    """Turn a keyset position into an opaque pagination cursor"""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Read a pagination cursor, raising ValueError if it is malformed"""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, list) or len(position) != 2:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position[0], str) or not isinstance(position[1], int):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+class AgentRepository(ABC):
+    """Storage for agents"""
+
+    @abstractmethod
+    def list_agents(self) -> List[Dict[str, Any]]:
+        """Get all agents"""
+
+    @abstractmethod
+    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific agent"""
+
+    @abstractmethod
+    def create_agent(self, agent: Dict[str, Any]):
+        """Store a new agent"""
+
+    @abstractmethod
+    def ensure_agent(self, agent: Dict[str, Any]) -> bool:
+        """Store an agent unless one with the same id exists; return whether it was stored"""
+
+    @abstractmethod
+    def update_agent(self, agent_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply field updates to an agent and return it"""
+
+    @abstractmethod
+    def delete_agent(self, agent_id: str) -> bool:
+        """Delete an agent"""
+
+
+class SessionRepository(ABC):
+    """Storage for conversation sessions and their transcripts"""
+
+    @abstractmethod
+    def create_session(self, session: Dict[str, Any]):
+        """Store a new session"""
+
+    @abstractmethod
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session including its messages"""
+
+    @abstractmethod
+    def add_message(self, session_id: str, message: Dict[str, Any]):
+        """Append a message (role, content, timestamp, tokens) to a session's transcript"""
+
+    @abstractmethod
+    def get_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a session's rolling context (summary, summarized_count, facts)"""
+
+    @abstractmethod
+    def save_context(self, session_id: str, context: Dict[str, Any]):
+        """Store a session's rolling context"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Counts of stored sessions and messages, and the bytes their transcripts take"""
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle past their TTL from memory; stores that keep nothing in memory have nothing to do"""
+        return 0
+
+
+class CampaignRepository(ABC):
+    """
+    Storage for campaigns, their contacts and dispatch jobs.
+
+    Implementations keep a call token index and a per-campaign status
+    histogram so token lookups and stats never scan the contact list.
+    Contact status only changes through `set_contact_status` and
+    `create_job`, which move counts between histogram buckets and append
+    the change to an event log that analytics read back with `get_events`.
+    """
+
+    # Campaigns
+
+    @abstractmethod
+    def list_campaigns(self, include_contacts: bool = True) -> List[Dict[str, Any]]:
+        """Get all campaigns, with their contacts unless `include_contacts` is False"""
+
+    @abstractmethod
+    def get_campaign(self, campaign_id: str, include_contacts: bool = True) -> Optional[Dict[str, Any]]:
+        """Get a specific campaign"""
+
+    @abstractmethod
+    def create_campaign(self, campaign: Dict[str, Any]):
+        """Store a new campaign"""
+
+    @abstractmethod
+    def update_campaign(self, campaign_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply field updates to a campaign and return it, without its contacts"""
+
+    @abstractmethod
+    def delete_campaign(self, campaign_id: str) -> bool:
+        """Delete a campaign with its contacts and jobs"""
+
+    # Contacts
+
+    @abstractmethod
+    def add_contacts(self, campaign_id: str, contacts: List[Dict[str, Any]]):
+        """Append contacts to a campaign"""
+
+    @abstractmethod
+    def remove_contact(self, campaign_id: str, contact_id: str) -> bool:
+        """Remove a contact from a campaign"""
+
+    @abstractmethod
+    def get_contact(self, campaign_id: str, contact_id: str) -> Optional[Dict[str, Any]]:
+        """Get a contact by id"""
+
+    @abstractmethod
+    def get_contacts(self, campaign_id: str, contact_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get the contacts with the given ids, in the given order, skipping unknown ids"""
+
+    @abstractmethod
+    def list_contacts(
+        self,
+        campaign_id: str,
+        status: Optional[str] = None,
+        company: Optional[str] = None,
+        email: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Get one page of a campaign's contacts and the cursor for the next page.
+
+        Filters: exact `status`, case-insensitive exact `company` and
+        case-insensitive substring `email`. `sort` is one of CONTACT_SORTS;
+        contacts without activity sort as the oldest. Pages are keyset
+        based rather than offset based, so deep pages cost no more than the
+        first. The returned cursor is None on the last page.
+        """
+
+    @abstractmethod
+    def get_contact_ids_by_status(self, campaign_id: str, status: str) -> List[str]:
+        """Get the ids of a campaign's contacts in a given status"""
+
+    @abstractmethod
+    def get_existing_emails(self, campaign_id: str, emails: List[str]) -> Set[str]:
+        """Get which of the given emails already belong to contacts of a campaign"""
+
+    @abstractmethod
+    def find_by_token(self, call_token: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Get the (campaign without contacts, contact) a call token belongs to"""
+
+    @abstractmethod
+    def set_contact_status(
+        self,
+        campaign_id: str,
+        contact_id: str,
+        status: str,
+        expected: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Move a contact to a new status and return it.
+
+        When `expected` is given the change only happens if the contact is
+        currently in that status; None is returned otherwise.
+        """
+
+    @abstractmethod
+    def get_stats(self, campaign_id: str) -> Dict[str, int]:
+        """Get campaign stats from the status histogram"""
+
+    @abstractmethod
+    def get_events(self, after: int = 0, limit: int = 10000) -> List[Tuple[int, int, str, str, str, str]]:
+        """
+        Get contact status events logged after sequence number `after`, oldest first.
+
+        Each event is (seq, at, campaign_id, agent_id, contact_id, status)
+        with `at` in epoch seconds. A contact is logged in its initial
+        status when added and again on every change of status. The log is
+        append-only: it keeps the events of removed contacts and deleted
+        campaigns.
+        """
+
+    # Dispatch jobs
+
+    @abstractmethod
+    def create_job(self, job: Dict[str, Any], contact_ids: List[str]) -> List[str]:
+        """
+        Claim contacts for a new dispatch job and return the claimed ids.
+
+        In one atomic step, the contacts among `contact_ids` that are still
+        PENDING move to EMAIL_QUEUED and the job is stored with a queued
+        checkpoint for each of them and `total` set to their number.
+        Nothing is stored when no contact could be claimed.
+        """
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job with its counters and the first contact errors"""
+
+    @abstractmethod
+    def get_campaign_jobs(self, campaign_id: str) -> List[Dict[str, Any]]:
+        """Get all jobs for a campaign"""
+
+    @abstractmethod
+    def get_unfinished_jobs(self) -> List[Dict[str, Any]]:
+        """Get jobs that are still queued or running"""
+
+    @abstractmethod
+    def update_job(self, job_id: str, updates: Dict[str, Any]):
+        """Apply field updates to a job"""
+
+    @abstractmethod
+    def acquire_job(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Take or renew the lease on an unfinished job.
+
+        Succeeds when the job has no owner, already belongs to `owner` or its
+        lease has run out, and sets the lease to expire `lease_seconds` from
+        now. Only the lease holder may run the job.
+        """
+
+    @abstractmethod
+    def get_checkpoints(self, job_id: str, state: Optional[str] = None) -> Dict[str, str]:
+        """Get contact_id -> checkpoint for a job, optionally only those in one state"""
+
+    @abstractmethod
+    def set_checkpoint(
+        self,
+        job_id: str,
+        contact_id: str,
+        state: str,
+        error: Optional[str] = None,
+        expected: Optional[str] = None
+    ) -> bool:
+        """
+        Record a contact's checkpoint, counting sent, failed and in doubt outcomes on the job.
+
+        When `expected` is given the checkpoint only changes if it is
+        currently in that state, and if that state was a counted outcome
+        (an in doubt contact an operator resolved) it is no longer counted.
+        Returns whether it changed.
+        """
+
+
+class RealtimeSessionRepository(ABC):
+    """
+    Live realtime voice sessions and the worker that owns each one.
+
+    A voice session is a WebSocket held open by one worker process. Workers
+    refresh `last_seen` on their sessions periodically, so sessions left
+    behind by a worker that died drop out once the lease runs out.
+    """
+
+    @abstractmethod
+    def register(self, session: Dict[str, Any]):
+        """Record a session opened by a worker"""
+
+    @abstractmethod
+    def unregister(self, session_id: str):
+        """Forget a session once its socket closes"""
+
+    @abstractmethod
+    def get_session(self, session_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Get a live session"""
+
+    @abstractmethod
+    def list_sessions(self, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Get the live sessions of every worker"""
+
+    @abstractmethod
+    def touch_owner(self, owner: str):
+        """Refresh `last_seen` on every session a worker owns"""
+
+    @abstractmethod
+    def remove_owner(self, owner: str):
+        """Forget every session a worker owns"""
+
+
+class OutboxRepository(ABC):
+    """
+    Transactional messages waiting to be delivered in the background.
+
+    Each message has a unique dedupe key, so enqueueing the same message
+    twice stores it once. Workers claim due messages with a lease before
+    delivering them; a message whose worker died is claimed again once the
+    lease runs out.
+    """
+
+    @abstractmethod
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        """Store a message unless one with the same dedupe key exists; return whether it was stored"""
+
+    @abstractmethod
+    def claim_due(self, owner: str, lease_seconds: float, limit: int) -> List[Dict[str, Any]]:
+        """
+        Move up to `limit` due messages to SENDING for `owner` and return them.
+
+        Due means PENDING with `next_attempt_at` in the past, or SENDING
+        with an expired lease. Each claim counts as a delivery attempt.
+        """
+
+    @abstractmethod
+    def mark_sent(self, message_id: str):
+        """Record that a message was delivered"""
+
+    @abstractmethod
+    def reschedule(self, message_id: str, error: str, next_attempt_at: float):
+        """Put a message back to PENDING after a failed attempt"""
+
+    @abstractmethod
+    def mark_dead(self, message_id: str, error: str):
+        """Stop retrying a message"""
+
+    @abstractmethod
+    def requeue(self, message_id: str) -> bool:
+        """Give a dead message a fresh set of attempts; return whether it was dead"""
+
+    @abstractmethod
+    def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Get a message"""
+
+    @abstractmethod
+    def list_messages(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get the newest messages, optionally only those in one status"""
+
+
+class SlotHoldRepository(ABC):
+    """
+    Short-lived holds on calendar slots, so concurrent callers cannot book the same one.
+
+    A hold is keyed by (event_type_id, start), where start is the slot's
+    normalized ISO start time. Claiming is atomic: the first holder wins and
+    everyone else is refused until the hold is released or expires. A
+    confirmed hold stays in place for a while after the booking so the slot
+    is not offered again before the calendar reflects it.
+    """
+
+    @abstractmethod
+    def claim(self, event_type_id: str, start: str, holder: str, expires_at: float) -> bool:
+        """Hold a slot unless it is held or booked; a holder may claim its own unconfirmed hold again"""
+
+    @abstractmethod
+    def confirm(self, event_type_id: str, start: str, holder: str, expires_at: float):
+        """Mark a held slot as booked and keep it held until `expires_at`"""
+
+    @abstractmethod
+    def release(self, event_type_id: str, start: str, holder: str):
+        """Drop an unconfirmed hold, if `holder` owns it"""
+
+    @abstractmethod
+    def held_starts(self, event_type_id: str, start_from: str, start_to: str) -> Set[str]:
+        """Get the starts in [start_from, start_to] that are currently held"""
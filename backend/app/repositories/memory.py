@@ -0,0 +1,762 @@
+import bisect
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Any, Optional, Set, Tuple, Callable, Iterator
+from datetime import datetime
+from app.config import get_settings
+from app.models import ContactStatus, DispatchJobStatus, DispatchCheckpoint, OutboxStatus, SlotHoldState
+from app.repositories.records import ContactRecord, MessageRecord, CONTACT_STATUSES
+from app.repositories.base import (
+    AgentRepository, SessionRepository, CampaignRepository, RealtimeSessionRepository, OutboxRepository,
+    SlotHoldRepository,
+    JOB_COUNTERS, MAX_JOB_ERRORS, stats_from_counts, encode_cursor, decode_cursor
+)
+
+settings = get_settings()
+
+
+class MemoryAgentRepository(AgentRepository):
+    """Agents kept in a process-local dict"""
+
+    def __init__(self):
+        self.agents: Dict[str, Dict[str, Any]] = {}
+
+    def list_agents(self) -> List[Dict[str, Any]]:
+        return list(self.agents.values())
+
+    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        return self.agents.get(agent_id)
+
+    def create_agent(self, agent: Dict[str, Any]):
+        self.agents[agent["id"]] = agent
+
+    def ensure_agent(self, agent: Dict[str, Any]) -> bool:
+        if agent["id"] in self.agents:
+            return False
+        self.agents[agent["id"]] = agent
+        return True
+
+    def update_agent(self, agent_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        agent = self.agents.get(agent_id)
+        if agent:
+            agent.update(updates)
+        return agent
+
+    def delete_agent(self, agent_id: str) -> bool:
+        return self.agents.pop(agent_id, None) is not None
+
+
+# Rough per-message cost of the record and the content string's header (benchmarks/record_memory.py)
+MESSAGE_OVERHEAD_BYTES = 160
+
+
+def _message_bytes(message: MessageRecord) -> int:
+    return MESSAGE_OVERHEAD_BYTES + len(message.content or "")
+
+
+class MemorySessionRepository(SessionRepository):
+    """
+    Sessions kept in a process-local dict, bounded in size.
+
+    Messages are held as compact MessageRecords and returned as dicts.
+    Sessions are kept in least-recently-used order. A session idle for
+    longer than `idle_ttl_seconds` is evicted, and the least recently used
+    ones are evicted while there are more than `max_entries` sessions or
+    their transcripts take more than `max_bytes` (estimated). With
+    `spill_dir` set, evicted sessions are written there as JSON and loaded
+    back the next time they are asked for; otherwise they are dropped.
+    """
+
+    def __init__(
+        self,
+        idle_ttl_seconds: float = 0,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        spill_dir: str = ""
+    ):
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.contexts: Dict[str, Dict[str, Any]] = {}
+        # session_id -> (last used monotonic time, estimated bytes)
+        self._usage: Dict[str, List[float]] = {}
+        self.bytes = 0
+        self.evicted = {"idle": 0, "lru": 0}
+        self.spilled = 0
+        self.restored = 0
+
+    def _spill_path(self, session_id: str) -> str:
+        # Session ids are generated uuids; keep a stray id from escaping the directory
+        return os.path.join(self.spill_dir, f"{os.path.basename(session_id)}.json")
+
+    def _touch(self, session_id: str):
+        self.sessions.move_to_end(session_id)
+        self._usage[session_id][0] = time.monotonic()
+
+    def _store(self, session: Dict[str, Any], context: Optional[Dict[str, Any]] = None):
+        session_bytes = sum(_message_bytes(m) for m in session["messages"])
+        self.sessions[session["id"]] = session
+        self._usage[session["id"]] = [time.monotonic(), session_bytes]
+        self.bytes += session_bytes
+        if context:
+            self.contexts[session["id"]] = context
+
+    def _evict(self, session_id: str, reason: str):
+        session = self.sessions.pop(session_id)
+        context = self.contexts.pop(session_id, None)
+        self.bytes -= self._usage.pop(session_id)[1]
+        self.evicted[reason] += 1
+        if self.spill_dir:
+            try:
+                with open(self._spill_path(session_id), "w") as f:
+                    json.dump({"session": self._snapshot(session), "context": context}, f)
+                self.spilled += 1
+            except OSError as e:
+                print(f"Could not spill session {session_id}: {e}")
+
+    def _restore(self, session_id: str) -> bool:
+        """Load a spilled session back into memory"""
+        if not self.spill_dir:
+            return False
+        path = self._spill_path(session_id)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError):
+            return False
+        session = data["session"]
+        self._store({**session, "messages": [MessageRecord.from_dict(m) for m in session["messages"]]}, data["context"])
+        self.restored += 1
+        self._enforce()
+        return True
+
+    def _enforce(self):
+        """Evict idle sessions, then least recently used ones while over a cap (never the newest)"""
+        if self.idle_ttl_seconds > 0:
+            cutoff = time.monotonic() - self.idle_ttl_seconds
+            while self.sessions:
+                oldest = next(iter(self.sessions))
+                if self._usage[oldest][0] > cutoff:
+                    break
+                self._evict(oldest, "idle")
+        while len(self.sessions) > 1 and (
+            (self.max_entries > 0 and len(self.sessions) > self.max_entries)
+            or (self.max_bytes > 0 and self.bytes > self.max_bytes)
+        ):
+            self._evict(next(iter(self.sessions)), "lru")
+
+    def _get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if session_id not in self.sessions and not self._restore(session_id):
+            return None
+        self._touch(session_id)
+        return self.sessions[session_id]
+
+    @staticmethod
+    def _snapshot(session: Dict[str, Any]) -> Dict[str, Any]:
+        return {**session, "messages": [m.to_dict() for m in session["messages"]]}
+
+    def create_session(self, session: Dict[str, Any]):
+        self._store({**session, "messages": [MessageRecord.from_dict(m) for m in session.get("messages", [])]})
+        self._enforce()
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self._get(session_id)
+        if not session:
+            return None
+        # Snapshot the transcript like a database read would
+        return self._snapshot(session)
+
+    def add_message(self, session_id: str, message: Dict[str, Any]):
+        session = self._get(session_id)
+        if session:
+            record = MessageRecord.from_dict(message)
+            session["messages"].append(record)
+            message_bytes = _message_bytes(record)
+            self._usage[session_id][1] += message_bytes
+            self.bytes += message_bytes
+            self._enforce()
+
+    def get_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if not self._get(session_id):
+            return None
+        context = self.contexts.get(session_id)
+        if not context:
+            return None
+        return {**context, "facts": dict(context["facts"])}
+
+    def save_context(self, session_id: str, context: Dict[str, Any]):
+        if self._get(session_id):
+            self.contexts[session_id] = {**context, "facts": dict(context["facts"])}
+
+    def evict_idle(self) -> int:
+        before = self.evicted["idle"]
+        self._enforce()
+        return self.evicted["idle"] - before
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "live_sessions": len(self.sessions),
+            "live_messages": sum(len(session["messages"]) for session in self.sessions.values()),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "evicted": dict(self.evicted),
+            "spilled": self.spilled,
+            "restored": self.restored,
+            "spill_dir": self.spill_dir or None
+        }
+
+
+# Bits of an activity sort key that hold the contact's sequence number
+SEQ_BITS = 32
+# Stale entries a contact order tolerates before it is compacted
+MIN_STALE_ENTRIES = 1024
+
+
+class ContactOrder:
+    """
+    A campaign's contacts sorted by an integer key, for keyset pagination.
+
+    When a contact's key changes it is added again under the new key and
+    the old entry is left behind; readers skip entries whose key is no
+    longer the contact's (`key` returns None for removed contacts), and the
+    order is compacted once stale entries outnumber live ones. A status
+    change is then an append instead of a shift of the whole list.
+    """
+
+    def __init__(self, key: Callable[[ContactRecord], Optional[int]]):
+        self.key = key
+        self.keys: List[int] = []
+        self.contacts: List[ContactRecord] = []
+        self.stale = 0
+
+    def add(self, contacts: List[ContactRecord]):
+        in_order = True
+        for contact in contacts:
+            key = self.key(contact)
+            if self.keys and key < self.keys[-1]:
+                in_order = False
+            self.keys.append(key)
+            self.contacts.append(contact)
+        if not in_order:
+            # Two sorted runs, which the sort merges in linear time
+            order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+            self.keys = [self.keys[i] for i in order]
+            self.contacts = [self.contacts[i] for i in order]
+
+    def discard(self):
+        """Note that one entry went stale"""
+        self.stale += 1
+        if self.stale > MIN_STALE_ENTRIES and self.stale * 2 > len(self.keys):
+            live = [i for i, contact in enumerate(self.contacts) if self.key(contact) == self.keys[i]]
+            self.keys = [self.keys[i] for i in live]
+            self.contacts = [self.contacts[i] for i in live]
+            self.stale = 0
+
+    def walk(self, after: Optional[int] = None, descending: bool = False) -> Iterator[ContactRecord]:
+        """Yield the live contacts after the `after` key (exclusive), in order"""
+        if after is None:
+            index = len(self.keys) - 1 if descending else 0
+        elif descending:
+            index = bisect.bisect_left(self.keys, after) - 1
+        else:
+            index = bisect.bisect_right(self.keys, after)
+        step = -1 if descending else 1
+        while 0 <= index < len(self.keys):
+            contact = self.contacts[index]
+            if self.key(contact) == self.keys[index]:
+                yield contact
+            index += step
+
+
+class MemoryCampaignRepository(CampaignRepository):
+    """
+    Campaigns kept in process-local dicts.
+
+    Contacts are held as compact ContactRecords in a per-campaign contact
+    id index and turned into dicts only when returned. Besides that it
+    maintains a call token index, a per-campaign email index, a
+    per-campaign status histogram and, for pagination, each campaign's
+    contacts ordered by creation and by last activity.
+    With DEBUG=true every change to the histogram is checked against a
+    full recount of the contacts.
+    """
+
+    def __init__(self):
+        self.campaigns: Dict[str, Dict[str, Any]] = {}
+        # campaign_id -> contact_id -> contact, in insertion order
+        self._contacts: Dict[str, Dict[str, ContactRecord]] = {}
+        # call_token -> (campaign_id, contact_id)
+        self._tokens: Dict[str, Tuple[str, str]] = {}
+        # campaign_id -> email -> number of contacts with that email
+        self._emails: Dict[str, Counter] = {}
+        # contact_id -> insertion sequence, the tiebreaker for contact pagination
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        # campaign_id -> contacts in (created_at, seq) / (last_activity, seq) order
+        self._by_created: Dict[str, ContactOrder] = {}
+        self._by_activity: Dict[str, ContactOrder] = {}
+        # campaign_id -> status -> number of contacts in that status
+        self._status_counts: Dict[str, Counter] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # job_id -> contact_id -> checkpoint
+        self._checkpoints: Dict[str, Dict[str, str]] = {}
+        self._job_errors: Dict[str, List[Dict[str, Any]]] = {}
+        # (at, campaign_id, agent_id, contact_id, status); an event's seq is its position + 1
+        self._events: List[Tuple[int, str, str, str, str]] = []
+
+    # Campaigns
+
+    def list_campaigns(self, include_contacts: bool = True) -> List[Dict[str, Any]]:
+        return [self.get_campaign(campaign_id, include_contacts) for campaign_id in self.campaigns]
+
+    def get_campaign(self, campaign_id: str, include_contacts: bool = True) -> Optional[Dict[str, Any]]:
+        campaign = self.campaigns.get(campaign_id)
+        if not campaign:
+            return None
+        if not include_contacts:
+            return dict(campaign)
+        return {**campaign, "contacts": [c.to_dict() for c in self._contacts[campaign_id].values()]}
+
+    def create_campaign(self, campaign: Dict[str, Any]):
+        campaign["stats"] = stats_from_counts({})
+        # Contacts live in the contact index, not in the campaign dict
+        self.campaigns[campaign["id"]] = {k: v for k, v in campaign.items() if k != "contacts"}
+        self._contacts[campaign["id"]] = {}
+        self._emails[campaign["id"]] = Counter()
+        self._status_counts[campaign["id"]] = Counter()
+        self._by_created[campaign["id"]] = ContactOrder(self._created_key)
+        self._by_activity[campaign["id"]] = ContactOrder(self._activity_key)
+
+    def update_campaign(self, campaign_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        campaign = self.campaigns.get(campaign_id)
+        if not campaign:
+            return None
+        campaign.update({k: v for k, v in updates.items() if k != "contacts"})
+        return self.get_campaign(campaign_id, include_contacts=False)
+
+    def delete_campaign(self, campaign_id: str) -> bool:
+        campaign = self.campaigns.pop(campaign_id, None)
+        if not campaign:
+            return False
+        self._status_counts.pop(campaign_id, None)
+        self._emails.pop(campaign_id, None)
+        self._by_created.pop(campaign_id, None)
+        self._by_activity.pop(campaign_id, None)
+        for contact in self._contacts.pop(campaign_id, {}).values():
+            self._tokens.pop(contact.call_token, None)
+            self._seq.pop(contact.id, None)
+        for job_id in [j["id"] for j in self._jobs.values() if j["campaign_id"] == campaign_id]:
+            self._jobs.pop(job_id)
+            self._checkpoints.pop(job_id, None)
+            self._job_errors.pop(job_id, None)
+        return True
+
+    # Contacts
+
+    def add_contacts(self, campaign_id: str, contacts: List[Dict[str, Any]]):
+        index = self._contacts[campaign_id]
+        counts = self._status_counts[campaign_id]
+        emails = self._emails[campaign_id]
+        agent_id = self.campaigns[campaign_id].get("agent_id", "")
+        now = int(time.time())
+        records = []
+        for contact in contacts:
+            record = ContactRecord.from_dict(contact)
+            records.append(record)
+            index[record.id] = record
+            emails[record.email] += 1
+            self._next_seq += 1
+            self._seq[record.id] = self._next_seq
+            self._tokens[record.call_token] = (campaign_id, record.id)
+            counts[record.status.value] += 1
+            self._events.append((now, campaign_id, agent_id, record.id, record.status.value))
+        self._by_created[campaign_id].add(records)
+        self._by_activity[campaign_id].add(records)
+        self._refresh_stats(campaign_id)
+
+    def remove_contact(self, campaign_id: str, contact_id: str) -> bool:
+        contact = self._contacts[campaign_id].pop(contact_id, None)
+        if not contact:
+            return False
+        self._tokens.pop(contact.call_token, None)
+        self._emails[campaign_id][contact.email] -= 1
+        self._seq.pop(contact_id, None)
+        self._by_created[campaign_id].discard()
+        self._by_activity[campaign_id].discard()
+        self._status_counts[campaign_id][contact.status.value] -= 1
+        self._refresh_stats(campaign_id)
+        return True
+
+    def get_contact(self, campaign_id: str, contact_id: str) -> Optional[Dict[str, Any]]:
+        contact = self._contacts.get(campaign_id, {}).get(contact_id)
+        return contact.to_dict() if contact else None
+
+    def get_contacts(self, campaign_id: str, contact_ids: List[str]) -> List[Dict[str, Any]]:
+        index = self._contacts.get(campaign_id, {})
+        return [index[cid].to_dict() for cid in contact_ids if cid in index]
+
+    def list_contacts(
+        self,
+        campaign_id: str,
+        status: Optional[str] = None,
+        company: Optional[str] = None,
+        email: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Walks the campaign's contact order from the cursor, so a page costs
+        O(log n) plus the contacts stepped over: flat when unfiltered, while
+        a selective filter scans past every contact it skips.
+        """
+        by_activity = sort == "last_activity"
+        order = (self._by_activity if by_activity else self._by_created).get(campaign_id)
+        if order is None:
+            return [], None
+
+        after = None
+        if cursor:
+            value, seq = decode_cursor(cursor)
+            if value and not value.isdigit():
+                raise ValueError("Invalid cursor")
+            after = (int(value or 0) << SEQ_BITS | seq) if by_activity else seq
+
+        company = company.lower() if company else None
+        email = email.lower() if email else None
+        page = []
+        for contact in order.walk(after, descending):
+            if status and contact.status != status:
+                continue
+            if company and (contact.company or "").lower() != company:
+                continue
+            if email and email not in contact.email.lower():
+                continue
+            page.append(contact)
+            if len(page) > limit:
+                break
+
+        next_cursor = None
+        if len(page) > limit:
+            last = page[limit - 1]
+            # Zero-padded epoch microseconds sort like the timestamps they stand for
+            value = f"{last.last_activity:020d}" if by_activity and last.last_activity else ""
+            next_cursor = encode_cursor([value, self._seq[last.id]])
+        return [contact.to_dict() for contact in page[:limit]], next_cursor
+
+    def _created_key(self, contact: ContactRecord) -> Optional[int]:
+        return self._seq.get(contact.id)
+
+    def _activity_key(self, contact: ContactRecord) -> Optional[int]:
+        """Last activity (none sorts as the oldest), then seq, packed into one int"""
+        seq = self._seq.get(contact.id)
+        if seq is None:
+            return None
+        return (contact.last_activity or 0) << SEQ_BITS | seq
+
+    def get_contact_ids_by_status(self, campaign_id: str, status: str) -> List[str]:
+        return [c.id for c in self._contacts[campaign_id].values() if c.status == status]
+
+    def get_existing_emails(self, campaign_id: str, emails: List[str]) -> Set[str]:
+        index = self._emails.get(campaign_id, Counter())
+        return {email for email in emails if index[email] > 0}
+
+    def find_by_token(self, call_token: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        entry = self._tokens.get(call_token)
+        if not entry:
+            return None
+        campaign_id, contact_id = entry
+        return self.get_campaign(campaign_id, include_contacts=False), self._contacts[campaign_id][contact_id].to_dict()
+
+    def set_contact_status(
+        self,
+        campaign_id: str,
+        contact_id: str,
+        status: str,
+        expected: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        contact = self._contacts.get(campaign_id, {}).get(contact_id)
+        if not contact or (expected is not None and contact.status != expected):
+            return None
+        self._move(campaign_id, contact, status)
+        self._refresh_stats(campaign_id)
+        return contact.to_dict()
+
+    def _move(self, campaign_id: str, contact: ContactRecord, status: str):
+        """Move a contact between histogram buckets, logging the change"""
+        now = int(time.time())
+        if contact.status != status:
+            agent_id = self.campaigns[campaign_id].get("agent_id", "")
+            self._events.append((now, campaign_id, agent_id, contact.id, status))
+        counts = self._status_counts[campaign_id]
+        counts[contact.status.value] -= 1
+        counts[status] += 1
+        contact.status = CONTACT_STATUSES[status]
+        before = self._activity_key(contact)
+        contact.last_activity = time.time_ns() // 1000
+        if self._activity_key(contact) != before:
+            order = self._by_activity[campaign_id]
+            order.add([contact])
+            order.discard()
+
+    def get_stats(self, campaign_id: str) -> Dict[str, int]:
+        return stats_from_counts(self._status_counts[campaign_id])
+
+    def get_events(self, after: int = 0, limit: int = 10000) -> List[Tuple[int, int, str, str, str, str]]:
+        return [(seq, *event) for seq, event in enumerate(self._events[after:after + limit], start=after + 1)]
+
+    def _refresh_stats(self, campaign_id: str):
+        """Keep the campaign's stored stats in line with the histogram"""
+        self.campaigns[campaign_id]["stats"] = self.get_stats(campaign_id)
+        if settings.debug:
+            self.check_consistency(campaign_id)
+
+    def check_consistency(self, campaign_id: str):
+        """Compare the histogram against a full recount of the contacts (debug only)"""
+        recount = Counter(c.status.value for c in self._contacts[campaign_id].values())
+        counts = +self._status_counts[campaign_id]  # drop zero buckets
+        if recount != counts:
+            print(f"Campaign {campaign_id} status counts drifted: histogram={dict(counts)} recount={dict(recount)}")
+            raise AssertionError(f"Campaign {campaign_id} stats are out of sync with its contacts")
+
+    # Dispatch jobs
+
+    def create_job(self, job: Dict[str, Any], contact_ids: List[str]) -> List[str]:
+        campaign_id = job["campaign_id"]
+        claimed = []
+        index = self._contacts.get(campaign_id, {})
+        for contact_id in dict.fromkeys(contact_ids):
+            contact = index.get(contact_id)
+            if contact and contact.status == ContactStatus.PENDING:
+                self._move(campaign_id, contact, ContactStatus.EMAIL_QUEUED.value)
+                claimed.append(contact_id)
+        if not claimed:
+            return []
+
+        self._refresh_stats(campaign_id)
+        job["total"] = len(claimed)
+        self._jobs[job["id"]] = dict(job)
+        self._checkpoints[job["id"]] = {cid: DispatchCheckpoint.QUEUED.value for cid in claimed}
+        self._job_errors[job["id"]] = []
+        return claimed
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if not job:
+            return None
+        return {**job, "errors": self._job_errors[job_id][:MAX_JOB_ERRORS]}
+
+    def get_campaign_jobs(self, campaign_id: str) -> List[Dict[str, Any]]:
+        return [self.get_job(j["id"]) for j in self._jobs.values() if j["campaign_id"] == campaign_id]
+
+    def get_unfinished_jobs(self) -> List[Dict[str, Any]]:
+        unfinished = (DispatchJobStatus.QUEUED.value, DispatchJobStatus.RUNNING.value)
+        return [self.get_job(j["id"]) for j in self._jobs.values() if j["status"] in unfinished]
+
+    def update_job(self, job_id: str, updates: Dict[str, Any]):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(updates)
+
+    def acquire_job(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        job = self._jobs.get(job_id)
+        unfinished = (DispatchJobStatus.QUEUED.value, DispatchJobStatus.RUNNING.value)
+        if not job or job["status"] not in unfinished:
+            return False
+        now = time.time()
+        if job.get("owner") not in (None, owner) and (job.get("lease_until") or 0) >= now:
+            return False
+        job["owner"] = owner
+        job["lease_until"] = now + lease_seconds
+        return True
+
+    def get_checkpoints(self, job_id: str, state: Optional[str] = None) -> Dict[str, str]:
+        checkpoints = self._checkpoints.get(job_id, {})
+        if state is None:
+            return dict(checkpoints)
+        return {cid: s for cid, s in checkpoints.items() if s == state}
+
+    def set_checkpoint(
+        self,
+        job_id: str,
+        contact_id: str,
+        state: str,
+        error: Optional[str] = None,
+        expected: Optional[str] = None
+    ) -> bool:
+        job = self._jobs.get(job_id)
+        checkpoints = self._checkpoints.get(job_id, {})
+        if not job or contact_id not in checkpoints:
+            return False
+        if expected is not None and checkpoints[contact_id] != expected:
+            return False
+        checkpoints[contact_id] = state
+        if expected in JOB_COUNTERS:
+            job[JOB_COUNTERS[expected]] -= 1
+        if state in JOB_COUNTERS:
+            job[JOB_COUNTERS[state]] += 1
+        if error is not None:
+            contact = self.get_contact(job["campaign_id"], contact_id)
+            self._job_errors[job_id].append({
+                "contact_id": contact_id,
+                "email": contact["email"] if contact else None,
+                "error": error
+            })
+        return True
+
+
+class MemoryRealtimeSessionRepository(RealtimeSessionRepository):
+    """Realtime sessions kept in a process-local dict"""
+
+    def __init__(self):
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.contexts: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, session: Dict[str, Any]):
+        self.sessions[session["id"]] = {**session, "last_seen": time.time()}
+
+    def unregister(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    def get_session(self, session_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        session = self.sessions.get(session_id)
+        if not session or session["last_seen"] < time.time() - lease_seconds:
+            return None
+        return dict(session)
+
+    def list_sessions(self, lease_seconds: float) -> List[Dict[str, Any]]:
+        cutoff = time.time() - lease_seconds
+        return [dict(s) for s in self.sessions.values() if s["last_seen"] >= cutoff]
+
+    def touch_owner(self, owner: str):
+        now = time.time()
+        for session in self.sessions.values():
+            if session["owner"] == owner:
+                session["last_seen"] = now
+
+    def remove_owner(self, owner: str):
+        for session_id in [sid for sid, s in self.sessions.items() if s["owner"] == owner]:
+            del self.sessions[session_id]
+
+
+class MemoryOutboxRepository(OutboxRepository):
+    """Outbox messages kept in a process-local dict"""
+
+    def __init__(self):
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self.dedupe_keys: Dict[str, str] = {}
+
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        if message["dedupe_key"] in self.dedupe_keys:
+            return False
+        self.messages[message["id"]] = dict(message)
+        self.dedupe_keys[message["dedupe_key"]] = message["id"]
+        return True
+
+    def claim_due(self, owner: str, lease_seconds: float, limit: int) -> List[Dict[str, Any]]:
+        now = time.time()
+        due = [
+            m for m in self.messages.values()
+            if (m["status"] == OutboxStatus.PENDING.value and m["next_attempt_at"] <= now)
+            or (m["status"] == OutboxStatus.SENDING.value and (m["lease_until"] or 0) < now)
+        ]
+        due.sort(key=lambda m: m["next_attempt_at"])
+        claimed = []
+        for message in due[:limit]:
+            message.update({
+                "status": OutboxStatus.SENDING.value,
+                "owner": owner,
+                "lease_until": now + lease_seconds,
+                "attempts": message["attempts"] + 1
+            })
+            claimed.append(dict(message))
+        return claimed
+
+    def mark_sent(self, message_id: str):
+        self.messages[message_id].update({
+            "status": OutboxStatus.SENT.value,
+            "owner": None,
+            "lease_until": None,
+            "sent_at": datetime.now().isoformat()
+        })
+
+    def reschedule(self, message_id: str, error: str, next_attempt_at: float):
+        self.messages[message_id].update({
+            "status": OutboxStatus.PENDING.value,
+            "owner": None,
+            "lease_until": None,
+            "last_error": error,
+            "next_attempt_at": next_attempt_at
+        })
+
+    def mark_dead(self, message_id: str, error: str):
+        self.messages[message_id].update({
+            "status": OutboxStatus.DEAD.value,
+            "owner": None,
+            "lease_until": None,
+            "last_error": error
+        })
+
+    def requeue(self, message_id: str) -> bool:
+        message = self.messages.get(message_id)
+        if not message or message["status"] != OutboxStatus.DEAD.value:
+            return False
+        message.update({"status": OutboxStatus.PENDING.value, "attempts": 0, "next_attempt_at": time.time()})
+        return True
+
+    def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        message = self.messages.get(message_id)
+        return dict(message) if message else None
+
+    def list_messages(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        # Dicts keep insertion order, so the newest messages are last
+        messages = [m for m in reversed(self.messages.values()) if status is None or m["status"] == status]
+        return [dict(m) for m in messages[:limit]]
+
+
+class MemorySlotHoldRepository(SlotHoldRepository):
+    """Slot holds kept in a process-local dict"""
+
+    def __init__(self):
+        self.holds: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def claim(self, event_type_id: str, start: str, holder: str, expires_at: float) -> bool:
+        now = time.time()
+        hold = self.holds.get((event_type_id, start))
+        if hold and hold["expires_at"] > now:
+            return hold["holder"] == holder and hold["state"] == SlotHoldState.HELD.value
+        self.holds[(event_type_id, start)] = {
+            "holder": holder,
+            "state": SlotHoldState.HELD.value,
+            "expires_at": expires_at
+        }
+        return True
+
+    def confirm(self, event_type_id: str, start: str, holder: str, expires_at: float):
+        hold = self.holds.get((event_type_id, start))
+        if hold and hold["holder"] == holder:
+            hold.update({"state": SlotHoldState.BOOKED.value, "expires_at": expires_at})
+
+    def release(self, event_type_id: str, start: str, holder: str):
+        hold = self.holds.get((event_type_id, start))
+        if hold and hold["holder"] == holder and hold["state"] == SlotHoldState.HELD.value:
+            del self.holds[(event_type_id, start)]
+
+    def held_starts(self, event_type_id: str, start_from: str, start_to: str) -> Set[str]:
+        now = time.time()
+        expired = [key for key, hold in self.holds.items() if hold["expires_at"] <= now]
+        for key in expired:
+            del self.holds[key]
+        return {
+            start for (event_type, start) in self.holds
+            if event_type == event_type_id and start_from <= start <= start_to
+        }
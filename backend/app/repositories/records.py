@@ -0,0 +1,100 @@
+import sys
+from datetime import datetime
+from typing import Dict, Any, Optional
+from app.models import ContactStatus
+
+# Enum members by value, so records share one status object instead of holding a string each
+CONTACT_STATUSES = {status.value: status for status in ContactStatus}
+
+
+def to_epoch(value: Optional[str]) -> Optional[int]:
+    """ISO timestamp -> epoch microseconds (local time, like datetime.now().isoformat())"""
+    if value is None:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return int(parsed.replace(microsecond=0).timestamp()) * 1_000_000 + parsed.microsecond
+
+
+def to_iso(value: Optional[int]) -> Optional[str]:
+    if value is None:
+        return None
+    seconds, micros = divmod(value, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros).isoformat()
+
+
+class ContactRecord:
+    """
+    One campaign contact as the memory backend stores it.
+
+    Slotted instead of a dict, with the status as a shared ContactStatus
+    member and timestamps as epoch microseconds. `to_dict` gives the usual
+    contact dict (ISO timestamps, status string) for callers.
+    """
+
+    __slots__ = ("id", "name", "email", "company", "status", "call_token", "created_at", "last_activity")
+
+    def __init__(self, id, name, email, company, status, call_token, created_at, last_activity):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.company = company
+        self.status = status
+        self.call_token = call_token
+        self.created_at = created_at
+        self.last_activity = last_activity
+
+    @classmethod
+    def from_dict(cls, contact: Dict[str, Any]) -> "ContactRecord":
+        company = contact.get("company")
+        return cls(
+            contact["id"],
+            contact["name"],
+            contact["email"],
+            # The same few companies repeat across a campaign
+            sys.intern(company) if company else company,
+            CONTACT_STATUSES[contact["status"]],
+            contact["call_token"],
+            to_epoch(contact.get("created_at")),
+            to_epoch(contact.get("last_activity"))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "email": self.email,
+            "company": self.company,
+            "status": self.status.value,
+            "call_token": self.call_token,
+            "created_at": to_iso(self.created_at),
+            "last_activity": to_iso(self.last_activity)
+        }
+
+
+class MessageRecord:
+    """One chat message as the memory backend stores it: slotted, interned role, epoch-microsecond timestamp"""
+
+    __slots__ = ("role", "content", "timestamp", "tokens")
+
+    def __init__(self, role, content, timestamp, tokens):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+        self.tokens = tokens
+
+    @classmethod
+    def from_dict(cls, message: Dict[str, Any]) -> "MessageRecord":
+        return cls(
+            sys.intern(message["role"]),
+            message["content"],
+            to_epoch(message.get("timestamp")),
+            message.get("tokens")
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": to_iso(self.timestamp),
+            "tokens": self.tokens
+        }
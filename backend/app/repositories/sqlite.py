@@ -0,0 +1,965 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Set, Tuple, Iterator
+from collections import Counter
+from datetime import datetime
+from app.config import get_settings
+from app.models import ContactStatus, DispatchJobStatus, DispatchCheckpoint, OutboxStatus, SlotHoldState
+from app.repositories.base import (
+    AgentRepository, SessionRepository, CampaignRepository, RealtimeSessionRepository, OutboxRepository,
+    SlotHoldRepository,
+    JOB_COUNTERS, MAX_JOB_ERRORS, stats_from_counts, encode_cursor, decode_cursor
+)
+
+settings = get_settings()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    system_instructions TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    agent_id TEXT NOT NULL,
+    created_at TEXT,
+    status TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    content TEXT,
+    timestamp TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, seq);
+
+CREATE TABLE IF NOT EXISTS session_context (
+    session_id TEXT PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL DEFAULT '',
+    summarized_count INTEGER NOT NULL DEFAULT 0,
+    facts TEXT NOT NULL DEFAULT '{}'
+);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    agent_id TEXT NOT NULL,
+    email_subject TEXT,
+    email_template TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS contacts (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    company TEXT,
+    status TEXT NOT NULL,
+    call_token TEXT NOT NULL UNIQUE,
+    created_at TEXT,
+    last_activity TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign_status ON contacts(campaign_id, status);
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign_email ON contacts(campaign_id, email);
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign ON contacts(campaign_id);
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign_activity ON contacts(campaign_id, COALESCE(last_activity, ''));
+CREATE INDEX IF NOT EXISTS idx_contacts_campaign_status_activity
+    ON contacts(campaign_id, status, COALESCE(last_activity, ''));
+
+CREATE TABLE IF NOT EXISTS campaign_status_counts (
+    campaign_id TEXT NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (campaign_id, status)
+);
+
+CREATE TABLE IF NOT EXISTS contact_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    at INTEGER NOT NULL,
+    campaign_id TEXT NOT NULL,
+    agent_id TEXT NOT NULL,
+    contact_id TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS dispatch_jobs (
+    id TEXT PRIMARY KEY,
+    campaign_id TEXT NOT NULL REFERENCES campaigns(id) ON DELETE CASCADE,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    sent INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    in_doubt INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_dispatch_jobs_campaign ON dispatch_jobs(campaign_id);
+CREATE INDEX IF NOT EXISTS idx_dispatch_jobs_status ON dispatch_jobs(status);
+
+CREATE TABLE IF NOT EXISTS dispatch_checkpoints (
+    job_id TEXT NOT NULL REFERENCES dispatch_jobs(id) ON DELETE CASCADE,
+    contact_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    error TEXT,
+    PRIMARY KEY (job_id, contact_id)
+);
+CREATE INDEX IF NOT EXISTS idx_dispatch_checkpoints_state ON dispatch_checkpoints(job_id, state);
+
+CREATE TABLE IF NOT EXISTS realtime_sessions (
+    id TEXT PRIMARY KEY,
+    agent_id TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    started_at TEXT,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_realtime_sessions_owner ON realtime_sessions(owner);
+
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    owner TEXT,
+    lease_until REAL,
+    created_at TEXT,
+    sent_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status_due ON outbox(status, next_attempt_at);
+
+CREATE TABLE IF NOT EXISTS slot_holds (
+    event_type_id TEXT NOT NULL,
+    start TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    state TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (event_type_id, start)
+);
+CREATE INDEX IF NOT EXISTS idx_slot_holds_expires ON slot_holds(expires_at);
+"""
+
+# Columns added after a table was first released: (table, column, definition)
+MIGRATIONS = (
+    ("dispatch_jobs", "owner", "TEXT"),
+    ("dispatch_jobs", "lease_until", "REAL"),
+    ("messages", "tokens", "INTEGER"),
+)
+
+AGENT_COLUMNS = ("id", "name", "description", "system_instructions", "status", "created_at", "updated_at")
+CAMPAIGN_COLUMNS = (
+    "id", "name", "description", "agent_id", "email_subject", "email_template",
+    "status", "created_at", "updated_at"
+)
+CONTACT_COLUMNS = ("id", "name", "email", "company", "status", "call_token", "created_at", "last_activity")
+JOB_COLUMNS = (
+    "id", "campaign_id", "status", "total", "sent", "failed", "in_doubt",
+    "error", "created_at", "started_at", "finished_at", "owner", "lease_until"
+)
+REALTIME_SESSION_COLUMNS = ("id", "agent_id", "owner", "started_at", "last_seen")
+OUTBOX_COLUMNS = (
+    "id", "kind", "dedupe_key", "payload", "status", "attempts", "next_attempt_at",
+    "last_error", "owner", "lease_until", "created_at", "sent_at"
+)
+
+# Keep IN (...) lists well below SQLite's bound parameter limit
+CHUNK_SIZE = 500
+
+
+def _chunks(items: List[Any]) -> Iterator[List[Any]]:
+    for i in range(0, len(items), CHUNK_SIZE):
+        yield items[i:i + CHUNK_SIZE]
+
+
+def _placeholders(count: int) -> str:
+    return ",".join("?" * count)
+
+
+class SQLiteDatabase:
+    """
+    A single SQLite connection shared by the repositories of one process.
+
+    Every worker process opens its own connection to the same file. The
+    database runs in WAL mode so several worker processes can read while
+    one writes; writes take the lock up front (BEGIN IMMEDIATE) so
+    read-modify-write sequences such as status transitions are atomic
+    across processes.
+    """
+
+    def __init__(self, path: str):
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+
+        # Set the busy timeout first: every worker runs this setup at the same time
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create missing tables and columns in one transaction"""
+        with self.transaction() as conn:
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            for table, column, definition in MIGRATIONS:
+                columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements in one write transaction"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Tuple = ()) -> Optional[sqlite3.Row]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+
+def _row_to_dict(row: Optional[sqlite3.Row], columns: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    if row is None:
+        return None
+    return {column: row[column] for column in columns}
+
+
+def _update_sql(table: str, updates: Dict[str, Any]) -> str:
+    assignments = ", ".join(f"{column} = ?" for column in updates)
+    return f"UPDATE {table} SET {assignments} WHERE id = ?"
+
+
+class SQLiteAgentRepository(AgentRepository):
+    """Agents stored in SQLite"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def list_agents(self) -> List[Dict[str, Any]]:
+        rows = self.db.query(f"SELECT {', '.join(AGENT_COLUMNS)} FROM agents ORDER BY rowid")
+        return [_row_to_dict(row, AGENT_COLUMNS) for row in rows]
+
+    def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(f"SELECT {', '.join(AGENT_COLUMNS)} FROM agents WHERE id = ?", (agent_id,))
+        return _row_to_dict(row, AGENT_COLUMNS)
+
+    def create_agent(self, agent: Dict[str, Any]):
+        with self.db.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO agents ({', '.join(AGENT_COLUMNS)}) VALUES ({_placeholders(len(AGENT_COLUMNS))})",
+                tuple(agent.get(column) for column in AGENT_COLUMNS)
+            )
+
+    def ensure_agent(self, agent: Dict[str, Any]) -> bool:
+        with self.db.transaction() as conn:
+            return conn.execute(
+                f"INSERT OR IGNORE INTO agents ({', '.join(AGENT_COLUMNS)}) "
+                f"VALUES ({_placeholders(len(AGENT_COLUMNS))})",
+                tuple(agent.get(column) for column in AGENT_COLUMNS)
+            ).rowcount > 0
+
+    def update_agent(self, agent_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        updates = {k: v for k, v in updates.items() if k in AGENT_COLUMNS and k != "id"}
+        if updates:
+            with self.db.transaction() as conn:
+                conn.execute(_update_sql("agents", updates), (*updates.values(), agent_id))
+        return self.get_agent(agent_id)
+
+    def delete_agent(self, agent_id: str) -> bool:
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM agents WHERE id = ?", (agent_id,)).rowcount > 0
+
+
+class SQLiteSessionRepository(SessionRepository):
+    """Sessions and transcripts stored in SQLite"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def create_session(self, session: Dict[str, Any]):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO sessions (id, agent_id, created_at, status) VALUES (?, ?, ?, ?)",
+                (session["id"], session["agent_id"], session["created_at"], session["status"])
+            )
+            for message in session.get("messages", []):
+                self._insert_message(conn, session["id"], message)
+
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one("SELECT id, agent_id, created_at, status FROM sessions WHERE id = ?", (session_id,))
+        if row is None:
+            return None
+        session = _row_to_dict(row, ("id", "agent_id", "created_at", "status"))
+        messages = self.db.query(
+            "SELECT role, content, timestamp, tokens FROM messages WHERE session_id = ? ORDER BY seq",
+            (session_id,)
+        )
+        session["messages"] = [_row_to_dict(m, ("role", "content", "timestamp", "tokens")) for m in messages]
+        return session
+
+    def add_message(self, session_id: str, message: Dict[str, Any]):
+        with self.db.transaction() as conn:
+            exists = conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if exists:
+                self._insert_message(conn, session_id, message)
+
+    def _insert_message(self, conn: sqlite3.Connection, session_id: str, message: Dict[str, Any]):
+        conn.execute(
+            "INSERT INTO messages (session_id, role, content, timestamp, tokens) VALUES (?, ?, ?, ?, ?)",
+            (session_id, message["role"], message["content"], message.get("timestamp"), message.get("tokens"))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = self.db.query_one("SELECT COUNT(*) AS n FROM sessions")
+        messages = self.db.query_one("SELECT COUNT(*) AS n, COALESCE(SUM(LENGTH(content)), 0) AS bytes FROM messages")
+        # Transcripts live in the database file, so nothing is held in memory between requests
+        return {
+            "live_sessions": sessions["n"],
+            "live_messages": messages["n"],
+            "bytes": messages["bytes"],
+            "stored_in": self.db.path
+        }
+
+    def get_context(self, session_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(
+            "SELECT summary, summarized_count, facts FROM session_context WHERE session_id = ?",
+            (session_id,)
+        )
+        if row is None:
+            return None
+        return {"summary": row["summary"], "summarized_count": row["summarized_count"], "facts": json.loads(row["facts"])}
+
+    def save_context(self, session_id: str, context: Dict[str, Any]):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO session_context (session_id, summary, summarized_count, facts) "
+                "SELECT id, ?, ?, ? FROM sessions WHERE id = ? "
+                "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, "
+                "summarized_count = excluded.summarized_count, facts = excluded.facts",
+                (context["summary"], context["summarized_count"], json.dumps(context["facts"]), session_id)
+            )
+
+
+class SQLiteCampaignRepository(CampaignRepository):
+    """
+    Campaigns stored in SQLite.
+
+    Contacts are indexed by call token, (campaign_id, status) and
+    (campaign_id, email). The status histogram lives in
+    campaign_status_counts and is updated in the same transaction as the
+    contact rows it describes, as are the rows appended to the
+    contact_events log. Writes are serialized, so events commit in
+    sequence order and readers can follow the log by seq.
+    """
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    # Campaigns
+
+    def _counts(self, campaign_id: str) -> Dict[str, int]:
+        rows = self.db.query(
+            "SELECT status, count FROM campaign_status_counts WHERE campaign_id = ?",
+            (campaign_id,)
+        )
+        return {row["status"]: row["count"] for row in rows}
+
+    def _contacts(self, campaign_id: str) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contacts WHERE campaign_id = ? ORDER BY rowid",
+            (campaign_id,)
+        )
+        return [_row_to_dict(row, CONTACT_COLUMNS) for row in rows]
+
+    def list_campaigns(self, include_contacts: bool = True) -> List[Dict[str, Any]]:
+        rows = self.db.query(f"SELECT {', '.join(CAMPAIGN_COLUMNS)} FROM campaigns ORDER BY rowid")
+        if include_contacts:
+            return [self._build_campaign(row, include_contacts=True) for row in rows]
+
+        # One query for every campaign's histogram instead of one per campaign
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in self.db.query("SELECT campaign_id, status, count FROM campaign_status_counts"):
+            counts.setdefault(row["campaign_id"], {})[row["status"]] = row["count"]
+        campaigns = []
+        for row in rows:
+            campaign = _row_to_dict(row, CAMPAIGN_COLUMNS)
+            campaign["stats"] = stats_from_counts(counts.get(campaign["id"], {}))
+            campaigns.append(campaign)
+        return campaigns
+
+    def get_campaign(self, campaign_id: str, include_contacts: bool = True) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(
+            f"SELECT {', '.join(CAMPAIGN_COLUMNS)} FROM campaigns WHERE id = ?",
+            (campaign_id,)
+        )
+        if row is None:
+            return None
+        return self._build_campaign(row, include_contacts)
+
+    def _build_campaign(self, row: sqlite3.Row, include_contacts: bool) -> Dict[str, Any]:
+        campaign = _row_to_dict(row, CAMPAIGN_COLUMNS)
+        if include_contacts:
+            campaign["contacts"] = self._contacts(campaign["id"])
+        campaign["stats"] = stats_from_counts(self._counts(campaign["id"]))
+        return campaign
+
+    def create_campaign(self, campaign: Dict[str, Any]):
+        with self.db.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO campaigns ({', '.join(CAMPAIGN_COLUMNS)}) "
+                f"VALUES ({_placeholders(len(CAMPAIGN_COLUMNS))})",
+                tuple(campaign.get(column) for column in CAMPAIGN_COLUMNS)
+            )
+        campaign["stats"] = stats_from_counts({})
+
+    def update_campaign(self, campaign_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        updates = {k: v for k, v in updates.items() if k in CAMPAIGN_COLUMNS and k != "id"}
+        if updates:
+            with self.db.transaction() as conn:
+                conn.execute(_update_sql("campaigns", updates), (*updates.values(), campaign_id))
+        return self.get_campaign(campaign_id, include_contacts=False)
+
+    def delete_campaign(self, campaign_id: str) -> bool:
+        with self.db.transaction() as conn:
+            return conn.execute("DELETE FROM campaigns WHERE id = ?", (campaign_id,)).rowcount > 0
+
+    # Contacts
+
+    def _bump(self, conn: sqlite3.Connection, campaign_id: str, status: str, delta: int):
+        """Move `delta` contacts into (or out of) a histogram bucket"""
+        conn.execute(
+            "INSERT INTO campaign_status_counts (campaign_id, status, count) VALUES (?, ?, ?) "
+            "ON CONFLICT(campaign_id, status) DO UPDATE SET count = count + excluded.count",
+            (campaign_id, status, delta)
+        )
+
+    def _log(self, conn: sqlite3.Connection, campaign_id: str, changes: List[Tuple[str, str]]):
+        """Append (contact_id, status) changes to the event log"""
+        row = conn.execute("SELECT agent_id FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        agent_id = row["agent_id"] if row else ""
+        now = int(time.time())
+        conn.executemany(
+            "INSERT INTO contact_events (at, campaign_id, agent_id, contact_id, status) VALUES (?, ?, ?, ?, ?)",
+            [(now, campaign_id, agent_id, contact_id, status) for contact_id, status in changes]
+        )
+
+    def add_contacts(self, campaign_id: str, contacts: List[Dict[str, Any]]):
+        added: Dict[str, int] = {}
+        with self.db.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO contacts (campaign_id, {', '.join(CONTACT_COLUMNS)}) "
+                f"VALUES (?, {_placeholders(len(CONTACT_COLUMNS))})",
+                [(campaign_id, *(c.get(column) for column in CONTACT_COLUMNS)) for c in contacts]
+            )
+            for contact in contacts:
+                added[contact["status"]] = added.get(contact["status"], 0) + 1
+            for status, count in added.items():
+                self._bump(conn, campaign_id, status, count)
+            self._log(conn, campaign_id, [(c["id"], c["status"]) for c in contacts])
+            if settings.debug:
+                self.check_consistency(campaign_id)
+
+    def remove_contact(self, campaign_id: str, contact_id: str) -> bool:
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT status FROM contacts WHERE id = ? AND campaign_id = ?",
+                (contact_id, campaign_id)
+            ).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
+            self._bump(conn, campaign_id, row["status"], -1)
+            if settings.debug:
+                self.check_consistency(campaign_id)
+            return True
+
+    def get_contact(self, campaign_id: str, contact_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(
+            f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contacts WHERE id = ? AND campaign_id = ?",
+            (contact_id, campaign_id)
+        )
+        return _row_to_dict(row, CONTACT_COLUMNS)
+
+    def get_contacts(self, campaign_id: str, contact_ids: List[str]) -> List[Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        for chunk in _chunks(contact_ids):
+            rows = self.db.query(
+                f"SELECT {', '.join(CONTACT_COLUMNS)} FROM contacts "
+                f"WHERE campaign_id = ? AND id IN ({_placeholders(len(chunk))})",
+                (campaign_id, *chunk)
+            )
+            for row in rows:
+                found[row["id"]] = _row_to_dict(row, CONTACT_COLUMNS)
+        return [found[cid] for cid in contact_ids if cid in found]
+
+    def list_contacts(
+        self,
+        campaign_id: str,
+        status: Optional[str] = None,
+        company: Optional[str] = None,
+        email: Optional[str] = None,
+        sort: str = "created_at",
+        descending: bool = False,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        # Insertion order is rowid order; last_activity ties are broken by rowid
+        sort_value = "COALESCE(last_activity, '')" if sort == "last_activity" else "''"
+        where = ["campaign_id = ?"]
+        params: List[Any] = [campaign_id]
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if company:
+            where.append("company = ? COLLATE NOCASE")
+            params.append(company)
+        if email:
+            escaped = email.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("email LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+
+        op, direction = ("<", "DESC") if descending else (">", "ASC")
+        if cursor:
+            value, rowid = decode_cursor(cursor)
+            if sort == "last_activity":
+                # Spelled out instead of a row value comparison so SQLite can seek the index
+                where.append(f"{sort_value} {op}= ? AND ({sort_value} {op} ? OR rowid {op} ?)")
+                params.extend([value, value, rowid])
+            else:
+                where.append(f"rowid {op} ?")
+                params.append(rowid)
+        order = f"rowid {direction}"
+        if sort == "last_activity":
+            order = f"{sort_value} {direction}, {order}"
+
+        rows = self.db.query(
+            f"SELECT rowid, {sort_value} AS sort_value, {', '.join(CONTACT_COLUMNS)} FROM contacts "
+            f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?",
+            (*params, limit + 1)
+        )
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor([last["sort_value"], last["rowid"]])
+        return [_row_to_dict(row, CONTACT_COLUMNS) for row in rows[:limit]], next_cursor
+
+    def get_contact_ids_by_status(self, campaign_id: str, status: str) -> List[str]:
+        rows = self.db.query(
+            "SELECT id FROM contacts WHERE campaign_id = ? AND status = ? ORDER BY rowid",
+            (campaign_id, status)
+        )
+        return [row["id"] for row in rows]
+
+    def get_existing_emails(self, campaign_id: str, emails: List[str]) -> Set[str]:
+        existing: Set[str] = set()
+        for chunk in _chunks(list(dict.fromkeys(emails))):
+            rows = self.db.query(
+                f"SELECT DISTINCT email FROM contacts WHERE campaign_id = ? AND email IN ({_placeholders(len(chunk))})",
+                (campaign_id, *chunk)
+            )
+            existing.update(row["email"] for row in rows)
+        return existing
+
+    def find_by_token(self, call_token: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        row = self.db.query_one(
+            f"SELECT campaign_id, {', '.join(CONTACT_COLUMNS)} FROM contacts WHERE call_token = ?",
+            (call_token,)
+        )
+        if row is None:
+            return None
+        campaign = self.get_campaign(row["campaign_id"], include_contacts=False)
+        return campaign, _row_to_dict(row, CONTACT_COLUMNS)
+
+    def set_contact_status(
+        self,
+        campaign_id: str,
+        contact_id: str,
+        status: str,
+        expected: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "SELECT status FROM contacts WHERE id = ? AND campaign_id = ?",
+                (contact_id, campaign_id)
+            ).fetchone()
+            if row is None or (expected is not None and row["status"] != expected):
+                return None
+            conn.execute(
+                "UPDATE contacts SET status = ?, last_activity = ? WHERE id = ?",
+                (status, datetime.now().isoformat(), contact_id)
+            )
+            if row["status"] != status:
+                self._bump(conn, campaign_id, row["status"], -1)
+                self._bump(conn, campaign_id, status, 1)
+                self._log(conn, campaign_id, [(contact_id, status)])
+                if settings.debug:
+                    self.check_consistency(campaign_id)
+        return self.get_contact(campaign_id, contact_id)
+
+    def get_stats(self, campaign_id: str) -> Dict[str, int]:
+        return stats_from_counts(self._counts(campaign_id))
+
+    def check_consistency(self, campaign_id: str):
+        """
+        Compare the histogram against a full recount of the contacts (debug only).
+
+        Called inside the write transaction, so it sees that transaction's
+        changes and a drift rolls them back.
+        """
+        recount = Counter({
+            row["status"]: row["count"] for row in self.db.query(
+                "SELECT status, COUNT(*) AS count FROM contacts WHERE campaign_id = ? GROUP BY status",
+                (campaign_id,)
+            )
+        })
+        counts = +Counter(self._counts(campaign_id))  # drop zero buckets
+        if recount != counts:
+            print(f"Campaign {campaign_id} status counts drifted: histogram={dict(counts)} recount={dict(recount)}")
+            raise AssertionError(f"Campaign {campaign_id} stats are out of sync with its contacts")
+
+    def get_events(self, after: int = 0, limit: int = 10000) -> List[Tuple[int, int, str, str, str, str]]:
+        rows = self.db.query(
+            "SELECT seq, at, campaign_id, agent_id, contact_id, status FROM contact_events "
+            "WHERE seq > ? ORDER BY seq LIMIT ?",
+            (after, limit)
+        )
+        return [tuple(row) for row in rows]
+
+    # Dispatch jobs
+
+    def create_job(self, job: Dict[str, Any], contact_ids: List[str]) -> List[str]:
+        campaign_id = job["campaign_id"]
+        pending = ContactStatus.PENDING.value
+        queued = ContactStatus.EMAIL_QUEUED.value
+        contact_ids = list(dict.fromkeys(contact_ids))
+        claimed = set()
+        now = datetime.now().isoformat()
+
+        with self.db.transaction() as conn:
+            for chunk in _chunks(contact_ids):
+                params = (campaign_id, pending, *chunk)
+                where = f"campaign_id = ? AND status = ? AND id IN ({_placeholders(len(chunk))})"
+                rows = conn.execute(f"SELECT id FROM contacts WHERE {where}", params).fetchall()
+                conn.execute(f"UPDATE contacts SET status = ?, last_activity = ? WHERE {where}", (queued, now, *params))
+                claimed.update(row["id"] for row in rows)
+            if not claimed:
+                return []
+
+            self._bump(conn, campaign_id, pending, -len(claimed))
+            self._bump(conn, campaign_id, queued, len(claimed))
+            ordered = [cid for cid in contact_ids if cid in claimed]
+            self._log(conn, campaign_id, [(cid, queued) for cid in ordered])
+            if settings.debug:
+                self.check_consistency(campaign_id)
+
+            job["total"] = len(claimed)
+            conn.execute(
+                f"INSERT INTO dispatch_jobs ({', '.join(JOB_COLUMNS)}) VALUES ({_placeholders(len(JOB_COLUMNS))})",
+                tuple(job.get(column) for column in JOB_COLUMNS)
+            )
+            conn.executemany(
+                "INSERT INTO dispatch_checkpoints (job_id, contact_id, state) VALUES (?, ?, ?)",
+                [(job["id"], cid, DispatchCheckpoint.QUEUED.value) for cid in ordered]
+            )
+        return ordered
+
+    def _build_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = _row_to_dict(row, JOB_COLUMNS)
+        errors = self.db.query(
+            "SELECT c.contact_id, ct.email, c.error FROM dispatch_checkpoints c "
+            "LEFT JOIN contacts ct ON ct.id = c.contact_id "
+            "WHERE c.job_id = ? AND c.error IS NOT NULL LIMIT ?",
+            (job["id"], MAX_JOB_ERRORS)
+        )
+        job["errors"] = [_row_to_dict(e, ("contact_id", "email", "error")) for e in errors]
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(f"SELECT {', '.join(JOB_COLUMNS)} FROM dispatch_jobs WHERE id = ?", (job_id,))
+        return self._build_job(row) if row else None
+
+    def get_campaign_jobs(self, campaign_id: str) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM dispatch_jobs WHERE campaign_id = ? ORDER BY rowid",
+            (campaign_id,)
+        )
+        return [self._build_job(row) for row in rows]
+
+    def get_unfinished_jobs(self) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM dispatch_jobs WHERE status IN (?, ?) ORDER BY rowid",
+            (DispatchJobStatus.QUEUED.value, DispatchJobStatus.RUNNING.value)
+        )
+        return [self._build_job(row) for row in rows]
+
+    def update_job(self, job_id: str, updates: Dict[str, Any]):
+        updates = {k: v for k, v in updates.items() if k in JOB_COLUMNS and k != "id"}
+        if updates:
+            with self.db.transaction() as conn:
+                conn.execute(_update_sql("dispatch_jobs", updates), (*updates.values(), job_id))
+
+    def acquire_job(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self.db.transaction() as conn:
+            return conn.execute(
+                "UPDATE dispatch_jobs SET owner = ?, lease_until = ? "
+                "WHERE id = ? AND status IN (?, ?) AND (owner IS NULL OR owner = ? OR lease_until < ?)",
+                (
+                    owner, now + lease_seconds, job_id,
+                    DispatchJobStatus.QUEUED.value, DispatchJobStatus.RUNNING.value,
+                    owner, now
+                )
+            ).rowcount > 0
+
+    def get_checkpoints(self, job_id: str, state: Optional[str] = None) -> Dict[str, str]:
+        if state is None:
+            rows = self.db.query(
+                "SELECT contact_id, state FROM dispatch_checkpoints WHERE job_id = ? ORDER BY rowid",
+                (job_id,)
+            )
+        else:
+            rows = self.db.query(
+                "SELECT contact_id, state FROM dispatch_checkpoints WHERE job_id = ? AND state = ? ORDER BY rowid",
+                (job_id, state)
+            )
+        return {row["contact_id"]: row["state"] for row in rows}
+
+    def set_checkpoint(
+        self,
+        job_id: str,
+        contact_id: str,
+        state: str,
+        error: Optional[str] = None,
+        expected: Optional[str] = None
+    ) -> bool:
+        sql = "UPDATE dispatch_checkpoints SET state = ?, error = ? WHERE job_id = ? AND contact_id = ?"
+        params: Tuple = (state, error, job_id, contact_id)
+        if expected is not None:
+            sql += " AND state = ?"
+            params += (expected,)
+
+        with self.db.transaction() as conn:
+            if conn.execute(sql, params).rowcount == 0:
+                return False
+            if expected in JOB_COUNTERS:
+                counter = JOB_COUNTERS[expected]
+                conn.execute(f"UPDATE dispatch_jobs SET {counter} = {counter} - 1 WHERE id = ?", (job_id,))
+            if state in JOB_COUNTERS:
+                counter = JOB_COUNTERS[state]
+                conn.execute(f"UPDATE dispatch_jobs SET {counter} = {counter} + 1 WHERE id = ?", (job_id,))
+            return True
+
+
+class SQLiteRealtimeSessionRepository(RealtimeSessionRepository):
+    """Realtime sessions stored in SQLite, visible to every worker sharing the file"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def register(self, session: Dict[str, Any]):
+        session = {**session, "last_seen": time.time()}
+        with self.db.transaction() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO realtime_sessions ({', '.join(REALTIME_SESSION_COLUMNS)}) "
+                f"VALUES ({_placeholders(len(REALTIME_SESSION_COLUMNS))})",
+                tuple(session.get(column) for column in REALTIME_SESSION_COLUMNS)
+            )
+
+    def unregister(self, session_id: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM realtime_sessions WHERE id = ?", (session_id,))
+
+    def get_session(self, session_id: str, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(
+            f"SELECT {', '.join(REALTIME_SESSION_COLUMNS)} FROM realtime_sessions WHERE id = ? AND last_seen >= ?",
+            (session_id, time.time() - lease_seconds)
+        )
+        return _row_to_dict(row, REALTIME_SESSION_COLUMNS)
+
+    def list_sessions(self, lease_seconds: float) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            f"SELECT {', '.join(REALTIME_SESSION_COLUMNS)} FROM realtime_sessions "
+            "WHERE last_seen >= ? ORDER BY started_at",
+            (time.time() - lease_seconds,)
+        )
+        return [_row_to_dict(row, REALTIME_SESSION_COLUMNS) for row in rows]
+
+    def touch_owner(self, owner: str):
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE realtime_sessions SET last_seen = ? WHERE owner = ?", (time.time(), owner))
+
+    def remove_owner(self, owner: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM realtime_sessions WHERE owner = ?", (owner,))
+
+
+def _row_to_message(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    message = _row_to_dict(row, OUTBOX_COLUMNS)
+    if message is not None:
+        message["payload"] = json.loads(message["payload"])
+    return message
+
+
+class SQLiteOutboxRepository(OutboxRepository):
+    """Outbox messages stored in SQLite, delivered by whichever worker claims them first"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        message = {**message, "payload": json.dumps(message["payload"])}
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO outbox ({', '.join(OUTBOX_COLUMNS)}) "
+                f"VALUES ({_placeholders(len(OUTBOX_COLUMNS))})",
+                tuple(message.get(column) for column in OUTBOX_COLUMNS)
+            )
+            return cursor.rowcount == 1
+
+    def claim_due(self, owner: str, lease_seconds: float, limit: int) -> List[Dict[str, Any]]:
+        now = time.time()
+        pending, sending = OutboxStatus.PENDING.value, OutboxStatus.SENDING.value
+        with self.db.transaction() as conn:
+            ids = [row["id"] for row in conn.execute(
+                "SELECT id FROM outbox WHERE status = ? AND next_attempt_at <= ? "
+                "UNION ALL SELECT id FROM outbox WHERE status = ? AND lease_until < ? LIMIT ?",
+                (pending, now, sending, now, limit)
+            )]
+            if not ids:
+                return []
+            conn.execute(
+                f"UPDATE outbox SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1 "
+                f"WHERE id IN ({_placeholders(len(ids))})",
+                (sending, owner, now + lease_seconds, *ids)
+            )
+            rows = conn.execute(
+                f"SELECT {', '.join(OUTBOX_COLUMNS)} FROM outbox WHERE id IN ({_placeholders(len(ids))}) "
+                "ORDER BY next_attempt_at",
+                tuple(ids)
+            ).fetchall()
+        return [_row_to_message(row) for row in rows]
+
+    def mark_sent(self, message_id: str):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, owner = NULL, lease_until = NULL, sent_at = ? WHERE id = ?",
+                (OutboxStatus.SENT.value, datetime.now().isoformat(), message_id)
+            )
+
+    def reschedule(self, message_id: str, error: str, next_attempt_at: float):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, owner = NULL, lease_until = NULL, last_error = ?, "
+                "next_attempt_at = ? WHERE id = ?",
+                (OutboxStatus.PENDING.value, error, next_attempt_at, message_id)
+            )
+
+    def mark_dead(self, message_id: str, error: str):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE outbox SET status = ?, owner = NULL, lease_until = NULL, last_error = ? WHERE id = ?",
+                (OutboxStatus.DEAD.value, error, message_id)
+            )
+
+    def requeue(self, message_id: str) -> bool:
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = ? WHERE id = ? AND status = ?",
+                (OutboxStatus.PENDING.value, time.time(), message_id, OutboxStatus.DEAD.value)
+            )
+            return cursor.rowcount == 1
+
+    def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        row = self.db.query_one(f"SELECT {', '.join(OUTBOX_COLUMNS)} FROM outbox WHERE id = ?", (message_id,))
+        return _row_to_message(row)
+
+    def list_messages(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        sql = f"SELECT {', '.join(OUTBOX_COLUMNS)} FROM outbox"
+        params: Tuple = ()
+        if status:
+            sql += " WHERE status = ?"
+            params = (status,)
+        rows = self.db.query(sql + " ORDER BY rowid DESC LIMIT ?", (*params, limit))
+        return [_row_to_message(row) for row in rows]
+
+
+class SQLiteSlotHoldRepository(SlotHoldRepository):
+    """Slot holds stored in SQLite, so workers sharing the file also share the holds"""
+
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def claim(self, event_type_id: str, start: str, holder: str, expires_at: float) -> bool:
+        now = time.time()
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM slot_holds WHERE expires_at <= ?", (now,))
+            row = conn.execute(
+                "SELECT holder, state FROM slot_holds WHERE event_type_id = ? AND start = ?",
+                (event_type_id, start)
+            ).fetchone()
+            if row is not None:
+                return row["holder"] == holder and row["state"] == SlotHoldState.HELD.value
+            conn.execute(
+                "INSERT INTO slot_holds (event_type_id, start, holder, state, expires_at) VALUES (?, ?, ?, ?, ?)",
+                (event_type_id, start, holder, SlotHoldState.HELD.value, expires_at)
+            )
+            return True
+
+    def confirm(self, event_type_id: str, start: str, holder: str, expires_at: float):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE slot_holds SET state = ?, expires_at = ? WHERE event_type_id = ? AND start = ? AND holder = ?",
+                (SlotHoldState.BOOKED.value, expires_at, event_type_id, start, holder)
+            )
+
+    def release(self, event_type_id: str, start: str, holder: str):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "DELETE FROM slot_holds WHERE event_type_id = ? AND start = ? AND holder = ? AND state = ?",
+                (event_type_id, start, holder, SlotHoldState.HELD.value)
+            )
+
+    def held_starts(self, event_type_id: str, start_from: str, start_to: str) -> Set[str]:
+        rows = self.db.query(
+            "SELECT start FROM slot_holds WHERE event_type_id = ? AND start BETWEEN ? AND ? AND expires_at > ?",
+            (event_type_id, start_from, start_to, time.time())
+        )
+        return {row["start"] for row in rows}
@@ -1,4 +1,6 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
 from app.services.agent import agent_service
 from app.models import AgentCreate, AgentUpdate
@@ -12,6 +14,15 @@ async def get_agents():
     return agent_service.get_all_agents()
 
 
+@router.get("/sessions/metrics")
+async def get_session_metrics():
+    """Chat session store size and eviction counters, and prompt context stats"""
+    return {
+        "store": agent_service.sessions.stats(),
+        "context": agent_service.context.stats
+    }
+
+
 @router.get("/{agent_id}")
 async def get_agent(agent_id: str):
     """Get a specific agent"""
@@ -81,6 +92,31 @@ async def chat(agent_id: str, session_id: str, message: Dict[str, str]):
     return {"response": response}
 
 
+@router.post("/{agent_id}/sessions/{session_id}/chat/stream")
+async def chat_stream(agent_id: str, session_id: str, message: Dict[str, str]):
+    """Send a chat message and stream the reply as server-sent events"""
+    user_message = message.get("message", "")
+    if not user_message:
+        raise HTTPException(status_code=400, detail="Message is required")
+    if not agent_service.get_agent(agent_id):
+        raise HTTPException(status_code=404, detail="Agent not found")
+    
+    async def events():
+        try:
+            async for event in agent_service.chat_stream(agent_id, session_id, user_message):
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            yield f"event: error\ndata: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{agent_id}/realtime-config")
 async def get_realtime_config(agent_id: str):
     """Get realtime API configuration for an agent"""
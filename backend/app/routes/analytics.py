@@ -0,0 +1,58 @@
+import asyncio
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from app.models import AnalyticsGroup, ContactStatus
+from app.services.analytics import campaign_analytics
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# Queries scan whole columns, so they run off the event loop that serves live calls
+
+
+@router.get("/funnel")
+async def get_funnel(
+    campaign_id: Optional[List[str]] = Query(None),
+    agent_id: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    group_by: Optional[AnalyticsGroup] = None
+):
+    """Contacts reaching each stage (sent, opened, call, booked), optionally per campaign or agent"""
+    return await asyncio.to_thread(campaign_analytics.funnel, campaign_id, agent_id, since, until, group_by)
+
+
+@router.get("/time-to-call")
+async def get_time_to_call(
+    campaign_id: Optional[List[str]] = Query(None),
+    agent_id: Optional[List[str]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Percentiles and histogram of the time between a contact's first email and first call"""
+    return await asyncio.to_thread(campaign_analytics.time_to_call, campaign_id, agent_id, since, until)
+
+
+@router.get("/timeseries")
+async def get_timeseries(
+    campaign_id: Optional[List[str]] = Query(None),
+    agent_id: Optional[List[str]] = Query(None),
+    status: Optional[List[ContactStatus]] = Query(None),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bucket_minutes: int = 60
+):
+    """Status changes per time bucket (hourly by default)"""
+    statuses = [s.value for s in status] if status else None
+    try:
+        return await asyncio.to_thread(
+            campaign_analytics.timeseries, campaign_id, agent_id, since, until, statuses, bucket_minutes * 60
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/metrics")
+async def get_analytics_metrics():
+    """Events loaded, memory held and the last query's duration"""
+    return campaign_analytics.stats()
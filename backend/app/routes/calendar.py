@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from app.services.calcom import calcom_service
+
+router = APIRouter(prefix="/calendar", tags=["calendar"])
+
+
+@router.get("/metrics")
+async def get_calendar_metrics():
+    """Availability cache, prefetch, slot hold and circuit breaker counters"""
+    return {
+        "availability_cache": calcom_service.availability_cache.stats(),
+        "availability_prefetch": calcom_service.prefetcher.stats(),
+        "slot_holds": calcom_service.hold_stats,
+        "circuit_breakers": {name: breaker.stats() for name, breaker in calcom_service.breakers.items()},
+        "hedging": calcom_service.hedge_stats
+    }
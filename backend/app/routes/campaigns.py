@@ -1,22 +1,24 @@
 import uuid
 import secrets
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from pydantic import BaseModel
 from app.models import (
     Campaign, CampaignCreate, CampaignUpdate, 
-    Contact, ContactCreate, ContactStatus, CampaignStatus
+    Contact, ContactCreate, ContactStatus, CampaignStatus, DispatchCheckpoint
 )
-from app.services.email import email_service
+from app.services.dispatch import campaign_dispatcher
+from app.services.contact_import import contact_importer
+from app.services.email import CAMPAIGN_VARIABLES
+from app.services.templates import template_engine
+from app.repositories import campaign_repository
+from app.repositories.base import CONTACT_SORTS
 from app.config import get_settings
 
 settings = get_settings()
 router = APIRouter(prefix="/campaigns", tags=["campaigns"])
 
-# In-memory storage for campaigns
-campaigns_store: Dict[str, Dict[str, Any]] = {}
-
 
 class AddContactsRequest(BaseModel):
     contacts: List[ContactCreate]
@@ -26,15 +28,37 @@ class SendCampaignRequest(BaseModel):
     contact_ids: Optional[List[str]] = None  # If None, send to all pending
 
 
+class ResolveInDoubtRequest(BaseModel):
+    delivered: bool  # Whether the provider's logs show the emails went out
+    contact_ids: Optional[List[str]] = None  # If None, resolve all in doubt contacts of the job
+
+
+# Largest contact page a client can ask for
+MAX_CONTACT_PAGE_SIZE = 500
+
+
+def _check_templates(fields: Dict[str, Optional[str]]):
+    """Reject email subjects and templates that use unknown variables"""
+    for field, source in fields.items():
+        unknown = template_engine.unknown_variables(source or "", CAMPAIGN_VARIABLES)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown variables in {field}: {', '.join(unknown)}. "
+                       f"Available: {', '.join(CAMPAIGN_VARIABLES)}"
+            )
+
+
 @router.get("/", response_model=List[Dict[str, Any]])
-async def get_campaigns():
-    """Get all campaigns"""
-    return list(campaigns_store.values())
+async def get_campaigns(include_contacts: bool = True):
+    """Get all campaigns; pass include_contacts=false for summaries with stats only"""
+    return campaign_repository.list_campaigns(include_contacts=include_contacts)
 
 
 @router.post("/", response_model=Dict[str, Any])
 async def create_campaign(campaign: CampaignCreate):
     """Create a new campaign"""
+    _check_templates({"email_subject": campaign.email_subject, "email_template": campaign.email_template})
     campaign_id = str(uuid.uuid4())
     
     new_campaign = {
@@ -52,59 +76,112 @@ async def create_campaign(campaign: CampaignCreate):
             "total_contacts": 0,
             "emails_sent": 0,
             "calls_started": 0,
-            "meetings_booked": 0
+            "meetings_booked": 0,
+            "not_interested": 0
         }
     }
     
-    campaigns_store[campaign_id] = new_campaign
+    campaign_repository.create_campaign(new_campaign)
     return new_campaign
 
 
 @router.get("/{campaign_id}", response_model=Dict[str, Any])
-async def get_campaign(campaign_id: str):
+async def get_campaign(campaign_id: str, include_contacts: bool = True):
     """Get a specific campaign"""
-    if campaign_id not in campaigns_store:
+    campaign = campaign_repository.get_campaign(campaign_id, include_contacts=include_contacts)
+    if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    return campaigns_store[campaign_id]
+    return campaign
 
 
 @router.put("/{campaign_id}", response_model=Dict[str, Any])
 async def update_campaign(campaign_id: str, updates: CampaignUpdate):
     """Update a campaign"""
-    if campaign_id not in campaigns_store:
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_store[campaign_id]
     update_data = updates.model_dump(exclude_unset=True)
+    _check_templates({
+        field: update_data[field] for field in ("email_subject", "email_template") if field in update_data
+    })
+    changes = {}
     
     for key, value in update_data.items():
         if value is not None:
             if key == "status":
-                campaign[key] = value.value if hasattr(value, 'value') else value
+                changes[key] = value.value if hasattr(value, 'value') else value
             else:
-                campaign[key] = value
+                changes[key] = value
     
-    campaign["updated_at"] = datetime.now().isoformat()
-    return campaign
+    changes["updated_at"] = datetime.now().isoformat()
+    campaign_repository.update_campaign(campaign_id, changes)
+    return campaign_repository.get_campaign(campaign_id)
 
 
 @router.delete("/{campaign_id}")
 async def delete_campaign(campaign_id: str):
     """Delete a campaign"""
-    if campaign_id not in campaigns_store:
+    if not campaign_repository.delete_campaign(campaign_id):
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    del campaigns_store[campaign_id]
     return {"success": True}
 
 
+@router.get("/{campaign_id}/contacts", response_model=Dict[str, Any])
+async def list_contacts(
+    campaign_id: str,
+    status: Optional[ContactStatus] = None,
+    company: Optional[str] = None,
+    email: Optional[str] = None,
+    sort: str = "created_at",
+    order: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None
+):
+    """
+    Get a page of a campaign's contacts.
+
+    Filter by status, company (exact, case-insensitive) or email
+    (substring). Sort by created_at (oldest first by default) or
+    last_activity (most recent first by default). Pass the returned
+    next_cursor to get the following page.
+    """
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if sort not in CONTACT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(CONTACT_SORTS)}")
+    if order not in (None, "asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+    if not 1 <= limit <= MAX_CONTACT_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_CONTACT_PAGE_SIZE}")
+    
+    descending = order == "desc" if order else sort == "last_activity"
+    try:
+        contacts, next_cursor = campaign_repository.list_contacts(
+            campaign_id,
+            status=status.value if status else None,
+            company=company,
+            email=email,
+            sort=sort,
+            descending=descending,
+            limit=limit,
+            cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "contacts": contacts,
+        "next_cursor": next_cursor
+    }
+
+
 @router.post("/{campaign_id}/contacts", response_model=Dict[str, Any])
 async def add_contacts(campaign_id: str, request: AddContactsRequest):
     """Add contacts to a campaign"""
-    if campaign_id not in campaigns_store:
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_store[campaign_id]
     added_contacts = []
     
     for contact_data in request.contacts:
@@ -123,11 +200,10 @@ async def add_contacts(campaign_id: str, request: AddContactsRequest):
             "last_activity": None
         }
         
-        campaign["contacts"].append(contact)
         added_contacts.append(contact)
     
-    campaign["stats"]["total_contacts"] = len(campaign["contacts"])
-    campaign["updated_at"] = datetime.now().isoformat()
+    campaign_repository.add_contacts(campaign_id, added_contacts)
+    campaign_repository.update_campaign(campaign_id, {"updated_at": datetime.now().isoformat()})
     
     return {
         "success": True,
@@ -136,146 +212,150 @@ async def add_contacts(campaign_id: str, request: AddContactsRequest):
     }
 
 
+@router.post("/{campaign_id}/contacts/import", response_model=Dict[str, Any])
+async def import_contacts(
+    campaign_id: str,
+    request: Request,
+    format: Optional[str] = None,
+    header: bool = True
+):
+    """
+    Stream a CSV or NDJSON file of contacts into a campaign.
+
+    The format comes from `format` ("csv" or "ndjson") or the Content-Type.
+    CSV files need a header row with at least an email column unless
+    `header=false`, in which case columns are name,email,company.
+    Returns a summary with per-row errors instead of the contacts.
+    """
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    content_type = request.headers.get("content-type", "")
+    if not format:
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+    
+    try:
+        if format == "csv":
+            return await contact_importer.import_csv(campaign_id, request.stream(), header=header)
+        if format == "ndjson":
+            return await contact_importer.import_ndjson(campaign_id, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson")
+
+
 @router.delete("/{campaign_id}/contacts/{contact_id}")
 async def remove_contact(campaign_id: str, contact_id: str):
     """Remove a contact from a campaign"""
-    if campaign_id not in campaigns_store:
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_store[campaign_id]
-    campaign["contacts"] = [c for c in campaign["contacts"] if c["id"] != contact_id]
-    campaign["stats"]["total_contacts"] = len(campaign["contacts"])
-    campaign["updated_at"] = datetime.now().isoformat()
+    campaign_repository.remove_contact(campaign_id, contact_id)
+    campaign_repository.update_campaign(campaign_id, {"updated_at": datetime.now().isoformat()})
     
     return {"success": True}
 
 
-@router.post("/{campaign_id}/send")
+@router.post("/{campaign_id}/send", status_code=202)
 async def send_campaign_emails(campaign_id: str, request: SendCampaignRequest = None):
-    """Send campaign emails to contacts"""
-    if campaign_id not in campaigns_store:
+    """Start a background job sending campaign emails to pending contacts"""
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_store[campaign_id]
-    
     # Get contacts to send to
-    contacts_to_send = []
     if request and request.contact_ids:
-        contacts_to_send = [
-            c for c in campaign["contacts"] 
-            if c["id"] in request.contact_ids
-        ]
+        contact_ids = request.contact_ids
     else:
         # Send to all pending contacts
-        contacts_to_send = [
-            c for c in campaign["contacts"] 
-            if c["status"] == ContactStatus.PENDING.value
-        ]
+        contact_ids = campaign_repository.get_contact_ids_by_status(campaign_id, ContactStatus.PENDING.value)
     
-    if not contacts_to_send:
+    # Only pending contacts are claimed, so nobody is emailed twice
+    job = campaign_dispatcher.create_job(campaign_id, contact_ids)
+    if not job:
         raise HTTPException(status_code=400, detail="No contacts to send emails to")
     
-    sent_count = 0
-    errors = []
-    
-    for contact in contacts_to_send:
-        try:
-            # Generate the AI call link
-            call_link = f"{settings.frontend_url}/call/{campaign_id}/{contact['call_token']}"
-            
-            # Send the campaign email
-            result = await email_service.send_campaign_email(
-                to_email=contact["email"],
-                to_name=contact["name"],
-                subject=campaign["email_subject"],
-                campaign_name=campaign["name"],
-                call_link=call_link,
-                custom_template=campaign.get("email_template", "")
-            )
-            
-            if result.get("success"):
-                contact["status"] = ContactStatus.EMAIL_SENT.value
-                contact["last_activity"] = datetime.now().isoformat()
-                sent_count += 1
-            else:
-                errors.append({
-                    "contact_id": contact["id"],
-                    "email": contact["email"],
-                    "error": result.get("error", "Unknown error")
-                })
-        except Exception as e:
-            errors.append({
-                "contact_id": contact["id"],
-                "email": contact["email"],
-                "error": str(e)
-            })
-    
-    campaign["stats"]["emails_sent"] += sent_count
-    campaign["status"] = CampaignStatus.ACTIVE.value
-    campaign["updated_at"] = datetime.now().isoformat()
+    campaign_repository.update_campaign(campaign_id, {
+        "status": CampaignStatus.ACTIVE.value,
+        "updated_at": datetime.now().isoformat()
+    })
+    campaign_dispatcher.start(job["id"])
     
-    return {
-        "success": True,
-        "sent_count": sent_count,
-        "total_contacts": len(contacts_to_send),
-        "errors": errors if errors else None
-    }
+    return campaign_dispatcher.get_progress(job)
+
+
+@router.get("/{campaign_id}/jobs")
+async def get_dispatch_jobs(campaign_id: str):
+    """Get all send jobs for a campaign"""
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return [
+        campaign_dispatcher.get_progress(job)
+        for job in campaign_dispatcher.get_campaign_jobs(campaign_id)
+    ]
+
+
+@router.get("/{campaign_id}/jobs/{job_id}")
+async def get_dispatch_job(campaign_id: str, job_id: str):
+    """Get progress of a send job"""
+    job = campaign_dispatcher.get_job(job_id)
+    if not job or job["campaign_id"] != campaign_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return campaign_dispatcher.get_progress(job)
+
+
+@router.get("/{campaign_id}/jobs/{job_id}/in-doubt")
+async def get_in_doubt_contacts(campaign_id: str, job_id: str):
+    """Get the contacts of a send job whose delivery outcome is unknown"""
+    job = campaign_dispatcher.get_job(job_id)
+    if not job or job["campaign_id"] != campaign_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    contact_ids = campaign_repository.get_checkpoints(job_id, DispatchCheckpoint.IN_DOUBT.value)
+    contacts = [campaign_repository.get_contact(campaign_id, contact_id) for contact_id in contact_ids]
+    return {"contacts": [contact for contact in contacts if contact]}
+
+
+@router.post("/{campaign_id}/jobs/{job_id}/in-doubt/resolve")
+async def resolve_in_doubt_contacts(campaign_id: str, job_id: str, request: ResolveInDoubtRequest):
+    """Mark in doubt contacts as sent, or return them to pending so a later send retries them"""
+    job = campaign_dispatcher.get_job(job_id)
+    if not job or job["campaign_id"] != campaign_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    resolved = campaign_dispatcher.resolve_in_doubt(job_id, request.delivered, request.contact_ids)
+    campaign_repository.update_campaign(campaign_id, {"updated_at": datetime.now().isoformat()})
+    
+    return {"resolved": resolved, "job": campaign_dispatcher.get_progress(campaign_dispatcher.get_job(job_id))}
 
 
 @router.get("/{campaign_id}/stats")
 async def get_campaign_stats(campaign_id: str):
     """Get campaign statistics"""
-    if campaign_id not in campaigns_store:
+    campaign = campaign_repository.get_campaign(campaign_id, include_contacts=False)
+    if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_store[campaign_id]
-    
-    # Calculate stats from contacts
-    stats = {
-        "total_contacts": len(campaign["contacts"]),
-        "emails_sent": sum(1 for c in campaign["contacts"] if c["status"] != ContactStatus.PENDING.value),
-        "calls_started": sum(1 for c in campaign["contacts"] if c["status"] in [
-            ContactStatus.CALL_STARTED.value,
-            ContactStatus.CALL_COMPLETED.value,
-            ContactStatus.MEETING_BOOKED.value,
-            ContactStatus.NOT_INTERESTED.value
-        ]),
-        "meetings_booked": sum(1 for c in campaign["contacts"] if c["status"] == ContactStatus.MEETING_BOOKED.value),
-        "not_interested": sum(1 for c in campaign["contacts"] if c["status"] == ContactStatus.NOT_INTERESTED.value)
-    }
-    
-    return stats
+    return campaign["stats"]
 
 
 # Endpoint to validate call token (for public call page)
 @router.get("/validate-token/{campaign_id}/{call_token}")
 async def validate_call_token(campaign_id: str, call_token: str):
     """Validate a call token and get contact info"""
-    if campaign_id not in campaigns_store:
+    found = campaign_repository.find_by_token(call_token)
+    if not found or found[0]["id"] != campaign_id:
         raise HTTPException(status_code=404, detail="Invalid link")
     
-    campaign = campaigns_store[campaign_id]
-    
-    # Find contact with this token
-    contact = next(
-        (c for c in campaign["contacts"] if c["call_token"] == call_token),
-        None
-    )
-    
-    if not contact:
-        raise HTTPException(status_code=404, detail="Invalid link")
+    campaign, contact = found
     
     # Update contact status to call started
-    contact["status"] = ContactStatus.CALL_STARTED.value
-    contact["last_activity"] = datetime.now().isoformat()
-    campaign["stats"]["calls_started"] = sum(
-        1 for c in campaign["contacts"] 
-        if c["status"] in [
-            ContactStatus.CALL_STARTED.value,
-            ContactStatus.CALL_COMPLETED.value,
-            ContactStatus.MEETING_BOOKED.value
-        ]
-    )
+    campaign_repository.set_contact_status(campaign_id, contact["id"], ContactStatus.CALL_STARTED.value)
     
     return {
         "valid": True,
@@ -288,25 +368,14 @@ async def validate_call_token(campaign_id: str, call_token: str):
 
 # Update contact status (called after call ends)
 @router.patch("/{campaign_id}/contacts/{contact_id}/status")
-async def update_contact_status(campaign_id: str, contact_id: str, status: str):
+async def update_contact_status(campaign_id: str, contact_id: str, status: ContactStatus):
     """Update contact status after call"""
-    if campaign_id not in campaigns_store:
+    if not campaign_repository.get_campaign(campaign_id, include_contacts=False):
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_store[campaign_id]
-    contact = next((c for c in campaign["contacts"] if c["id"] == contact_id), None)
+    contact = campaign_repository.set_contact_status(campaign_id, contact_id, status.value)
     
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     
-    contact["status"] = status
-    contact["last_activity"] = datetime.now().isoformat()
-    
-    # Update stats
-    if status == ContactStatus.MEETING_BOOKED.value:
-        campaign["stats"]["meetings_booked"] = sum(
-            1 for c in campaign["contacts"] 
-            if c["status"] == ContactStatus.MEETING_BOOKED.value
-        )
-    
     return {"success": True}
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from app.models import OutboxStatus
+from app.services.outbox import email_outbox
+
+router = APIRouter(prefix="/outbox", tags=["outbox"])
+
+
+@router.get("/")
+async def list_outbox_messages(status: Optional[OutboxStatus] = None, limit: int = 100):
+    """List the newest outbox messages, e.g. ?status=dead for the dead letters"""
+    return email_outbox.list_messages(status.value if status else None, max(1, min(limit, 500)))
+
+
+@router.get("/{message_id}")
+async def get_outbox_message(message_id: str):
+    """Get an outbox message with its delivery attempts and last error"""
+    message = email_outbox.get_message(message_id)
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message
+
+
+@router.post("/{message_id}/retry")
+async def retry_outbox_message(message_id: str):
+    """Give a dead-lettered message a fresh set of delivery attempts"""
+    if not email_outbox.requeue(message_id):
+        raise HTTPException(status_code=400, detail="Only dead messages can be retried")
+    return email_outbox.get_message(message_id)
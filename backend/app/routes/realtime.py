@@ -1,16 +1,31 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 import uuid
 from app.services.realtime import realtime_service
 
 router = APIRouter(prefix="/realtime", tags=["realtime"])
 
 
+@router.get("/sessions")
+async def list_sessions():
+    """List live voice sessions across all workers"""
+    return realtime_service.list_live_sessions()
+
+
+@router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """Get a live voice session and the worker that owns it"""
+    session = realtime_service.get_live_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+
 @router.websocket("/ws/{agent_id}")
 async def websocket_endpoint(websocket: WebSocket, agent_id: str):
     """WebSocket endpoint for realtime voice communication"""
     session_id = str(uuid.uuid4())
     
-    await realtime_service.connect_client(websocket, session_id)
+    await realtime_service.connect_client(websocket, session_id, agent_id)
     
     try:
         # Send session info to client
@@ -28,10 +43,11 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
         )
         
     except WebSocketDisconnect:
-        realtime_service.disconnect_client(session_id)
+        pass
     except Exception as e:
         await websocket.send_json({
             "type": "error",
             "error": str(e)
         })
+    finally:
         realtime_service.disconnect_client(session_id)
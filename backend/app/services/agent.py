@@ -1,30 +1,43 @@
+import asyncio
 import json
 import uuid
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, AsyncIterator, Tuple
 from datetime import datetime, timedelta
 from openai import AsyncOpenAI
 from app.config import get_settings
 from app.services.calcom import calcom_service, CALCOM_TOOLS
-from app.services.email import email_service
+from app.services.outbox import email_outbox
+from app.services.context_window import ContextWindowManager, count_tokens, MESSAGE_OVERHEAD_TOKENS
+from app.repositories import agent_repository, session_repository
 
 settings = get_settings()
 
+SUMMARY_PROMPT = (
+    "You keep a running summary of a sales call chat so it can continue without the full transcript. "
+    "Merge the new turns into the summary. Keep the caller's name, email, company, needs, objections, "
+    "times discussed or chosen, bookings made and open questions. Be brief and factual; no preamble."
+)
+
 
 class AgentService:
     """Service for managing AI agents and their conversations"""
     
     def __init__(self):
         self.client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self.agents: Dict[str, Dict[str, Any]] = {}
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.agents = agent_repository
+        self.sessions = session_repository
+        self.context = ContextWindowManager(self.sessions, self._summarize, settings.chat_context_budget_tokens)
         
         # Create a default agent
         self._create_default_agent()
     
     def _create_default_agent(self):
-        """Create a default sales agent"""
+        """Create a default sales agent unless it is already stored"""
         default_id = "default-agent"
-        self.agents[default_id] = {
+        if self.agents.get_agent(default_id):
+            return
+        # Every worker runs this on startup, so let the store settle the race
+        self.agents.ensure_agent({
             "id": default_id,
             "name": "AI Sales Agent",
             "description": "AI-powered sales agent that convinces customers to purchase products and book demo calls",
@@ -65,15 +78,15 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
             "status": "active",
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
-        }
+        })
     
     def get_all_agents(self) -> List[Dict[str, Any]]:
         """Get all agents"""
-        return list(self.agents.values())
+        return self.agents.list_agents()
     
     def get_agent(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific agent"""
-        return self.agents.get(agent_id)
+        return self.agents.get_agent(agent_id)
     
     def create_agent(self, name: str, description: str = "", system_instructions: str = "") -> Dict[str, Any]:
         """Create a new agent"""
@@ -87,28 +100,26 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
         }
-        self.agents[agent_id] = agent
+        self.agents.create_agent(agent)
         return agent
     
     def update_agent(self, agent_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update an agent"""
-        if agent_id not in self.agents:
+        agent = self.agents.get_agent(agent_id)
+        if not agent:
             return None
         
-        agent = self.agents[agent_id]
-        for key, value in updates.items():
-            if value is not None and key in agent:
-                agent[key] = value
-        agent["updated_at"] = datetime.now().isoformat()
+        changes = {
+            key: value for key, value in updates.items()
+            if value is not None and key in agent
+        }
+        changes["updated_at"] = datetime.now().isoformat()
         
-        return agent
+        return self.agents.update_agent(agent_id, changes)
     
     def delete_agent(self, agent_id: str) -> bool:
         """Delete an agent"""
-        if agent_id in self.agents:
-            del self.agents[agent_id]
-            return True
-        return False
+        return self.agents.delete_agent(agent_id)
     
     def create_session(self, agent_id: str) -> Dict[str, Any]:
         """Create a new conversation session"""
@@ -120,21 +131,34 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
             "created_at": datetime.now().isoformat(),
             "status": "active"
         }
-        self.sessions[session_id] = session
+        self.sessions.create_session(session)
         return session
     
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific session"""
-        return self.sessions.get(session_id)
+        return self.sessions.get_session(session_id)
     
     def add_message_to_session(self, session_id: str, role: str, content: str):
         """Add a message to a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id]["messages"].append({
-                "role": role,
-                "content": content,
-                "timestamp": datetime.now().isoformat()
-            })
+        self.sessions.add_message(session_id, {
+            "role": role,
+            "content": content,
+            "timestamp": datetime.now().isoformat(),
+            "tokens": count_tokens(content or "") + MESSAGE_OVERHEAD_TOKENS
+        })
+    
+    async def _summarize(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        """Fold older turns into a session's running summary"""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        response = await self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}"}
+            ],
+            max_tokens=settings.chat_summary_max_tokens
+        )
+        return (response.choices[0].message.content or "").strip()
     
     async def process_tool_call(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Process a tool call from the AI"""
@@ -144,6 +168,13 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
                 availability = await calcom_service.get_availability(date)
                 return json.dumps(availability)
             
+            elif tool_name == "find_next_available_slots":
+                slots = await calcom_service.find_next_slots(
+                    after=arguments.get("after"),
+                    count=int(arguments.get("count") or 3)
+                )
+                return json.dumps(slots)
+            
             elif tool_name == "book_meeting":
                 start_time = arguments.get("start_time")
                 attendee_name = arguments.get("attendee_name")
@@ -159,8 +190,9 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
                 )
                 
                 if result.get('success'):
-                    # Send confirmation email
-                    await email_service.send_meeting_confirmation(
+                    # The confirmation is delivered in the background so the caller hears back right away
+                    email_outbox.enqueue_meeting_confirmation(
+                        booking_key=str(result.get('uid') or result.get('booking_id') or f"{attendee_email}:{start_time}"),
                         to_email=attendee_email,
                         attendee_name=attendee_name,
                         meeting_title=result.get('title', 'Sales Demo Call'),
@@ -172,7 +204,7 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
                     
                     return json.dumps({
                         "success": True,
-                        "message": f"Meeting has been booked successfully! A confirmation email has been sent to {attendee_email}.",
+                        "message": f"Meeting has been booked successfully! A confirmation email is on its way to {attendee_email}.",
                         "meeting_url": result.get('meeting_url', ''),
                         "booking_id": result.get('booking_id', '')
                     })
@@ -203,68 +235,151 @@ YOU ARE SELLING. Be friendly but persistent. Every response should move toward b
         except Exception as e:
             return json.dumps({"error": str(e)})
     
-    async def chat(self, agent_id: str, session_id: str, user_message: str) -> str:
-        """Process a chat message and get AI response"""
+    async def iter_tool_calls(self, tool_calls: List[Dict[str, Any]]) -> AsyncIterator[Tuple[int, str]]:
+        """
+        Run one turn's tool calls concurrently, yielding (index, result) as each finishes.
+        
+        The calls share a deadline; any still running then are cancelled and
+        reported as timed out.
+        """
+        async def run(tool_call: Dict[str, Any]) -> str:
+            try:
+                arguments = json.loads(tool_call["function"]["arguments"] or "{}")
+            except json.JSONDecodeError as e:
+                return json.dumps({"error": f"Invalid arguments: {e}"})
+            return await self.process_tool_call(tool_call["function"]["name"], arguments)
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.chat_tool_timeout_seconds
+        index = {asyncio.ensure_future(run(tool_call)): i for i, tool_call in enumerate(tool_calls)}
+        pending = set(index)
+        try:
+            while pending and loop.time() < deadline:
+                done, pending = await asyncio.wait(
+                    pending, timeout=deadline - loop.time(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=index.get):
+                    yield index[task], task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        for task in sorted(pending, key=index.get):
+            yield index[task], json.dumps({
+                "error": "timeout",
+                "message": "This tool did not finish in time; its outcome is unknown."
+            })
+    
+    async def _stream_completion(self, messages: List[Dict[str, Any]], reply: Dict[str, Any], **options) -> AsyncIterator[Dict[str, Any]]:
+        """Stream one completion, yielding token events and collecting the text and tool calls into `reply`"""
+        text_parts = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        stream = await self.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            stream=True,
+            **options
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                text_parts.append(delta.content)
+                yield {"type": "token", "content": delta.content}
+            # Tool calls arrive in fragments keyed by their position in the list
+            for part in delta.tool_calls or []:
+                call = tool_calls.setdefault(part.index, {
+                    "id": "",
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if part.id:
+                    call["id"] = part.id
+                if part.function:
+                    call["function"]["name"] += part.function.name or ""
+                    call["function"]["arguments"] += part.function.arguments or ""
+        reply["content"] = "".join(text_parts)
+        reply["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+    
+    async def chat_stream(self, agent_id: str, session_id: str, user_message: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process a chat message, yielding events as the reply is produced.
+        
+        Events: "session", "token" (reply text as it arrives), "tool_call" and
+        "tool_result" (tool progress), then "done" with the full reply, or "error".
+        """
         agent = self.get_agent(agent_id)
         if not agent:
-            return "Agent not found"
+            yield {"type": "error", "message": "Agent not found"}
+            return
         
         session = self.get_session(session_id)
         if not session:
             session = self.create_session(agent_id)
+            session_id = session["id"]
+        yield {"type": "session", "session_id": session_id}
+        
+        # Build messages for OpenAI: the recent transcript within the token budget, plus a summary of the rest
+        self.context.note_user_message(session_id, user_message)
+        messages = self.context.build(session, agent["system_instructions"], user_message)
         
         # Add user message
         self.add_message_to_session(session_id, "user", user_message)
         
-        # Build messages for OpenAI
-        messages = [
-            {"role": "system", "content": agent["system_instructions"]}
-        ]
-        
-        for msg in session["messages"]:
-            messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
-        
-        # Call OpenAI
-        response = await self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=messages,
-            tools=CALCOM_TOOLS,
-            tool_choice="auto"
-        )
-        
-        assistant_message = response.choices[0].message
-        
-        # Handle tool calls
-        if assistant_message.tool_calls:
-            for tool_call in assistant_message.tool_calls:
-                tool_result = await self.process_tool_call(
-                    tool_call.function.name,
-                    json.loads(tool_call.function.arguments)
+        # Let the model call tools, feed back the results, and repeat until it answers in text
+        response_text = None
+        for _ in range(max(1, settings.chat_max_tool_rounds)):
+            reply: Dict[str, Any] = {}
+            async for event in self._stream_completion(messages, reply, tools=CALCOM_TOOLS, tool_choice="auto"):
+                yield event
+            tool_calls = reply["tool_calls"]
+            if not tool_calls:
+                response_text = reply["content"]
+                break
+            
+            messages.append({"role": "assistant", "content": reply["content"] or None, "tool_calls": tool_calls})
+            for tool_call in tool_calls:
+                yield {
+                    "type": "tool_call",
+                    "id": tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "arguments": tool_call["function"]["arguments"]
+                }
+            results = [""] * len(tool_calls)
+            async for i, result in self.iter_tool_calls(tool_calls):
+                results[i] = result
+                self.context.note_tool_call(
+                    session_id, tool_calls[i]["function"]["name"], tool_calls[i]["function"]["arguments"], result
                 )
-                
-                # Add tool result and get final response
-                messages.append(assistant_message.model_dump())
+                yield {"type": "tool_result", "id": tool_calls[i]["id"], "name": tool_calls[i]["function"]["name"], "result": result}
+            for tool_call, result in zip(tool_calls, results):
                 messages.append({
                     "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": tool_result
+                    "tool_call_id": tool_call["id"],
+                    "content": result
                 })
-            
-            # Get final response after tool calls
-            final_response = await self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=messages
-            )
-            response_text = final_response.choices[0].message.content
-        else:
-            response_text = assistant_message.content
+        
+        if response_text is None:
+            # Out of tool rounds: get a final answer from the results gathered so far
+            reply = {}
+            async for event in self._stream_completion(messages, reply):
+                yield event
+            response_text = reply["content"]
         
         # Add assistant response to session
         self.add_message_to_session(session_id, "assistant", response_text)
-        
+        yield {"type": "done", "session_id": session_id, "response": response_text}
+    
+    async def chat(self, agent_id: str, session_id: str, user_message: str) -> str:
+        """Process a chat message and get AI response"""
+        response_text = ""
+        async for event in self.chat_stream(agent_id, session_id, user_message):
+            if event["type"] == "error":
+                return event["message"]
+            if event["type"] == "done":
+                response_text = event["response"]
         return response_text
     
     def get_realtime_config(self, agent_id: str) -> Dict[str, Any]:
@@ -0,0 +1,397 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+import numpy as np
+from app.models import ContactStatus, AnalyticsGroup
+from app.repositories import campaign_repository
+from app.repositories.base import CampaignRepository
+
+# Events read from the store per request while catching up
+EVENT_BATCH = 50000
+
+STATUSES = [status.value for status in ContactStatus]
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Funnel stages in order, and the stage each status shows a contact has reached (0 = none yet)
+FUNNEL_STAGES = ("sent", "opened", "call", "booked")
+STATUS_STAGES = {
+    ContactStatus.EMAIL_SENT.value: 1,
+    ContactStatus.EMAIL_OPENED.value: 2,
+    ContactStatus.CALL_STARTED.value: 3,
+    ContactStatus.CALL_COMPLETED.value: 3,
+    ContactStatus.NOT_INTERESTED.value: 3,
+    ContactStatus.MEETING_BOOKED.value: 4
+}
+STAGE_BY_CODE = np.array([STATUS_STAGES.get(status, 0) for status in STATUSES], dtype=np.int8)
+
+TIME_TO_CALL_PERCENTILES = (50, 75, 90, 95, 99)
+# Upper bounds (seconds) of the time-to-call histogram buckets; a last bucket takes anything slower
+TIME_TO_CALL_BUCKETS = (60, 300, 900, 3600, 4 * 3600, 86400, 3 * 86400, 7 * 86400)
+
+# A time series answers with at most this many buckets (a year of hours)
+MAX_SERIES_BUCKETS = 24 * 366
+
+NEVER = np.iinfo(np.int64).max
+
+
+def _epoch(value: Optional[datetime]) -> Optional[int]:
+    return int(value.timestamp()) if value is not None else None
+
+
+def _iso(value: int) -> str:
+    return datetime.fromtimestamp(int(value)).isoformat()
+
+
+def _rate(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+def _fit(array: np.ndarray, size: int) -> np.ndarray:
+    """`array` with room for at least `size` items, doubling when it grows"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class Codes:
+    """Dense integer codes for ids, so columns hold small ints instead of strings"""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.ids)
+            self.ids.append(value)
+        return code
+
+    def known(self, values: Iterable[str]) -> List[int]:
+        """Codes of the values seen so far, skipping unknown ones"""
+        return [self._codes[v] for v in values if v in self._codes]
+
+
+class EventColumns:
+    """Contact status events stored column-wise in NumPy arrays that grow by doubling"""
+
+    DTYPES = (
+        ("at", np.int64),
+        ("campaign", np.int32),
+        ("agent", np.int32),
+        ("contact", np.int32),
+        ("status", np.int8)
+    )
+
+    def __init__(self):
+        self.size = 0
+        self._columns = {name: np.zeros(0, dtype) for name, dtype in self.DTYPES}
+
+    def append(self, columns: Dict[str, np.ndarray]):
+        count = len(columns["at"])
+        for name, values in columns.items():
+            column = self._columns[name] = _fit(self._columns[name], self.size + count)
+            column[self.size:self.size + count] = values
+        self.size += count
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name][:self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._columns.values())
+
+
+class CampaignAnalytics:
+    """
+    Funnel, time-to-call and time-series queries over every contact status change.
+
+    The campaign store's append-only event log is mirrored here column by
+    column (epoch seconds plus integer codes for campaign, agent, contact
+    and status) and caught up incrementally before each query. Queries are
+    vectorized over the columns: filters are boolean masks, per-contact
+    results come from ufunc.at reductions and grouped counts from bincount,
+    so no query loops over events in Python.
+    """
+
+    def __init__(self, campaigns: CampaignRepository, batch_size: int = EVENT_BATCH):
+        self.campaigns = campaigns
+        self.batch_size = batch_size
+        self.events = EventColumns()
+        self.last_seq = 0
+        self.campaign_codes = Codes()
+        self.agent_codes = Codes()
+        self.contact_codes = Codes()
+        # contact code -> code of the campaign / agent it was last seen with
+        self._contact_campaign = np.zeros(0, np.int32)
+        self._contact_agent = np.zeros(0, np.int32)
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.last_query_ms = 0.0
+
+    # Loading
+
+    def refresh(self) -> int:
+        """Read the events logged since the last refresh and return how many there were"""
+        added = 0
+        while True:
+            rows = self.campaigns.get_events(self.last_seq, self.batch_size)
+            if rows:
+                self._ingest(rows)
+                added += len(rows)
+                self.last_seq = rows[-1][0]
+            if len(rows) < self.batch_size:
+                return added
+
+    def _ingest(self, rows: List[Tuple[int, int, str, str, str, str]]):
+        count = len(rows)
+        _, at, campaigns, agents, contacts, statuses = zip(*rows)
+        campaign = np.fromiter(map(self.campaign_codes.code, campaigns), np.int32, count)
+        agent = np.fromiter(map(self.agent_codes.code, agents), np.int32, count)
+        contact = np.fromiter(map(self.contact_codes.code, contacts), np.int32, count)
+        self.events.append({
+            "at": np.fromiter(at, np.int64, count),
+            "campaign": campaign,
+            "agent": agent,
+            "contact": contact,
+            "status": np.fromiter(map(STATUS_CODES.__getitem__, statuses), np.int8, count)
+        })
+        self._contact_campaign = _fit(self._contact_campaign, len(self.contact_codes))
+        self._contact_agent = _fit(self._contact_agent, len(self.contact_codes))
+        self._contact_campaign[contact] = campaign
+        self._contact_agent[contact] = agent
+
+    # Querying
+
+    def _run(self, query, *args) -> Dict[str, Any]:
+        """Catch up with the log and run a query, one at a time"""
+        with self._lock:
+            self.refresh()
+            started = time.perf_counter()
+            result = query(*args)
+            self.last_query_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.queries += 1
+            return result
+
+    def _select(
+        self,
+        campaign_ids: Optional[List[str]],
+        agent_ids: Optional[List[str]],
+        since: Optional[int] = None,
+        until: Optional[int] = None
+    ) -> Optional[np.ndarray]:
+        """Mask of the events matching the filters, or None when nothing is filtered"""
+        mask = None
+
+        def narrow(condition: np.ndarray):
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+
+        if campaign_ids:
+            narrow(np.isin(self.events.column("campaign"), self.campaign_codes.known(campaign_ids)))
+        if agent_ids:
+            narrow(np.isin(self.events.column("agent"), self.agent_codes.known(agent_ids)))
+        if since is not None:
+            narrow(self.events.column("at") >= since)
+        if until is not None:
+            narrow(self.events.column("at") < until)
+        return mask
+
+    def _columns(self, mask: Optional[np.ndarray], *names: str) -> List[np.ndarray]:
+        columns = [self.events.column(name) for name in names]
+        if mask is None:
+            return columns
+        # Taking by index beats boolean indexing once there is more than one column to gather
+        rows = np.flatnonzero(mask)
+        return [column.take(rows) for column in columns]
+
+    def funnel(
+        self,
+        campaign_ids: Optional[List[str]] = None,
+        agent_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        group_by: Optional[AnalyticsGroup] = None
+    ) -> Dict[str, Any]:
+        """
+        How many contacts got as far as each funnel stage, and the conversion between stages.
+
+        A contact counts toward every stage up to the furthest one it
+        reached, so a booking counts as an open even when the open was
+        never reported. Only events in [since, until) count.
+        """
+        return self._run(self._funnel, campaign_ids, agent_ids, _epoch(since), _epoch(until), group_by)
+
+    def _funnel(self, campaign_ids, agent_ids, since, until, group_by) -> Dict[str, Any]:
+        contact, status = self._columns(self._select(campaign_ids, agent_ids, since, until), "contact", "status")
+        furthest = np.full(len(self.contact_codes), -1, np.int8)
+        np.maximum.at(furthest, contact, STAGE_BY_CODE[status])
+        seen = np.flatnonzero(furthest >= 0)
+
+        if group_by == AnalyticsGroup.CAMPAIGN:
+            groups, names = self._contact_campaign[seen], self.campaign_codes.ids
+        elif group_by == AnalyticsGroup.AGENT:
+            groups, names = self._contact_agent[seen], self.agent_codes.ids
+        else:
+            groups, names = np.zeros(len(seen), np.int32), [None]
+
+        depth = len(FUNNEL_STAGES) + 1
+        counts = np.bincount(
+            groups.astype(np.int64) * depth + furthest[seen],
+            minlength=len(names) * depth
+        ).reshape(len(names), depth)
+        # Contacts that got at least as far as each stage
+        reached = counts[:, ::-1].cumsum(axis=1)[:, ::-1].tolist()
+
+        def stages(row: List[int]) -> Dict[str, Any]:
+            return {
+                "contacts": row[0],
+                "stages": [
+                    {
+                        "stage": stage,
+                        "contacts": row[i],
+                        "conversion": _rate(row[i], row[i - 1]),
+                        "of_sent": _rate(row[i], row[1])
+                    }
+                    for i, stage in enumerate(FUNNEL_STAGES, start=1)
+                ]
+            }
+
+        if group_by is None:
+            return stages(reached[0])
+        key = f"{group_by.value}_id"
+        return {
+            "group_by": group_by.value,
+            "groups": [{key: names[g], **stages(row)} for g, row in enumerate(reached) if row[0]]
+        }
+
+    def time_to_call(
+        self,
+        campaign_ids: Optional[List[str]] = None,
+        agent_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Distribution of the time from a contact's first email to their first call.
+
+        Covers contacts whose first email went out in [since, until); their
+        call may come later.
+        """
+        return self._run(self._time_to_call, campaign_ids, agent_ids, _epoch(since), _epoch(until))
+
+    def _first(self, contact: np.ndarray, at: np.ndarray, status: np.ndarray, value: str) -> np.ndarray:
+        """Per contact, when it first took a status (NEVER if it did not)"""
+        first = np.full(len(self.contact_codes), NEVER, np.int64)
+        rows = np.flatnonzero(status == STATUS_CODES[value])
+        np.minimum.at(first, contact.take(rows), at.take(rows))
+        return first
+
+    def _time_to_call(self, campaign_ids, agent_ids, since, until) -> Dict[str, Any]:
+        contact, at, status = self._columns(self._select(campaign_ids, agent_ids), "contact", "at", "status")
+        sent = self._first(contact, at, status, ContactStatus.EMAIL_SENT.value)
+        called = self._first(contact, at, status, ContactStatus.CALL_STARTED.value)
+
+        emailed = sent != NEVER
+        if since is not None:
+            emailed &= sent >= since
+        if until is not None:
+            emailed &= sent < until
+        answered = np.flatnonzero(emailed & (called != NEVER) & (called >= sent))
+        delays = np.sort(called.take(answered) - sent.take(answered))
+
+        emailed_count = int(np.count_nonzero(emailed))
+        result = {
+            "emailed": emailed_count,
+            "called": len(delays),
+            "call_rate": _rate(len(delays), emailed_count),
+            "mean_seconds": None,
+            "percentiles": {f"p{p}": None for p in TIME_TO_CALL_PERCENTILES},
+            "histogram": []
+        }
+        if not len(delays):
+            return result
+
+        # Delays are sorted, so each bucket's count is a difference of two positions
+        within = np.searchsorted(delays, TIME_TO_CALL_BUCKETS, side="right")
+        histogram = np.diff(within, prepend=0, append=len(delays)).tolist()
+        result.update(
+            mean_seconds=round(float(delays.mean()), 1),
+            percentiles={
+                f"p{p}": round(float(value), 1)
+                for p, value in zip(TIME_TO_CALL_PERCENTILES, np.percentile(delays, TIME_TO_CALL_PERCENTILES))
+            },
+            histogram=[
+                {"max_seconds": bound, "contacts": count}
+                for bound, count in zip([*TIME_TO_CALL_BUCKETS, None], histogram)
+            ]
+        )
+        return result
+
+    def timeseries(
+        self,
+        campaign_ids: Optional[List[str]] = None,
+        agent_ids: Optional[List[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        statuses: Optional[List[str]] = None,
+        bucket_seconds: int = 3600
+    ) -> Dict[str, Any]:
+        """
+        Status changes per time bucket (hourly by default), counted per status.
+
+        Raises ValueError if the range would need more than MAX_SERIES_BUCKETS buckets.
+        """
+        return self._run(
+            self._timeseries, campaign_ids, agent_ids, _epoch(since), _epoch(until), statuses, bucket_seconds
+        )
+
+    def _timeseries(self, campaign_ids, agent_ids, since, until, statuses, bucket_seconds) -> Dict[str, Any]:
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        at, status = self._columns(self._select(campaign_ids, agent_ids, since, until), "at", "status")
+        statuses = statuses or STATUSES
+        result = {"bucket_seconds": bucket_seconds, "statuses": statuses, "series": []}
+        if not len(at) and (since is None or until is None):
+            return result
+
+        # Buckets are aligned to multiples of bucket_seconds
+        first = (since if since is not None else int(at.min())) // bucket_seconds * bucket_seconds
+        end = until if until is not None else int(at.max()) + 1
+        buckets = max(-(-(end - first) // bucket_seconds), 0)
+        if buckets > MAX_SERIES_BUCKETS:
+            raise ValueError(f"Range needs {buckets} buckets; at most {MAX_SERIES_BUCKETS} are allowed")
+
+        width = len(STATUSES)
+        keys = (at - first) // bucket_seconds * width
+        keys += status
+        counts = np.bincount(keys, minlength=buckets * width)[:buckets * width].reshape(buckets, width)
+        columns = [STATUS_CODES[s] for s in statuses]
+        counts = counts[:, columns].tolist()
+        result["series"] = [
+            {"start": _iso(first + i * bucket_seconds), "counts": dict(zip(statuses, row))}
+            for i, row in enumerate(counts)
+        ]
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": self.events.size,
+            "last_seq": self.last_seq,
+            "contacts": len(self.contact_codes),
+            "campaigns": len(self.campaign_codes),
+            "agents": len(self.agent_codes),
+            "bytes": self.events.nbytes + self._contact_campaign.nbytes + self._contact_agent.nbytes,
+            "queries": self.queries,
+            "last_query_ms": self.last_query_ms
+        }
+
+
+# Global instance
+campaign_analytics = CampaignAnalytics(campaign_repository)
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+
+class AvailabilityCache:
+    """
+    Short-lived cache of availability lookups with request coalescing.
+
+    Entries are keyed by (event_type_id, date, duration) and expire after
+    `ttl_seconds`. Concurrent lookups of the same key share one request to
+    the calendar (single flight). Bookings and cancellations invalidate the
+    dates they touch; a lookup that was already in flight when its date was
+    invalidated still answers its callers but is not stored.
+
+    The cache is per process, so with several workers a booking made on
+    another worker is only seen once the entry expires.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        # (event_type_id, date) -> invalidation count, to drop lookups that raced an invalidation
+        self._generations: Dict[Tuple[Hashable, str], int] = {}
+        self._generation_all = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(event_type_id: Hashable, date: str, duration_minutes: int) -> Tuple:
+        return (event_type_id, date, duration_minutes)
+
+    def _generation(self, key: Tuple) -> Tuple[int, int]:
+        return (self._generation_all, self._generations.get(key[:2], 0))
+
+    async def get_or_load(self, key: Tuple, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, loading it once for all concurrent callers on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            self.expired += 1
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader, self._generation(key)))
+            self._inflight[key] = task
+        # A caller that gives up must not cancel the lookup the others are waiting on
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Tuple, loader: Callable[[], Awaitable[Any]], generation: Tuple[int, int]) -> Any:
+        try:
+            value = await loader()
+            if self._generation(key) == generation:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate_date(self, event_type_id: Hashable, date: str):
+        """Drop every cached duration for one date of an event type"""
+        self.invalidations += 1
+        scope = (event_type_id, date)
+        self._generations[scope] = self._generations.get(scope, 0) + 1
+        for key in [k for k in self._entries if k[:2] == scope]:
+            del self._entries[key]
+
+    def invalidate_all(self, event_type_id: Optional[Hashable] = None):
+        """Drop every cached date, or only those of one event type"""
+        self.invalidations += 1
+        self._generation_all += 1
+        if event_type_id is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == event_type_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the metrics endpoint"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds
+        }
@@ -0,0 +1,253 @@
+import asyncio
+import random
+import time
+from typing import Dict, List, Any, Optional, Callable, Awaitable
+from app.config import get_settings
+
+settings = get_settings()
+
+# Provider statuses worth retrying: rate limited or server-side failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket that paces requests to the provider quota"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        # Waiters queue on the lock, so tokens are handed out in FIFO order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def is_retryable(result: Dict[str, Any]) -> bool:
+    """Check whether a failed send result should be retried"""
+    return result.get("status_code") in RETRYABLE_STATUS_CODES
+
+
+def is_unknown_outcome(result: Dict[str, Any]) -> bool:
+    """A failure without a provider status (timeout, lost connection): the email may have gone out"""
+    return not result.get("success") and result.get("status_code") is None
+
+
+def is_not_accepted(result: Dict[str, Any]) -> bool:
+    """A failure the provider answered without taking the email (rate limited), so it cannot have gone out"""
+    return result.get("status_code") == 429
+
+
+class BulkSender:
+    """Sends to many recipients with a bounded worker pool, a shared rate limit and retries"""
+
+    def __init__(
+        self,
+        concurrency: int,
+        rate_limit: float,
+        burst: int,
+        max_retries: int,
+        retry_base_delay: float
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        # Shared by every bulk send so concurrent campaigns stay inside one quota
+        self.bucket = TokenBucket(rate_limit, burst)
+
+    async def _send_with_retry(
+        self,
+        item: Dict[str, Any],
+        send_one: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+    ) -> Dict[str, Any]:
+        """Send one item, retrying rate-limit and server errors with exponential backoff"""
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.bucket.acquire()
+            try:
+                result = await send_one(item)
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+
+            if result is None or result.get("success") or not is_retryable(result) or attempt > self.max_retries:
+                return self._item_result(item, result, attempt)
+
+            await self._backoff(attempt)
+
+    async def _backoff(self, attempt: int):
+        """Wait before the next attempt, with exponential backoff and jitter"""
+        delay = self.retry_base_delay * (2 ** (attempt - 1))
+        await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+    def _item_result(self, item: Dict[str, Any], result: Optional[Dict[str, Any]], attempts: int) -> Dict[str, Any]:
+        """Build the per-item result returned to callers"""
+        if result is None:
+            # The sender chose not to send this item (e.g. another worker took it)
+            return {
+                "contact_id": item.get("id"),
+                "email": item.get("email"),
+                "success": False,
+                "skipped": True,
+                "email_id": None,
+                "error": None,
+                "attempts": attempts
+            }
+        return {
+            "contact_id": item.get("id"),
+            "email": item.get("email"),
+            "success": bool(result.get("success")),
+            "email_id": result.get("email_id"),
+            "error": None if result.get("success") else result.get("error", "Unknown error"),
+            "status_code": result.get("status_code"),
+            "attempts": attempts
+        }
+
+    async def _send_batch_with_retry(
+        self,
+        batch: List[Dict[str, Any]],
+        send_batch: Callable[[List[Dict[str, Any]]], Awaitable[List[Optional[Dict[str, Any]]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Send one batch, retrying only the items that failed with a retryable error.
+
+        The idempotency key of a batch request is derived from the items in
+        it, so only repeating the same items is safe when the outcome is
+        unknown (a timeout, or a 5xx the provider may have acted on). When
+        just some items of a request need another attempt, only those rate
+        limited are sent again; the others are returned as they failed.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        pending = list(range(len(batch)))
+        attempt = 0
+        while pending:
+            attempt += 1
+            await self.bucket.acquire()
+            items = [batch[i] for i in pending]
+            try:
+                batch_results = await send_batch(items)
+            except Exception as e:
+                batch_results = [{"success": False, "error": str(e)} for _ in items]
+
+            retry = []
+            for index, result in zip(pending, batch_results):
+                retryable = result is not None and (is_retryable(result) or is_unknown_outcome(result))
+                if result is None or result.get("success") or not retryable or attempt > self.max_retries:
+                    results[index] = self._item_result(batch[index], result, attempt)
+                else:
+                    retry.append((index, result))
+            if len(retry) < len(pending):
+                # A smaller request goes out under a different key, so it must not hold anything that may have been sent
+                for index, result in retry:
+                    if not is_not_accepted(result):
+                        results[index] = self._item_result(batch[index], result, attempt)
+                retry = [(index, result) for index, result in retry if is_not_accepted(result)]
+            pending = [index for index, _ in retry]
+            if pending:
+                await self._backoff(attempt)
+
+        return results
+
+    async def send(
+        self,
+        items: List[Dict[str, Any]],
+        send_one: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        on_result: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Send to every item and return per-item results in input order.
+
+        `send_one` performs a single send and returns an EmailService-style
+        result dict, or None to skip the item without retrying. `on_result` is called with (item, result) as soon as each
+        item finishes so callers can record progress incrementally.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+
+        async def worker():
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._send_with_retry(item, send_one)
+                results[index] = result
+                if on_result:
+                    on_result(item, result)
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(items)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+        return results
+
+    async def send_batches(
+        self,
+        items: List[Dict[str, Any]],
+        send_batch: Callable[[List[Dict[str, Any]]], Awaitable[List[Optional[Dict[str, Any]]]]],
+        batch_size: int,
+        on_result: Optional[Callable[[Dict[str, Any], Dict[str, Any]], Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Send to every item in batches of up to `batch_size` and return per-item results in input order.
+
+        `send_batch` sends one provider batch request and returns a result
+        (or None to skip) for each of its items. Each request takes one token
+        from the rate limit, and only items that failed with a retryable error
+        are sent again. `on_result` is called per item as in `send`.
+        """
+        batch_size = max(1, batch_size)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        queue: asyncio.Queue = asyncio.Queue()
+        for start in range(0, len(items), batch_size):
+            queue.put_nowait((start, items[start:start + batch_size]))
+
+        async def worker():
+            while True:
+                try:
+                    start, batch = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                batch_results = await self._send_batch_with_retry(batch, send_batch)
+                for offset, (item, result) in enumerate(zip(batch, batch_results)):
+                    results[start + offset] = result
+                    if on_result:
+                        on_result(item, result)
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, queue.qsize()))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+        return results
+
+
+bulk_sender = BulkSender(
+    concurrency=settings.email_send_concurrency,
+    # Every worker process has its own bucket, so each gets an equal share of the quota
+    rate_limit=settings.email_rate_limit_per_second / max(1, settings.web_concurrency),
+    burst=settings.email_rate_limit_burst,
+    max_retries=settings.email_max_retries,
+    retry_base_delay=settings.email_retry_base_delay
+)
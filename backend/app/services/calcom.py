@@ -1,11 +1,42 @@
+import asyncio
+import time
+import uuid
 import httpx
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from app.config import get_settings
+from app.services.availability_cache import AvailabilityCache
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.slot_index import AvailabilityPrefetcher, parse_slot_time
+from app.repositories import slot_hold_repository
 
 settings = get_settings()
 
-CALCOM_API_BASE = "https://api.cal.com/v1"
+CALCOM_API_BASE = settings.calcom_api_url
+
+# Each endpoint has its own circuit breaker, so failing bookings do not block availability reads
+CALCOM_ENDPOINTS = ("availability", "bookings", "cancellations")
+
+AVAILABILITY_DEGRADED_MESSAGE = (
+    "The calendar is not responding right now, so no times are available. Do not make up times: "
+    "offer to try again in a moment or to follow up by email with options."
+)
+BOOKING_DEGRADED_MESSAGE = (
+    "The meeting was NOT booked because the calendar is not responding right now. Tell the caller, "
+    "and offer to try again in a moment or to follow up by email."
+)
+BOOKING_UNCONFIRMED_MESSAGE = (
+    "The calendar did not confirm the booking in time, so it may or may not have gone through. "
+    "Do not tell the caller it is booked; let them know the team will follow up to confirm."
+)
+
+
+class CalComError(Exception):
+    """Raised when Cal.com answers, but not with the data asked for"""
+
+
+# Calendar failures the agent is told about; anything else is a bug and is raised
+CALENDAR_ERRORS = (httpx.HTTPError, asyncio.TimeoutError, CircuitOpenError, CalComError)
 
 
 # Tool definitions for the OpenAI Realtime API
@@ -26,6 +57,25 @@ CALCOM_TOOLS = [
             "required": ["date"]
         }
     },
+    {
+        "type": "function",
+        "name": "find_next_available_slots",
+        "description": "Find the next free time slots after a given time, across days. Use this when the customer asks for the earliest or next available time instead of a specific date.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "after": {
+                    "type": "string",
+                    "description": "Only return slots starting at or after this time, in ISO 8601 format (e.g., 2024-01-15T13:00:00)"
+                },
+                "count": {
+                    "type": "integer",
+                    "description": "How many slots to return (default 3)"
+                }
+            },
+            "required": ["after"]
+        }
+    },
     {
         "type": "function",
         "name": "book_meeting",
@@ -97,6 +147,63 @@ class CalComService:
     def __init__(self):
         self.api_key = settings.calcom_api_key
         self.event_type_id = settings.calcom_event_type_id
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.availability_cache = AvailabilityCache(
+            settings.availability_cache_ttl_seconds,
+            settings.availability_cache_max_entries
+        )
+        self.prefetcher = AvailabilityPrefetcher(
+            self._fetch_slots,
+            settings.availability_prefetch_days,
+            settings.availability_prefetch_interval_seconds,
+            # Stop trusting the window if several refreshes in a row failed
+            max_age_seconds=settings.availability_prefetch_interval_seconds * 3
+        )
+        self.holds = slot_hold_repository
+        self.hold_stats = {"claimed": 0, "conflicts": 0, "released": 0, "confirmed": 0}
+        self.breakers = {
+            name: CircuitBreaker(
+                name, settings.calcom_breaker_failure_threshold, settings.calcom_breaker_reset_seconds
+            )
+            for name in CALCOM_ENDPOINTS
+        }
+        self.hedge_stats = {"hedged": 0, "hedge_wins": 0}
+    
+    def start(self):
+        """Start prefetching availability in the background"""
+        self.prefetcher.start()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use in the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            options = dict(
+                base_url=CALCOM_API_BASE,
+                headers=self._get_headers(),
+                timeout=httpx.Timeout(settings.calcom_timeout_seconds, connect=settings.calcom_connect_timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=settings.calcom_max_connections,
+                    max_keepalive_connections=settings.calcom_max_connections,
+                    keepalive_expiry=settings.calcom_keepalive_seconds
+                )
+            )
+            try:
+                self._client = httpx.AsyncClient(http2=settings.calcom_http2, **options)
+            except ImportError:
+                # HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+                print("Cal.com HTTP/2 requested but h2 is not installed; using HTTP/1.1")
+                self._client = httpx.AsyncClient(**options)
+            self._client_loop = loop
+        return self._client
+    
+    async def close(self):
+        """Stop prefetching and close the pooled HTTP client"""
+        await self.prefetcher.shutdown()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
     
     def _get_headers(self) -> Dict[str, str]:
         """Get API headers"""
@@ -104,52 +211,222 @@ class CalComService:
             "Content-Type": "application/json"
         }
     
+    async def _request(self, endpoint: str, method: str, path: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """Send one request through the endpoint's circuit breaker; 5xx and 429 answers count as failures"""
+        breaker = self.breakers[endpoint]
+        breaker.check()
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, settings.calcom_connect_timeout_seconds))
+        try:
+            response = await self._get_client().request(method, path, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+    
+    async def _hedged_get(self, endpoint: str, path: str, **kwargs) -> httpx.Response:
+        """GET that sends a second request if the first is slow, and uses whichever answers first"""
+        hedge_after = settings.calcom_hedge_after_seconds
+        if hedge_after <= 0:
+            return await self._request(endpoint, "GET", path, **kwargs)
+        
+        tasks = [asyncio.ensure_future(self._request(endpoint, "GET", path, **kwargs))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                self.hedge_stats["hedged"] += 1
+                tasks.append(asyncio.ensure_future(self._request(endpoint, "GET", path, **kwargs)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result().status_code < 500:
+                        if task is not tasks[0]:
+                            self.hedge_stats["hedge_wins"] += 1
+                        return task.result()
+            # Neither gave a usable answer: report the first request's outcome
+            return tasks[0].result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+    
+    def _degraded(self, error: Exception, message: str) -> Dict[str, Any]:
+        """Tell the model plainly that the calendar could not answer, instead of inventing an answer"""
+        if isinstance(error, CircuitOpenError):
+            reason = "calendar_unavailable"
+        elif isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)):
+            reason = "calendar_timeout"
+        else:
+            reason = "calendar_error"
+        return {"success": False, "degraded": True, "error": reason, "message": message}
+    
     async def get_availability(self, date: str, duration_minutes: int = 30) -> Dict[str, Any]:
         """Get available time slots for a specific date"""
+        datetime.strptime(date, "%Y-%m-%d")
         try:
-            # Parse date and create time range
-            target_date = datetime.strptime(date, "%Y-%m-%d")
-            start_time = target_date.replace(hour=9, minute=0, second=0)
-            end_time = target_date.replace(hour=17, minute=0, second=0)
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{CALCOM_API_BASE}/availability",
-                    params={
-                        "apiKey": self.api_key,
-                        "eventTypeId": self.event_type_id,
-                        "dateFrom": start_time.strftime("%Y-%m-%d"),
-                        "dateTo": end_time.strftime("%Y-%m-%d")
-                    },
-                    headers=self._get_headers()
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    # Format the available slots
-                    slots = []
-                    if "slots" in data:
-                        for slot_date, times in data["slots"].items():
-                            for time_slot in times:
-                                slots.append({
-                                    "start": time_slot.get("time"),
-                                    "end": (datetime.fromisoformat(time_slot.get("time").replace('Z', '')) + 
-                                           timedelta(minutes=duration_minutes)).isoformat()
-                                })
-                    
-                    return {
-                        "date": date,
-                        "available_slots": slots,
-                        "timezone": "America/Los_Angeles"
-                    }
-                else:
-                    # Return mock availability if API fails or no key
-                    return self._get_mock_availability(date, duration_minutes)
-                    
-        except Exception as e:
-            print(f"Cal.com API error: {e}")
+            slots = await asyncio.wait_for(
+                self._slots_on(date, duration_minutes), settings.calcom_read_budget_seconds
+            )
+        except CALENDAR_ERRORS as e:
+            print(f"Cal.com API error: {e!r}")
+            if settings.calcom_mock_fallback:
+                # Return mock availability for demo purposes
+                return self._get_mock_availability(date, duration_minutes)
+            return {
+                "date": date,
+                "available_slots": [],
+                "timezone": "America/Los_Angeles",
+                **self._degraded(e, AVAILABILITY_DEGRADED_MESSAGE)
+            }
+        return {
+            "date": date,
+            "available_slots": self._without_held(slots),
+            "timezone": "America/Los_Angeles"
+        }
+    
+    async def _slots_on(self, date: str, duration_minutes: int) -> List[Dict[str, Any]]:
+        """Free slots on one day, from the prefetched window or a cached lookup"""
+        slots = self.prefetcher.slots_on(datetime.strptime(date, "%Y-%m-%d").date(), duration_minutes)
+        if slots is None:
+            key = AvailabilityCache.key(self.event_type_id, date, duration_minutes)
+            availability = await self.availability_cache.get_or_load(
+                key, lambda: self._fetch_availability(date, duration_minutes)
+            )
+            slots = availability["available_slots"]
+        return slots
+    
+    async def find_next_slots(self, after: str, count: int = 3, duration_minutes: int = 30) -> Dict[str, Any]:
+        """Find the next free slots starting at or after a time, looking across days"""
+        # Slot times are naive UTC, so an offset is converted to UTC before comparing
+        after_dt = parse_slot_time(after)
+        count = max(1, min(count, 20))
+        try:
+            slots = await asyncio.wait_for(
+                self._next_slots(after_dt, count, duration_minutes), settings.calcom_read_budget_seconds
+            )
+        except CALENDAR_ERRORS as e:
+            print(f"Cal.com API error: {e!r}")
+            if not settings.calcom_mock_fallback:
+                return {
+                    "after": after,
+                    "available_slots": [],
+                    "timezone": "America/Los_Angeles",
+                    **self._degraded(e, AVAILABILITY_DEGRADED_MESSAGE)
+                }
             # Return mock availability for demo purposes
-            return self._get_mock_availability(date, duration_minutes)
+            slots = []
+            for offset in range(7):
+                day = (after_dt.date() + timedelta(days=offset)).strftime("%Y-%m-%d")
+                slots += [
+                    slot for slot in self._get_mock_availability(day, duration_minutes)["available_slots"]
+                    if datetime.fromisoformat(slot["start"]) >= after_dt
+                ]
+            slots = slots[:count]
+        
+        return {
+            "after": after,
+            "available_slots": slots,
+            "timezone": "America/Los_Angeles"
+        }
+    
+    async def _next_slots(self, after_dt: datetime, count: int, duration_minutes: int) -> List[Dict[str, Any]]:
+        # Ask for a few extra in case some of them are held by other callers
+        wanted = count + 5
+        slots = self.prefetcher.next_free(after_dt, duration_minutes, wanted)
+        if slots is None and self.prefetcher.enabled:
+            try:
+                await self.prefetcher.refresh()
+                slots = self.prefetcher.next_free(after_dt, duration_minutes, wanted)
+            except Exception as e:
+                print(f"Cal.com API error: {e!r}")
+        if slots is not None:
+            slots = self._without_held(slots)[:count]
+            if len(slots) == count:
+                return slots
+        
+        # Outside the prefetched window (or no window): walk forward one day at a time
+        slots = []
+        day = after_dt.date()
+        for _ in range(max(self.prefetcher.days, 7)):
+            day_slots = self._without_held(await self._slots_on(day.strftime("%Y-%m-%d"), duration_minutes))
+            slots += [slot for slot in day_slots if parse_slot_time(slot["start"]) >= after_dt]
+            if len(slots) >= count:
+                break
+            day += timedelta(days=1)
+        return slots[:count]
+    
+    def _without_held(self, slots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop slots another caller is booking or has just booked"""
+        if not slots:
+            return slots
+        keys = [self._slot_key(slot["start"]) for slot in slots]
+        held = self.holds.held_starts(self.event_type_id, min(keys), max(keys))
+        if not held:
+            return slots
+        return [slot for slot, key in zip(slots, keys) if key not in held]
+    
+    @staticmethod
+    def _slot_key(start_time: str) -> str:
+        """
+        Key a slot by its UTC instant, so '...T17:00:00.000Z', '...T17:00:00'
+        and '...T10:00:00-07:00' all hold the same slot.
+        """
+        return parse_slot_time(start_time).replace(microsecond=0).isoformat()
+    
+    async def _fetch_slots(self, date_from, date_to, timeout: Optional[float] = None) -> List[str]:
+        """Fetch the free slot start times for a range of days in one request"""
+        response = await self._hedged_get(
+            "availability",
+            "/availability",
+            timeout=timeout,
+            params={
+                "apiKey": self.api_key,
+                "eventTypeId": self.event_type_id,
+                "dateFrom": date_from.strftime("%Y-%m-%d"),
+                "dateTo": date_to.strftime("%Y-%m-%d")
+            }
+        )
+        if response.status_code != 200:
+            raise CalComError(f"availability request returned HTTP {response.status_code}")
+        
+        data = response.json()
+        return [
+            time_slot.get("time")
+            for times in data.get("slots", {}).values()
+            for time_slot in times
+        ]
+    
+    async def _fetch_availability(self, date: str, duration_minutes: int) -> Dict[str, Any]:
+        """Fetch available time slots from Cal.com, raising if the API does not answer with them"""
+        target_date = datetime.strptime(date, "%Y-%m-%d").date()
+        # Someone is waiting on this lookup, so it gets the read budget rather than the client default
+        slot_times = await self._fetch_slots(target_date, target_date, timeout=settings.calcom_read_budget_seconds)
+        
+        # Format the available slots
+        slots = [
+            {
+                "start": slot_time,
+                "end": (datetime.fromisoformat(slot_time.replace('Z', '')) + 
+                       timedelta(minutes=duration_minutes)).isoformat()
+            }
+            for slot_time in slot_times
+        ]
+        
+        return {
+            "date": date,
+            "available_slots": slots,
+            "timezone": "America/Los_Angeles"
+        }
     
     def _get_mock_availability(self, date: str, duration_minutes: int = 30) -> Dict[str, Any]:
         """Generate mock availability for demo purposes"""
@@ -182,54 +459,132 @@ class CalComService:
         attendee_email: str,
         notes: str = ""
     ) -> Dict[str, Any]:
-        """Create a booking via Cal.com API"""
+        """Create a booking via Cal.com API, once this caller holds the slot"""
         print(f"Creating booking: {attendee_name} ({attendee_email}) at {start_time}")
+        slot_key = self._slot_key(start_time)
+        # Unique to this attempt, so a second booking request for the slot (even from the same caller) is refused
+        holder = uuid.uuid4().hex
+        if not self.holds.claim(self.event_type_id, slot_key, holder, time.time() + settings.slot_hold_seconds):
+            # Another caller is booking (or just booked) this slot; no need to ask Cal.com
+            self.hold_stats["conflicts"] += 1
+            return self._slot_taken(start_time)
+        self.hold_stats["claimed"] += 1
+        
+        result = await self._create_booking(start_time, attendee_name, attendee_email, notes)
+        if result.get("success"):
+            self.holds.confirm(
+                self.event_type_id, slot_key, holder, time.time() + settings.slot_booked_hold_seconds
+            )
+            self.hold_stats["confirmed"] += 1
+        elif result.get("error") != "booking_unconfirmed":
+            # An unconfirmed booking may still have gone through, so that hold is left to expire
+            self.holds.release(self.event_type_id, slot_key, holder)
+            self.hold_stats["released"] += 1
+        return result
+    
+    def _slot_taken(self, start_time: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": "slot_unavailable",
+            "start_time": start_time,
+            "message": "That time was just taken by someone else. Please offer the caller another slot."
+        }
+    
+    async def _create_booking(
+        self,
+        start_time: str,
+        attendee_name: str,
+        attendee_email: str,
+        notes: str = ""
+    ) -> Dict[str, Any]:
+        """Send the booking request to Cal.com"""
+        # Parse start time and calculate end time (30 min default)
+        start_dt = datetime.fromisoformat(start_time.replace('Z', ''))
+        end_dt = start_dt + timedelta(minutes=30)
         try:
-            # Parse start time and calculate end time (30 min default)
-            start_dt = datetime.fromisoformat(start_time.replace('Z', ''))
-            end_dt = start_dt + timedelta(minutes=30)
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{CALCOM_API_BASE}/bookings",
-                    params={"apiKey": self.api_key},
-                    headers=self._get_headers(),
-                    json={
-                        "eventTypeId": int(self.event_type_id) if self.event_type_id else 1,
-                        "start": start_time,
-                        "end": end_dt.isoformat(),
-                        "responses": {
-                            "name": attendee_name,
-                            "email": attendee_email,
-                            "notes": notes
-                        },
-                        "timeZone": "America/Los_Angeles",
-                        "language": "en",
-                        "metadata": {}
-                    }
-                )
-                
-                if response.status_code in [200, 201]:
-                    data = response.json()
-                    return {
-                        "success": True,
-                        "booking_id": data.get("id"),
-                        "uid": data.get("uid"),
-                        "title": data.get("title", "Sales Demo Call"),
-                        "start_time": start_time,
-                        "end_time": end_dt.isoformat(),
-                        "meeting_url": data.get("metadata", {}).get("videoCallUrl", ""),
-                        "attendee_email": attendee_email,
-                        "attendee_name": attendee_name
-                    }
-                else:
-                    # Return mock success for demo
-                    return self._get_mock_booking(start_time, attendee_name, attendee_email, notes)
-                    
+            response = await self._request(
+                "bookings",
+                "POST",
+                "/bookings",
+                timeout=settings.calcom_booking_budget_seconds,
+                params={"apiKey": self.api_key},
+                json={
+                    "eventTypeId": int(self.event_type_id) if self.event_type_id else 1,
+                    "start": start_time,
+                    "end": end_dt.isoformat(),
+                    "responses": {
+                        "name": attendee_name,
+                        "email": attendee_email,
+                        "notes": notes
+                    },
+                    "timeZone": "America/Los_Angeles",
+                    "language": "en",
+                    "metadata": {}
+                }
+            )
         except Exception as e:
-            print(f"Cal.com booking error: {e}")
-            # Return mock booking for demo purposes
+            print(f"Cal.com booking error: {e!r}")
+            if settings.calcom_mock_fallback:
+                # Return mock booking for demo purposes
+                return self._get_mock_booking(start_time, attendee_name, attendee_email, notes)
+            if isinstance(e, (CircuitOpenError, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+                # The request never reached Cal.com
+                return {"start_time": start_time, **self._degraded(e, BOOKING_DEGRADED_MESSAGE)}
+            self._note_booking_attempt(start_time, start_dt, booked=False)
+            return {
+                "start_time": start_time,
+                **self._degraded(e, BOOKING_UNCONFIRMED_MESSAGE),
+                "error": "booking_unconfirmed"
+            }
+        
+        self._note_booking_attempt(start_time, start_dt, booked=response.status_code in [200, 201])
+        
+        if response.status_code in [200, 201]:
+            data = response.json()
+            return {
+                "success": True,
+                "booking_id": data.get("id"),
+                "uid": data.get("uid"),
+                "title": data.get("title", "Sales Demo Call"),
+                "start_time": start_time,
+                "end_time": end_dt.isoformat(),
+                "meeting_url": data.get("metadata", {}).get("videoCallUrl", ""),
+                "attendee_email": attendee_email,
+                "attendee_name": attendee_name
+            }
+        elif response.status_code == 409:
+            # Cal.com says the slot is gone
+            return self._slot_taken(start_time)
+        elif settings.calcom_mock_fallback:
+            # Return mock success for demo
             return self._get_mock_booking(start_time, attendee_name, attendee_email, notes)
+        else:
+            print(f"Cal.com booking failed: HTTP {response.status_code} {response.text[:200]}")
+            return {
+                "success": False,
+                "error": "booking_failed",
+                "start_time": start_time,
+                "message": "The calendar rejected this booking, so it was NOT made. Offer the caller another time or a follow-up by email."
+            }
+    
+    def _note_booking_attempt(self, start_time: str, start_dt: datetime, booked: bool):
+        """
+        Booked or not, the answer may have changed that day's free slots.
+
+        Only cached availability is updated here, so a failure is logged
+        rather than failing a booking Cal.com may already have made.
+        """
+        try:
+            # The index holds naive UTC times, while start_dt keeps the caller's offset for the request
+            slot_start = parse_slot_time(start_time)
+            for day in {start_dt.date(), slot_start.date()}:
+                self.availability_cache.invalidate_date(self.event_type_id, day.strftime("%Y-%m-%d"))
+            if booked:
+                self.prefetcher.mark_booked(slot_start)
+            else:
+                self.prefetcher.request_refresh()
+        except Exception as e:
+            print(f"Availability bookkeeping after booking failed: {e!r}")
     
     def _get_mock_booking(
         self,
@@ -259,20 +614,23 @@ class CalComService:
     async def cancel_booking(self, booking_id: str, reason: str = "") -> Dict[str, Any]:
         """Cancel a booking"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    f"{CALCOM_API_BASE}/bookings/{booking_id}",
-                    params={
-                        "apiKey": self.api_key,
-                        "cancellationReason": reason
-                    },
-                    headers=self._get_headers()
-                )
-                
-                return {
-                    "success": response.status_code in [200, 204],
-                    "booking_id": booking_id
+            response = await self._request(
+                "cancellations",
+                "DELETE",
+                f"/bookings/{booking_id}",
+                params={
+                    "apiKey": self.api_key,
+                    "cancellationReason": reason
                 }
+            )
+            # The booking's date is not known here, so every cached date of the event type is dropped
+            self.availability_cache.invalidate_all(self.event_type_id)
+            self.prefetcher.request_refresh()
+            
+            return {
+                "success": response.status_code in [200, 204],
+                "booking_id": booking_id
+            }
         except Exception as e:
             print(f"Cal.com cancel error: {e}")
             return {"success": False, "error": str(e)}
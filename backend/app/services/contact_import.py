@@ -0,0 +1,233 @@
+import csv
+import codecs
+import json
+import re
+import secrets
+import uuid
+from typing import Dict, List, Any, Optional, Set, Tuple, AsyncIterator
+from datetime import datetime
+from app.models import ContactStatus
+from app.repositories import campaign_repository
+
+# Rows validated, deduped and written together
+IMPORT_BATCH_SIZE = 1000
+
+# Row errors returned in the summary; the rest are only counted
+MAX_IMPORT_ERRORS = 1000
+
+# Column order for CSV files without a header row
+DEFAULT_CSV_COLUMNS = ["name", "email", "company"]
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def normalize_email(email: str) -> str:
+    """Normalize an email address for storage and duplicate checks"""
+    return email.strip().lower()
+
+
+def _end_line(line: str) -> str:
+    """Normalize a CRLF line ending to LF"""
+    return line[:-2] + "\n" if line.endswith("\r\n") else line
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines (ending in \\n) without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # Only \n ends a line: str.splitlines would also split on \x0b, \x1c, U+2028 and
+        # others inside a field, and on a \r whose \n is still in the next chunk
+        lines = pending.split("\n")
+        # The last piece is an incomplete line (possibly ending in that \r)
+        pending = lines.pop()
+        for line in lines:
+            yield _end_line(line + "\n")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, str]]:
+    """Group lines into CSV records, keeping quoted fields that span lines together"""
+    record = ""
+    start_line = 0
+    in_quotes = False
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not record:
+            start_line = line_number
+        record += line
+        # Doubled quotes inside a field cancel out, so parity tracks whether a field is open
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            yield start_line, record
+            record = ""
+    if record:
+        yield start_line, record
+
+
+def parse_csv_record(record: str) -> List[str]:
+    """Parse one CSV record into its fields"""
+    return next(csv.reader([record]), [])
+
+
+class ContactImporter:
+    """
+    Imports contacts from CSV or NDJSON streams.
+
+    The body is read incrementally and handled in batches: each batch is
+    validated, deduped against earlier rows and the campaign's existing
+    contacts, and written in one repository call. Only a summary with the
+    first row errors is kept, so memory stays flat regardless of file size
+    (apart from the set of emails seen so far).
+    """
+
+    def __init__(self):
+        self.campaigns = campaign_repository
+
+    async def import_csv(
+        self,
+        campaign_id: str,
+        chunks: AsyncIterator[bytes],
+        header: bool = True
+    ) -> Dict[str, Any]:
+        """Import a CSV stream, with a header row unless `header` is False"""
+        run = _ImportRun(self.campaigns, campaign_id, "csv")
+        columns: Optional[List[str]] = None if header else DEFAULT_CSV_COLUMNS
+
+        async for line_number, record in iter_csv_records(iter_lines(chunks)):
+            if not record.strip():
+                continue
+            fields = parse_csv_record(record)
+            if columns is None:
+                columns = [c.strip().lower() for c in fields]
+                if "email" not in columns:
+                    raise ValueError("CSV header must include an email column")
+                continue
+            run.add(line_number, dict(zip(columns, fields)))
+            if run.batch_full():
+                run.flush()
+
+        return run.finish()
+
+    async def import_ndjson(self, campaign_id: str, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """Import a stream of one JSON contact object per line"""
+        run = _ImportRun(self.campaigns, campaign_id, "ndjson")
+        line_number = 0
+
+        async for line in iter_lines(chunks):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                run.error(line_number, f"Invalid JSON: {e.msg}")
+                continue
+            if not isinstance(row, dict):
+                run.error(line_number, "Expected a JSON object")
+                continue
+            run.add(line_number, row)
+            if run.batch_full():
+                run.flush()
+
+        return run.finish()
+
+
+class _ImportRun:
+    """State of one import: the pending batch, seen emails and the summary counters"""
+
+    def __init__(self, campaigns, campaign_id: str, source_format: str):
+        self.campaigns = campaigns
+        self.campaign_id = campaign_id
+        self.format = source_format
+        self.batch: List[Tuple[int, Dict[str, Any]]] = []
+        self.seen: Set[str] = set()
+        self.total_rows = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row: int, message: str, email: Optional[str] = None):
+        self.total_rows += 1
+        self.invalid += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"row": row, "email": email, "error": message})
+
+    def add(self, row: int, data: Dict[str, Any]):
+        """Validate a row and queue it for the next batch"""
+        name = str(data.get("name") or "").strip()
+        raw_email = str(data.get("email") or "").strip()
+        company = str(data.get("company") or "").strip()
+
+        if not raw_email:
+            self.error(row, "Missing email")
+            return
+        email = normalize_email(raw_email)
+        if not EMAIL_PATTERN.match(email):
+            self.error(row, "Invalid email", raw_email)
+            return
+        if not name:
+            self.error(row, "Missing name", raw_email)
+            return
+
+        self.total_rows += 1
+        if email in self.seen:
+            self.duplicates += 1
+            return
+        self.seen.add(email)
+        self.batch.append((row, {"name": name, "email": email, "company": company}))
+
+    def batch_full(self) -> bool:
+        return len(self.batch) >= IMPORT_BATCH_SIZE
+
+    def flush(self):
+        """Drop rows whose email the campaign already has and write the rest"""
+        if not self.batch:
+            return
+        existing = self.campaigns.get_existing_emails(
+            self.campaign_id, [data["email"] for _, data in self.batch]
+        )
+        now = datetime.now().isoformat()
+        contacts = []
+        for _, data in self.batch:
+            if data["email"] in existing:
+                self.duplicates += 1
+                continue
+            contacts.append({
+                "id": str(uuid.uuid4()),
+                "name": data["name"],
+                "email": data["email"],
+                "company": data["company"],
+                "status": ContactStatus.PENDING.value,
+                "call_token": secrets.token_urlsafe(32),
+                "created_at": now,
+                "last_activity": None
+            })
+        if contacts:
+            self.campaigns.add_contacts(self.campaign_id, contacts)
+            self.imported += len(contacts)
+        self.batch = []
+
+    def finish(self) -> Dict[str, Any]:
+        self.flush()
+        if self.imported:
+            self.campaigns.update_campaign(self.campaign_id, {"updated_at": datetime.now().isoformat()})
+        return {
+            "success": True,
+            "format": self.format,
+            "total_rows": self.total_rows,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "errors_truncated": self.invalid > len(self.errors)
+        }
+
+
+contact_importer = ContactImporter()
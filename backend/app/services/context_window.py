@@ -0,0 +1,225 @@
+import asyncio
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Awaitable, Callable, Optional
+from app.repositories.base import SessionRepository
+
+# Each message carries a few tokens of framing (role, separators) on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Summarize once the unsummarized transcript passes this share of the budget, down to the lower share
+SUMMARIZE_AT = 0.75
+SUMMARIZE_DOWN_TO = 0.5
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+NAME_PATTERN = re.compile(r"\b(?i:my name is|my name's|this is|call me|i am|i'm)\s+([A-Z][\w'-]+(?:\s+[A-Z][\w'-]+)?)")
+
+FACT_LABELS = {
+    "name": "Name",
+    "email": "Email",
+    "chosen_slot": "Chosen slot",
+    "booking": "Booking"
+}
+
+_encoding = None
+
+
+def _get_encoding():
+    """The tiktoken encoding, or False when tiktoken is not installed (pip install tiktoken)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+@lru_cache(maxsize=512)
+def count_tokens(text: str) -> int:
+    """Tokens in `text`: exact with tiktoken, otherwise estimated at about 4 characters per token"""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: Dict[str, Any]) -> int:
+    """Token count of a message, counted once and cached on the message"""
+    tokens = message.get("tokens")
+    if tokens is None:
+        tokens = count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+        message["tokens"] = tokens
+    return tokens
+
+
+def extract_facts(text: str) -> Dict[str, str]:
+    """Name and email mentioned in a caller's message"""
+    facts = {}
+    email = EMAIL_PATTERN.search(text)
+    if email:
+        facts["email"] = email.group(0)
+    name = NAME_PATTERN.search(text)
+    if name:
+        facts["name"] = name.group(1)
+    return facts
+
+
+def _empty_context() -> Dict[str, Any]:
+    return {"summary": "", "summarized_count": 0, "facts": {}}
+
+
+class ContextWindowManager:
+    """
+    Builds each chat turn's prompt from the session transcript within a token budget.
+
+    The newest messages that fit the budget are sent verbatim, after the
+    system prompt and a short memory of everything older: a running summary
+    plus key facts (name, email, chosen slot) that are tracked as they come
+    up, so they survive summarization. Once the unsummarized part of the
+    transcript grows past most of the budget, its oldest messages are
+    folded into the summary by a background task, one session at a time.
+    """
+
+    def __init__(
+        self,
+        sessions: SessionRepository,
+        summarize: Callable[[str, List[Dict[str, Any]]], Awaitable[str]],
+        budget_tokens: int
+    ):
+        self.sessions = sessions
+        self.summarize = summarize
+        self.budget_tokens = budget_tokens
+        self._summarizing: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "turns": 0,
+            "last_prompt_tokens": 0,
+            "max_prompt_tokens": 0,
+            "summaries": 0,
+            "summary_failures": 0,
+            "dropped_messages": 0
+        }
+
+    def get_context(self, session_id: str) -> Dict[str, Any]:
+        return self.sessions.get_context(session_id) or _empty_context()
+
+    def memory_message(self, context: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """The system message carrying the summary and key facts, if there are any"""
+        parts = []
+        if context["summary"]:
+            parts.append(f"Summary of the earlier conversation:\n{context['summary']}")
+        facts = [f"- {FACT_LABELS.get(k, k)}: {v}" for k, v in context["facts"].items() if v]
+        if facts:
+            parts.append("Known details:\n" + "\n".join(facts))
+        if not parts:
+            return None
+        return {"role": "system", "content": "\n\n".join(parts)}
+
+    def build(self, session: Dict[str, Any], system_prompt: str, user_message: str) -> List[Dict[str, Any]]:
+        """Messages for the next completion: system prompt, memory, recent transcript, new message"""
+        history = session["messages"]
+        context = self.get_context(session["id"])
+        covered = min(context["summarized_count"], len(history))
+
+        preamble = [{"role": "system", "content": system_prompt}]
+        memory = self.memory_message(context)
+        if memory:
+            preamble.append(memory)
+        latest = {"role": "user", "content": user_message}
+        used = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in [*preamble, latest])
+
+        # Walk back from the newest message while the budget allows
+        start = len(history)
+        while start > covered and used + message_tokens(history[start - 1]) <= self.budget_tokens:
+            used += message_tokens(history[start - 1])
+            start -= 1
+        if start > covered:
+            # The summary has not caught up with these yet
+            self.stats["dropped_messages"] += start - covered
+
+        fixed = sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in [*preamble, latest])
+        self._maybe_summarize(session["id"], history, covered, context, max(self.budget_tokens - fixed, 0))
+
+        self.stats["turns"] += 1
+        self.stats["last_prompt_tokens"] = used
+        self.stats["max_prompt_tokens"] = max(self.stats["max_prompt_tokens"], used)
+        return preamble + [{"role": m["role"], "content": m["content"]} for m in history[start:]] + [latest]
+
+    def _maybe_summarize(self, session_id: str, history: List[Dict[str, Any]], covered: int, context: Dict[str, Any], room: int):
+        """Start summarizing the oldest messages once the unsummarized ones fill most of the transcript's room"""
+        if session_id in self._summarizing:
+            return
+        tail = [message_tokens(m) for m in history[covered:]]
+        if sum(tail) <= room * SUMMARIZE_AT:
+            return
+        # Fold the oldest messages in until what is left fits the lower mark
+        remaining = sum(tail)
+        cut = covered
+        for tokens in tail:
+            if remaining <= room * SUMMARIZE_DOWN_TO:
+                break
+            remaining -= tokens
+            cut += 1
+        messages = [{"role": m["role"], "content": m["content"]} for m in history[covered:cut]]
+        self._summarizing[session_id] = asyncio.create_task(
+            self._summarize(session_id, context["summary"], messages, covered, cut)
+        )
+
+    async def _summarize(self, session_id: str, summary: str, messages: List[Dict[str, Any]], covered: int, cut: int):
+        try:
+            new_summary = await self.summarize(summary, messages)
+            context = self.get_context(session_id)
+            if context["summarized_count"] != covered:
+                return
+            context.update(summary=new_summary, summarized_count=cut)
+            self.sessions.save_context(session_id, context)
+            self.stats["summaries"] += 1
+        except Exception as e:
+            print(f"Conversation summary failed for session {session_id}: {e}")
+            self.stats["summary_failures"] += 1
+        finally:
+            self._summarizing.pop(session_id, None)
+
+    def _remember(self, session_id: str, facts: Dict[str, str]):
+        facts = {k: v for k, v in facts.items() if v}
+        if not facts:
+            return
+        context = self.get_context(session_id)
+        if all(context["facts"].get(k) == v for k, v in facts.items()):
+            return
+        context["facts"].update(facts)
+        self.sessions.save_context(session_id, context)
+
+    def note_user_message(self, session_id: str, text: str):
+        """Remember a name or email the caller mentions"""
+        self._remember(session_id, extract_facts(text))
+
+    def note_tool_call(self, session_id: str, name: str, arguments: str, result: str):
+        """Remember the details of a booking attempt"""
+        if name != "book_meeting":
+            return
+        try:
+            arguments = json.loads(arguments or "{}")
+            result = json.loads(result)
+        except (TypeError, json.JSONDecodeError):
+            return
+        if not isinstance(arguments, dict) or not isinstance(result, dict):
+            return
+        facts = {
+            "name": arguments.get("attendee_name"),
+            "email": arguments.get("attendee_email"),
+            "chosen_slot": arguments.get("start_time")
+        }
+        if result.get("success"):
+            facts["booking"] = f"booked for {arguments.get('start_time')} (booking id {result.get('booking_id')})"
+        self._remember(session_id, facts)
+
+    async def shutdown(self):
+        tasks = list(self._summarizing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from app.config import get_settings, WORKER_ID
+from app.models import ContactStatus, DispatchJobStatus, DispatchCheckpoint
+from app.services.bulk_sender import bulk_sender, is_retryable
+from app.services.email import email_service, PROVIDER_BATCH_LIMIT
+from app.repositories import campaign_repository
+
+settings = get_settings()
+
+
+class CampaignDispatcher:
+    """
+    Runs campaign sends as background jobs.
+
+    A contact can only join a job through the PENDING -> EMAIL_QUEUED
+    transition, which the repository performs atomically when the job is
+    created, so two jobs can never claim the same contact. A contact leaves
+    EMAIL_QUEUED either as EMAIL_SENT or, when the provider rejects it with a
+    4xx other than 429, back to PENDING. Contacts whose outcome is unknown
+    (a timeout, retries exhausted on 429/5xx, or in flight when the process
+    stopped) stay EMAIL_QUEUED and are reported as in doubt instead of being
+    sent again, until an operator settles them with `resolve_in_doubt`.
+    Every request to the provider carries an idempotency key (per contact
+    for single sends), so retrying a 429 or 5xx cannot deliver twice.
+
+    When several workers share the store, a job only runs on the worker
+    holding its lease. Leases are renewed by `heartbeat`; a job whose owner
+    stops renewing is adopted by another worker. Each contact is claimed
+    with an atomic QUEUED -> SENDING checkpoint before it is sent.
+    """
+
+    def __init__(self):
+        self.campaigns = campaign_repository
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # job id -> (monotonic start of the current run, contacts processed before it)
+        self._run_clock: Dict[str, tuple] = {}
+
+    def create_job(self, campaign_id: str, contact_ids: List[str]) -> Optional[Dict[str, Any]]:
+        """Claim the pending contacts for a new job, or return None if none are pending"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "campaign_id": campaign_id,
+            "status": DispatchJobStatus.QUEUED.value,
+            "total": 0,
+            "sent": 0,
+            "failed": 0,
+            "in_doubt": 0,
+            "error": None,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "owner": WORKER_ID,
+            "lease_until": time.time() + settings.worker_lease_seconds
+        }
+        if not self.campaigns.create_job(job, contact_ids):
+            return None
+        return self.campaigns.get_job(job["id"])
+
+    def start(self, job_id: str):
+        """Run a job in the background"""
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a specific job"""
+        return self.campaigns.get_job(job_id)
+
+    def get_campaign_jobs(self, campaign_id: str) -> List[Dict[str, Any]]:
+        """Get all jobs for a campaign"""
+        return self.campaigns.get_campaign_jobs(campaign_id)
+
+    async def _run(self, job_id: str):
+        """Run a job, forgetting its task however the run ends"""
+        try:
+            await self._send_job(job_id)
+        finally:
+            self._tasks.pop(job_id, None)
+            self._run_clock.pop(job_id, None)
+
+    async def _send_job(self, job_id: str):
+        """Send every queued contact of a job, checkpointing each one"""
+        job = self.campaigns.get_job(job_id)
+        if not job:
+            # Deleted along with its campaign
+            return
+        campaign = self.campaigns.get_campaign(job["campaign_id"], include_contacts=False)
+        if not campaign:
+            self._finish(job_id, DispatchJobStatus.FAILED.value, "Campaign no longer exists")
+            return
+
+        self.campaigns.update_job(job_id, {
+            "status": DispatchJobStatus.RUNNING.value,
+            "started_at": job["started_at"] or datetime.now().isoformat()
+        })
+        self._run_clock[job_id] = (time.monotonic(), self._processed(job))
+
+        queued_ids = list(self.campaigns.get_checkpoints(job_id, DispatchCheckpoint.QUEUED.value))
+        contacts = [
+            c for c in self.campaigns.get_contacts(campaign["id"], queued_ids)
+            if c["status"] == ContactStatus.EMAIL_QUEUED.value
+        ]
+
+        # Contacts this run has moved to SENDING; retries must not claim them again
+        claimed = set()
+
+        def claim(contact: Dict[str, Any]) -> bool:
+            if contact["id"] not in claimed:
+                if not self.campaigns.set_checkpoint(
+                    job_id, contact["id"], DispatchCheckpoint.SENDING.value,
+                    expected=DispatchCheckpoint.QUEUED.value
+                ):
+                    return False
+                claimed.add(contact["id"])
+            return True
+
+        def call_link(contact: Dict[str, Any]) -> str:
+            return f"{settings.frontend_url}/call/{campaign['id']}/{contact['call_token']}"
+
+        def contact_key(contact: Dict[str, Any]) -> str:
+            # A 5xx may come after the provider took the email, so every retry of it reuses this key
+            return f"campaign-{job_id}-{contact['id']}"
+
+        async def send_one(contact: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            if not claim(contact):
+                return None
+            return await email_service.send_campaign_email(
+                to_email=contact["email"],
+                to_name=contact["name"],
+                subject=campaign["email_subject"],
+                campaign_name=campaign["name"],
+                call_link=call_link(contact),
+                custom_template=campaign.get("email_template") or "",
+                company=contact.get("company") or "",
+                idempotency_key=contact_key(contact)
+            )
+
+        async def send_batch(batch: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+            to_send = [contact for contact in batch if claim(contact)]
+            if not to_send:
+                return [None] * len(batch)
+            # The same contacts always produce the same key, so a retried request is not delivered twice
+            ids = ",".join(contact["id"] for contact in to_send)
+            idempotency_key = f"campaign-{job_id}-{hashlib.sha1(ids.encode()).hexdigest()}"
+            sent = await email_service.send_campaign_batch(
+                recipients=[
+                    {
+                        "name": contact["name"],
+                        "email": contact["email"],
+                        "company": contact.get("company") or "",
+                        "call_link": call_link(contact)
+                    }
+                    for contact in to_send
+                ],
+                subject=campaign["email_subject"],
+                campaign_name=campaign["name"],
+                custom_template=campaign.get("email_template") or "",
+                idempotency_key=idempotency_key,
+                throttle=bulk_sender.bucket.acquire,
+                # Emails sent one by one are keyed by contact, so they stay the same whatever batch they were in
+                message_keys=[contact_key(contact) for contact in to_send]
+            )
+            by_id = {contact["id"]: result for contact, result in zip(to_send, sent)}
+            return [by_id.get(contact["id"]) for contact in batch]
+
+        def on_result(contact: Dict[str, Any], result: Dict[str, Any]):
+            queued = ContactStatus.EMAIL_QUEUED.value
+            sending = DispatchCheckpoint.SENDING.value
+            if result.get("skipped"):
+                return
+            if result["success"]:
+                self.campaigns.set_contact_status(
+                    campaign["id"], contact["id"], ContactStatus.EMAIL_SENT.value, expected=queued
+                )
+                # A worker that adopted the job may already have marked this one in doubt
+                self.campaigns.set_checkpoint(job_id, contact["id"], DispatchCheckpoint.SENT.value, expected=sending)
+            elif result.get("status_code") is not None and not is_retryable(result):
+                # The provider rejected it, so the contact can be picked up again later
+                self.campaigns.set_contact_status(
+                    campaign["id"], contact["id"], ContactStatus.PENDING.value, expected=queued
+                )
+                self.campaigns.set_checkpoint(
+                    job_id, contact["id"], DispatchCheckpoint.FAILED.value,
+                    error=result["error"], expected=sending
+                )
+            else:
+                # A timeout or exhausted 429/5xx retries: the email may have gone out,
+                # so the contact stays queued until an operator resolves it
+                self.campaigns.set_checkpoint(
+                    job_id, contact["id"], DispatchCheckpoint.IN_DOUBT.value,
+                    error=result["error"], expected=sending
+                )
+
+        try:
+            batch_size = min(settings.email_batch_size, PROVIDER_BATCH_LIMIT)
+            if batch_size > 1:
+                await bulk_sender.send_batches(contacts, send_batch, batch_size, on_result=on_result)
+            else:
+                await bulk_sender.send(contacts, send_one, on_result=on_result)
+            self._finish(job_id, DispatchJobStatus.COMPLETED.value)
+        except asyncio.CancelledError:
+            # Leave the job running so it is resumed on the next start
+            raise
+        except Exception as e:
+            print(f"Dispatch job {job_id} failed: {e}")
+            self._finish(job_id, DispatchJobStatus.FAILED.value, str(e))
+
+        self.campaigns.update_campaign(campaign["id"], {"updated_at": datetime.now().isoformat()})
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None):
+        self.campaigns.update_job(job_id, {
+            "status": status,
+            "error": error,
+            "finished_at": datetime.now().isoformat()
+        })
+
+    @staticmethod
+    def _processed(job: Dict[str, Any]) -> int:
+        """Contacts a job has finished with, including those left in doubt"""
+        return job["sent"] + job["failed"] + job["in_doubt"]
+
+    def get_progress(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Get job progress with throughput and ETA"""
+        processed = self._processed(job)
+        remaining = job["total"] - processed
+
+        throughput = 0.0
+        clock = self._run_clock.get(job["id"])
+        if clock and job["status"] == DispatchJobStatus.RUNNING.value:
+            started, processed_before = clock
+            elapsed = time.monotonic() - started
+            done_this_run = processed - processed_before
+            if elapsed > 0:
+                throughput = done_this_run / elapsed
+        elif job["status"] == DispatchJobStatus.RUNNING.value and job["started_at"]:
+            # Running on another worker: estimate from the stored start time
+            elapsed = (datetime.now() - datetime.fromisoformat(job["started_at"])).total_seconds()
+            if elapsed > 0:
+                throughput = processed / elapsed
+
+        eta_seconds = None
+        if remaining == 0:
+            eta_seconds = 0.0
+        elif throughput > 0:
+            eta_seconds = round(remaining / throughput, 1)
+
+        return {
+            "job_id": job["id"],
+            "campaign_id": job["campaign_id"],
+            "status": job["status"],
+            "total": job["total"],
+            "sent": job["sent"],
+            "failed": job["failed"],
+            "in_doubt": job["in_doubt"],
+            "remaining": remaining,
+            "throughput_per_second": round(throughput, 2),
+            "eta_seconds": eta_seconds,
+            "error": job["error"],
+            "errors": job["errors"] or None,
+            "worker": job.get("owner"),
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"]
+        }
+
+    def resolve_in_doubt(self, job_id: str, delivered: bool, contact_ids: Optional[List[str]] = None) -> List[str]:
+        """
+        Record an operator's verdict on a job's in doubt contacts (all of them
+        unless `contact_ids` is given): delivered ones become EMAIL_SENT, the
+        rest go back to PENDING to be sent again. Returns the resolved ids.
+        """
+        job = self.campaigns.get_job(job_id)
+        if not job:
+            return []
+        in_doubt = DispatchCheckpoint.IN_DOUBT.value
+        candidates = self.campaigns.get_checkpoints(job_id, in_doubt)
+        if contact_ids is not None:
+            candidates = [contact_id for contact_id in contact_ids if contact_id in candidates]
+
+        outcome = DispatchCheckpoint.SENT.value if delivered else DispatchCheckpoint.FAILED.value
+        status = ContactStatus.EMAIL_SENT.value if delivered else ContactStatus.PENDING.value
+        resolved = []
+        for contact_id in candidates:
+            # Moving the checkpoint first means each contact is only resolved once
+            if not self.campaigns.set_checkpoint(job_id, contact_id, outcome, expected=in_doubt):
+                continue
+            self.campaigns.set_contact_status(
+                job["campaign_id"], contact_id, status, expected=ContactStatus.EMAIL_QUEUED.value
+            )
+            resolved.append(contact_id)
+        return resolved
+
+    def resume_interrupted(self):
+        """Restart unfinished jobs that no live worker holds a lease on"""
+        for job in self.campaigns.get_unfinished_jobs():
+            if job["id"] in self._tasks:
+                continue
+            if not self.campaigns.acquire_job(job["id"], WORKER_ID, settings.worker_lease_seconds):
+                continue
+
+            # Anything that was in flight may already have been delivered
+            sending = DispatchCheckpoint.SENDING.value
+            for contact_id in self.campaigns.get_checkpoints(job["id"], sending):
+                self.campaigns.set_checkpoint(
+                    job["id"], contact_id, DispatchCheckpoint.IN_DOUBT.value, expected=sending
+                )
+
+            self.start(job["id"])
+
+    def heartbeat(self):
+        """Renew the leases on this worker's jobs and adopt jobs whose owner went away"""
+        for job_id, task in list(self._tasks.items()):
+            if not self.campaigns.acquire_job(job_id, WORKER_ID, settings.worker_lease_seconds):
+                print(f"Dispatch job {job_id} was taken over by another worker")
+                task.cancel()
+        self.resume_interrupted()
+
+    async def shutdown(self):
+        """Stop running jobs and release their leases so another worker can resume them"""
+        job_ids = list(self._tasks)
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job_id in job_ids:
+            self.campaigns.update_job(job_id, {"owner": None, "lease_until": None})
+
+
+campaign_dispatcher = CampaignDispatcher()
@@ -1,19 +1,470 @@
-import resend
-from typing import Dict, Any, Optional
+import asyncio
+import html
+import re
+import httpx
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Callable, Awaitable
 from datetime import datetime
 from app.config import get_settings
+from app.services.templates import template_engine, CompiledTemplate, SafeHTML
+from app.services.bulk_sender import is_retryable
 
 settings = get_settings()
 
-# Initialize Resend
-resend.api_key = settings.resend_api_key
+# Most emails the provider accepts in one batch request
+PROVIDER_BATCH_LIMIT = 100
+
+# Variables a campaign's email_subject and email_template can use
+CAMPAIGN_VARIABLES = ("name", "first_name", "email", "company", "campaign_name", "call_link")
+
+TAG_PATTERN = re.compile(r"<[A-Za-z/!][^>]*>")
+# Tags that end a line when HTML is turned into plain text
+LINE_BREAK_PATTERN = re.compile(r"<br\s*/?>|</(?:p|div|h[1-6]|li|tr|table|ul|ol)>", re.IGNORECASE)
+
+CAMPAIGN_HTML = template_engine.compile("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }
+        .container { max-width: 600px; margin: 0 auto; }
+        .header { background: #000; color: #fff; padding: 40px 20px; text-align: center; }
+        .header h1 { margin: 0; font-size: 28px; }
+        .content { padding: 40px 20px; background: #fff; }
+        .cta-section { text-align: center; margin: 30px 0; }
+        .cta-button {
+            display: inline-block;
+            background: #000;
+            color: #fff !important;
+            padding: 16px 40px;
+            text-decoration: none;
+            border-radius: 8px;
+            font-size: 18px;
+            font-weight: bold;
+        }
+        .cta-button:hover { background: #333; }
+        .features { background: #f9f9f9; padding: 30px 20px; }
+        .feature-item { padding: 10px 0; }
+        .feature-item::before { content: "✓ "; color: #22c55e; font-weight: bold; }
+        .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; background: #f9f9f9; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🎯 Exclusive Opportunity</h1>
+        </div>
+        <div class="content">
+            {{ body }}
+
+            <div class="cta-section">
+                <a href="{{ call_link }}" class="cta-button">🎤 Start AI Call Now</a>
+            </div>
+
+            <p style="text-align: center; color: #666; font-size: 14px;">
+                Takes less than 5 minutes • Available 24/7 • No obligation
+            </p>
+        </div>
+
+        <div class="features">
+            <p style="font-weight: bold; margin-bottom: 15px;">What you'll discover:</p>
+            <div class="feature-item">Personalized recommendations for your needs</div>
+            <div class="feature-item">Instant answers to all your questions</div>
+            <div class="feature-item">Option to book a demo with our team</div>
+            <div class="feature-item">Exclusive offers available only through this call</div>
+        </div>
+
+        <div class="footer">
+            <p>This email was sent as part of the {{ campaign_name }} campaign.</p>
+            <p>If you no longer wish to receive these emails, simply ignore this message.</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+DEFAULT_CAMPAIGN_BODY = """
+<p>Hi {{ name }},</p>
+
+<p>We have something special for you! Our team has identified that you could benefit greatly from what we have to offer.</p>
+
+<p>Instead of reading through pages of information, <strong>speak directly with our AI assistant</strong> who can answer all your questions instantly and help you find the perfect solution.</p>
+"""
+
+CAMPAIGN_TEXT = template_engine.compile("""
+{{ body }}
+
+Start your AI call now: {{ call_link }}
+
+Takes less than 5 minutes • Available 24/7 • No obligation
+
+What you'll discover:
+✓ Personalized recommendations for your needs
+✓ Instant answers to all your questions
+✓ Option to book a demo with our team
+✓ Exclusive offers available only through this call
+
+---
+This email was sent as part of the {{ campaign_name }} campaign.
+""", escape_html=False)
+
+CONFIRMATION_HTML = template_engine.compile("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: #000; color: #fff; padding: 20px; text-align: center; }
+        .content { padding: 20px; background: #f9f9f9; }
+        .meeting-details { background: #fff; padding: 20px; border-radius: 8px; margin: 20px 0; }
+        .detail-row { padding: 10px 0; border-bottom: 1px solid #eee; }
+        .detail-label { font-weight: bold; color: #666; }
+        .button { display: inline-block; background: #000; color: #fff; padding: 12px 24px; text-decoration: none; border-radius: 6px; margin: 10px 5px 10px 0; }
+        .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Meeting Confirmed! ✓</h1>
+        </div>
+        <div class="content">
+            <p>Hi {{ attendee_name }},</p>
+            <p>Your meeting has been successfully scheduled. Here are the details:</p>
+
+            <div class="meeting-details">
+                <div class="detail-row">
+                    <span class="detail-label">Meeting:</span><br>
+                    {{ meeting_title }}
+                </div>
+                <div class="detail-row">
+                    <span class="detail-label">When:</span><br>
+                    {{ formatted_time }}
+                </div>
+                {{ notes_section }}
+            </div>
+
+            <div style="text-align: center;">
+                {{ meeting_button }}
+                {{ calendar_button }}
+            </div>
+
+            <p>A calendar invite has also been sent to your email.</p>
+            <p>We look forward to speaking with you!</p>
+        </div>
+        <div class="footer">
+            <p>This email was sent by Voice Agent AI</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+CONFIRMATION_NOTES_HTML = template_engine.compile(
+    '<div class="detail-row"><span class="detail-label">Notes:</span><br>{{ notes }}</div>'
+)
+CONFIRMATION_MEETING_BUTTON_HTML = template_engine.compile(
+    '<a href="{{ meeting_link }}" class="button">Join Meeting</a>'
+)
+CONFIRMATION_CALENDAR_BUTTON_HTML = template_engine.compile(
+    '<a href="{{ calendar_link }}" class="button" style="background: #4285f4;">View in Calendar</a>'
+)
+
+CONFIRMATION_TEXT = template_engine.compile("""
+Meeting Confirmed!
+
+Hi {{ attendee_name }},
+
+Your meeting has been successfully scheduled.
+
+Meeting: {{ meeting_title }}
+When: {{ formatted_time }}
+{{ notes_line }}
+
+{{ meeting_line }}
+{{ calendar_line }}
+
+A calendar invite has also been sent to your email.
+
+We look forward to speaking with you!
+""", escape_html=False)
+
+CANCELLATION_HTML = template_engine.compile("""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: #dc2626; color: #fff; padding: 20px; text-align: center; }
+        .content { padding: 20px; background: #f9f9f9; }
+        .meeting-details { background: #fff; padding: 20px; border-radius: 8px; margin: 20px 0; }
+        .footer { text-align: center; padding: 20px; color: #666; font-size: 12px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Meeting Cancelled</h1>
+        </div>
+        <div class="content">
+            <p>Hi {{ attendee_name }},</p>
+            <p>Your meeting has been cancelled.</p>
+
+            <div class="meeting-details">
+                <p><strong>Meeting:</strong> {{ meeting_title }}</p>
+                <p><strong>Originally scheduled for:</strong> {{ formatted_time }}</p>
+                {{ reason_section }}
+            </div>
+
+            <p>If you'd like to reschedule, please contact us.</p>
+        </div>
+        <div class="footer">
+            <p>This email was sent by Voice Agent AI</p>
+        </div>
+    </div>
+</body>
+</html>
+""")
+
+CANCELLATION_REASON_HTML = template_engine.compile("<p><strong>Reason:</strong> {{ reason }}</p>")
+
+
+@lru_cache(maxsize=256)
+def campaign_body_templates(email_template: str) -> Tuple[CompiledTemplate, CompiledTemplate]:
+    """
+    Compile a campaign's body into (html, text) templates.
+
+    An empty template falls back to the default pitch. A template without
+    HTML tags is treated as plain text: it is escaped and its blank-line
+    separated paragraphs become <p> elements.
+    """
+    source = email_template.strip() or DEFAULT_CAMPAIGN_BODY
+    if TAG_PATTERN.search(source):
+        html_source = source
+        text_source = html.unescape(TAG_PATTERN.sub("", LINE_BREAK_PATTERN.sub("\n", source)))
+    else:
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", source) if p.strip()]
+        html_source = "\n".join(
+            f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs
+        )
+        text_source = source
+    text_source = re.sub(r"\n{3,}", "\n\n", text_source.strip())
+    return template_engine.compile(html_source), template_engine.compile(text_source, escape_html=False)
+
+
+def campaign_context(recipient: Dict[str, Any], campaign_name: str) -> Dict[str, Any]:
+    """Build the template variables for one campaign recipient"""
+    name = recipient.get("name") or ""
+    return {
+        "name": name,
+        "first_name": name.split()[0] if name.split() else "",
+        "email": recipient.get("email") or "",
+        "company": recipient.get("company") or "",
+        "campaign_name": campaign_name,
+        "call_link": recipient.get("call_link") or ""
+    }
+
+
+def format_meeting_time(meeting_time: str) -> str:
+    """Format an ISO meeting time for an email, or return it unchanged"""
+    try:
+        dt = datetime.fromisoformat(meeting_time.replace('Z', '+00:00'))
+        return dt.strftime("%A, %B %d, %Y at %I:%M %p")
+    except (ValueError, AttributeError):
+        return meeting_time
+
+
+class ResendError(Exception):
+    """An error response from the Resend API"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
 
 
 class EmailService:
     """Service for sending emails using Resend"""
-    
+
     def __init__(self):
         self.from_email = settings.email_from
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use in the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=settings.resend_api_url,
+                headers={"Authorization": f"Bearer {settings.resend_api_key}"} if settings.resend_api_key else None,
+                timeout=httpx.Timeout(settings.email_timeout_seconds, connect=settings.email_connect_timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=settings.email_max_connections,
+                    max_keepalive_connections=settings.email_max_connections
+                )
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+    async def _post(self, path: str, payload: Any, headers: Optional[Dict[str, str]] = None) -> Any:
+        """POST to the Resend API, raising ResendError with the HTTP status on failure"""
+        try:
+            response = await self._get_client().post(path, json=payload, headers=headers)
+        except httpx.TimeoutException as e:
+            raise ResendError(f"Resend request timed out: {e!r}")
+        except httpx.HTTPError as e:
+            raise ResendError(f"Resend request failed: {e!r}")
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message") or response.text
+            except ValueError:
+                message = response.text
+            raise ResendError(message, response.status_code)
+        return response.json()
+
+    async def _send(self, params: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send one email through Resend"""
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        return await self._post("/emails", params, headers)
+    
+    async def _send_batch(self, params: List[Dict[str, Any]], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send a batch through Resend, reporting invalid emails individually instead of failing the batch"""
+        headers = {"x-batch-validation": "permissive"}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        return await self._post("/emails/batch", params, headers)
+    
+    async def _send_one(self, params: Dict[str, Any], idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send a single email and return a result instead of raising"""
+        try:
+            response = await self._send(params, idempotency_key)
+            return {'success': True, 'email_id': response.get('id')}
+        except Exception as e:
+            print(f"Email send error: {e}")
+            return self._error_result(e)
+
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        """Build a failure result, keeping the provider's HTTP status for retries"""
+        status_code = getattr(error, 'code', None)
+        try:
+            status_code = int(status_code) if status_code is not None else None
+        except (TypeError, ValueError):
+            status_code = None
+        return {
+            'success': False,
+            'error': str(error),
+            'status_code': status_code
+        }
+
+    def render_campaign_emails(
+        self,
+        subject: str,
+        campaign_name: str,
+        recipients: List[Dict[str, Any]],
+        custom_template: str = ""
+    ) -> List[Dict[str, str]]:
+        """
+        Render the subject, html and text of a campaign email for each recipient.
+
+        Recipients are dicts with name, email, company and call_link. The
+        templates are compiled once per distinct subject and body, so each
+        recipient only costs the variable substitution.
+        """
+        subject_template = template_engine.compile(subject, escape_html=False)
+        body_html, body_text = campaign_body_templates(custom_template or "")
+
+        rendered = []
+        for recipient in recipients:
+            context = campaign_context(recipient, campaign_name)
+            rendered.append({
+                "subject": subject_template.render(context),
+                "html": CAMPAIGN_HTML.render({**context, "body": SafeHTML(body_html.render(context))}),
+                "text": CAMPAIGN_TEXT.render({**context, "body": body_text.render(context)})
+            })
+        return rendered
+
+    async def send_batch(
+        self,
+        messages: List[Dict[str, Any]],
+        idempotency_key: Optional[str] = None,
+        throttle: Optional[Callable[[], Awaitable[Any]]] = None,
+        message_keys: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Send up to PROVIDER_BATCH_LIMIT emails in one request and return a result per message.
+
+        Messages are Resend params without "from". Messages the provider
+        rejects individually, or all of them when it definitely rejects the
+        whole request (a 4xx other than 429), are sent again one by one,
+        each under its key from `message_keys` (or one derived from
+        `idempotency_key` and its position); `throttle` is awaited before
+        each of those requests. Any other failure of the whole request (rate
+        limit, server error, or a timeout or transport error that leaves
+        the outcome unknown) is returned for every message so the caller
+        can retry the batch with the same key.
+        """
+        if len(messages) > PROVIDER_BATCH_LIMIT:
+            raise ValueError(f"A batch holds at most {PROVIDER_BATCH_LIMIT} emails")
+        params = [{"from": self.from_email, **message} for message in messages]
+
+        try:
+            response = await self._send_batch(params, idempotency_key)
+        except Exception as e:
+            error = self._error_result(e)
+            if error["status_code"] is None or is_retryable(error):
+                # The provider may have accepted the batch; only a retry with the same key is safe
+                print(f"Batch email send error: {e}")
+                return [dict(error) for _ in params]
+            print(f"Batch rejected ({e}), sending {len(params)} emails individually")
+            response = {"data": [], "errors": [{"index": i} for i in range(len(params))]}
+
+        # Permissive mode returns ids for the accepted emails in order, plus errors by index
+        rejected = {error["index"] for error in response.get("errors") or []}
+        email_ids = iter(response.get("data") or [])
+
+        results: List[Dict[str, Any]] = []
+        for index, message_params in enumerate(params):
+            if index not in rejected:
+                results.append({'success': True, 'email_id': next(email_ids, {}).get('id')})
+                continue
+            if throttle:
+                await throttle()
+            if message_keys:
+                key = message_keys[index]
+            else:
+                key = f"{idempotency_key}-{index}" if idempotency_key else None
+            results.append(await self._send_one(message_params, key))
+        return results
+    
+    async def send_campaign_batch(
+        self,
+        recipients: List[Dict[str, Any]],
+        subject: str,
+        campaign_name: str,
+        custom_template: str = "",
+        idempotency_key: Optional[str] = None,
+        throttle: Optional[Callable[[], Awaitable[Any]]] = None,
+        message_keys: Optional[List[Optional[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Render and send campaign emails to a batch of recipients, returning a result per recipient"""
+        rendered = self.render_campaign_emails(subject, campaign_name, recipients, custom_template)
+        messages = [
+            {"to": [recipient["email"]], **email}
+            for recipient, email in zip(recipients, rendered)
+        ]
+        return await self.send_batch(
+            messages, idempotency_key=idempotency_key, throttle=throttle, message_keys=message_keys
+        )
     
     async def send_meeting_confirmation(
         self,
@@ -23,89 +474,34 @@ class EmailService:
         meeting_time: str,
         meeting_link: str = "",
         calendar_link: str = "",
-        notes: str = ""
+        notes: str = "",
+        idempotency_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Send meeting confirmation email"""
+        """Send meeting confirmation email; retries with the same `idempotency_key` are delivered once"""
         try:
-            # Parse and format the meeting time
-            try:
-                dt = datetime.fromisoformat(meeting_time.replace('Z', '+00:00'))
-                formatted_time = dt.strftime("%A, %B %d, %Y at %I:%M %p")
-            except:
-                formatted_time = meeting_time
-            
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: #000; color: #fff; padding: 20px; text-align: center; }}
-                    .content {{ padding: 20px; background: #f9f9f9; }}
-                    .meeting-details {{ background: #fff; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-                    .detail-row {{ padding: 10px 0; border-bottom: 1px solid #eee; }}
-                    .detail-label {{ font-weight: bold; color: #666; }}
-                    .button {{ display: inline-block; background: #000; color: #fff; padding: 12px 24px; text-decoration: none; border-radius: 6px; margin: 10px 5px 10px 0; }}
-                    .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Meeting Confirmed! ✓</h1>
-                    </div>
-                    <div class="content">
-                        <p>Hi {attendee_name},</p>
-                        <p>Your meeting has been successfully scheduled. Here are the details:</p>
-                        
-                        <div class="meeting-details">
-                            <div class="detail-row">
-                                <span class="detail-label">Meeting:</span><br>
-                                {meeting_title}
-                            </div>
-                            <div class="detail-row">
-                                <span class="detail-label">When:</span><br>
-                                {formatted_time}
-                            </div>
-                            {f'<div class="detail-row"><span class="detail-label">Notes:</span><br>{notes}</div>' if notes else ''}
-                        </div>
-                        
-                        <div style="text-align: center;">
-                            {f'<a href="{meeting_link}" class="button">Join Meeting</a>' if meeting_link else ''}
-                            {f'<a href="{calendar_link}" class="button" style="background: #4285f4;">View in Calendar</a>' if calendar_link else ''}
-                        </div>
-                        
-                        <p>A calendar invite has also been sent to your email.</p>
-                        <p>We look forward to speaking with you!</p>
-                    </div>
-                    <div class="footer">
-                        <p>This email was sent by Voice Agent AI</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            text_content = f"""
-Meeting Confirmed!
-
-Hi {attendee_name},
-
-Your meeting has been successfully scheduled.
+            context = {
+                "attendee_name": attendee_name,
+                "meeting_title": meeting_title,
+                "formatted_time": format_meeting_time(meeting_time),
+                "notes": notes,
+                "meeting_link": meeting_link,
+                "calendar_link": calendar_link
+            }
 
-Meeting: {meeting_title}
-When: {formatted_time}
-{f'Notes: {notes}' if notes else ''}
+            html_content = CONFIRMATION_HTML.render({
+                **context,
+                "notes_section": SafeHTML(CONFIRMATION_NOTES_HTML.render(context) if notes else ""),
+                "meeting_button": SafeHTML(CONFIRMATION_MEETING_BUTTON_HTML.render(context) if meeting_link else ""),
+                "calendar_button": SafeHTML(CONFIRMATION_CALENDAR_BUTTON_HTML.render(context) if calendar_link else "")
+            })
 
-{f'Join Meeting: {meeting_link}' if meeting_link else ''}
-{f'View in Calendar: {calendar_link}' if calendar_link else ''}
+            text_content = CONFIRMATION_TEXT.render({
+                **context,
+                "notes_line": f"Notes: {notes}" if notes else "",
+                "meeting_line": f"Join Meeting: {meeting_link}" if meeting_link else "",
+                "calendar_line": f"View in Calendar: {calendar_link}" if calendar_link else ""
+            })
 
-A calendar invite has also been sent to your email.
-
-We look forward to speaking with you!
-            """
-            
             params = {
                 "from": self.from_email,
                 "to": [to_email],
@@ -113,22 +509,19 @@ We look forward to speaking with you!
                 "html": html_content,
                 "text": text_content
             }
-            
-            response = resend.Emails.send(params)
-            
+
+            response = await self._send(params, idempotency_key)
+
             return {
                 'success': True,
                 'email_id': response.get('id'),
                 'message': 'Confirmation email sent'
             }
-            
+
         except Exception as e:
             print(f"Email send error: {e}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
+            return self._error_result(e)
+
     async def send_campaign_email(
         self,
         to_email: str,
@@ -136,120 +529,39 @@ We look forward to speaking with you!
         subject: str,
         campaign_name: str,
         call_link: str,
-        custom_template: str = ""
+        custom_template: str = "",
+        company: str = "",
+        idempotency_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Send campaign email with AI call link"""
+        """Send campaign email with AI call link; retries with the same `idempotency_key` are delivered once"""
         try:
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
-                    .container {{ max-width: 600px; margin: 0 auto; }}
-                    .header {{ background: #000; color: #fff; padding: 40px 20px; text-align: center; }}
-                    .header h1 {{ margin: 0; font-size: 28px; }}
-                    .content {{ padding: 40px 20px; background: #fff; }}
-                    .cta-section {{ text-align: center; margin: 30px 0; }}
-                    .cta-button {{ 
-                        display: inline-block; 
-                        background: #000; 
-                        color: #fff !important; 
-                        padding: 16px 40px; 
-                        text-decoration: none; 
-                        border-radius: 8px; 
-                        font-size: 18px;
-                        font-weight: bold;
-                    }}
-                    .cta-button:hover {{ background: #333; }}
-                    .features {{ background: #f9f9f9; padding: 30px 20px; }}
-                    .feature-item {{ padding: 10px 0; }}
-                    .feature-item::before {{ content: "✓ "; color: #22c55e; font-weight: bold; }}
-                    .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; background: #f9f9f9; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>🎯 Exclusive Opportunity</h1>
-                    </div>
-                    <div class="content">
-                        <p>Hi {to_name},</p>
-                        
-                        <p>We have something special for you! Our team has identified that you could benefit greatly from what we have to offer.</p>
-                        
-                        <p>Instead of reading through pages of information, <strong>speak directly with our AI assistant</strong> who can answer all your questions instantly and help you find the perfect solution.</p>
-                        
-                        <div class="cta-section">
-                            <a href="{call_link}" class="cta-button">🎤 Start AI Call Now</a>
-                        </div>
-                        
-                        <p style="text-align: center; color: #666; font-size: 14px;">
-                            Takes less than 5 minutes • Available 24/7 • No obligation
-                        </p>
-                    </div>
-                    
-                    <div class="features">
-                        <p style="font-weight: bold; margin-bottom: 15px;">What you'll discover:</p>
-                        <div class="feature-item">Personalized recommendations for your needs</div>
-                        <div class="feature-item">Instant answers to all your questions</div>
-                        <div class="feature-item">Option to book a demo with our team</div>
-                        <div class="feature-item">Exclusive offers available only through this call</div>
-                    </div>
-                    
-                    <div class="footer">
-                        <p>This email was sent as part of the {campaign_name} campaign.</p>
-                        <p>If you no longer wish to receive these emails, simply ignore this message.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            text_content = f"""
-Hi {to_name},
-
-We have something special for you!
-
-Instead of reading through pages of information, speak directly with our AI assistant who can answer all your questions instantly.
-
-Start your AI call now: {call_link}
-
-Takes less than 5 minutes • Available 24/7 • No obligation
+            email = self.render_campaign_emails(
+                subject,
+                campaign_name,
+                [{"name": to_name, "email": to_email, "company": company, "call_link": call_link}],
+                custom_template
+            )[0]
 
-What you'll discover:
-✓ Personalized recommendations for your needs
-✓ Instant answers to all your questions
-✓ Option to book a demo with our team
-✓ Exclusive offers available only through this call
-
----
-This email was sent as part of the {campaign_name} campaign.
-            """
-            
             params = {
                 "from": self.from_email,
                 "to": [to_email],
-                "subject": subject,
-                "html": html_content,
-                "text": text_content
+                "subject": email["subject"],
+                "html": email["html"],
+                "text": email["text"]
             }
-            
-            response = resend.Emails.send(params)
-            
+
+            response = await self._send(params, idempotency_key)
+
             return {
                 'success': True,
                 'email_id': response.get('id'),
                 'message': 'Campaign email sent'
             }
-            
+
         except Exception as e:
             print(f"Campaign email send error: {e}")
-            return {
-                'success': False,
-                'error': str(e)
-            }
-    
+            return self._error_result(e)
+
     async def send_meeting_cancellation(
         self,
         to_email: str,
@@ -260,66 +572,32 @@ This email was sent as part of the {campaign_name} campaign.
     ) -> Dict[str, Any]:
         """Send meeting cancellation email"""
         try:
-            # Parse and format the meeting time
-            try:
-                dt = datetime.fromisoformat(meeting_time.replace('Z', '+00:00'))
-                formatted_time = dt.strftime("%A, %B %d, %Y at %I:%M %p")
-            except:
-                formatted_time = meeting_time
-            
-            html_content = f"""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <style>
-                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                    .header {{ background: #dc2626; color: #fff; padding: 20px; text-align: center; }}
-                    .content {{ padding: 20px; background: #f9f9f9; }}
-                    .meeting-details {{ background: #fff; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-                    .footer {{ text-align: center; padding: 20px; color: #666; font-size: 12px; }}
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="header">
-                        <h1>Meeting Cancelled</h1>
-                    </div>
-                    <div class="content">
-                        <p>Hi {attendee_name},</p>
-                        <p>Your meeting has been cancelled.</p>
-                        
-                        <div class="meeting-details">
-                            <p><strong>Meeting:</strong> {meeting_title}</p>
-                            <p><strong>Originally scheduled for:</strong> {formatted_time}</p>
-                            {f'<p><strong>Reason:</strong> {reason}</p>' if reason else ''}
-                        </div>
-                        
-                        <p>If you'd like to reschedule, please contact us.</p>
-                    </div>
-                    <div class="footer">
-                        <p>This email was sent by Voice Agent AI</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
+            context = {
+                "attendee_name": attendee_name,
+                "meeting_title": meeting_title,
+                "formatted_time": format_meeting_time(meeting_time),
+                "reason": reason
+            }
+            html_content = CANCELLATION_HTML.render({
+                **context,
+                "reason_section": SafeHTML(CANCELLATION_REASON_HTML.render(context) if reason else "")
+            })
+
             params = {
                 "from": self.from_email,
                 "to": [to_email],
                 "subject": f"Meeting Cancelled: {meeting_title}",
                 "html": html_content
             }
-            
-            response = resend.Emails.send(params)
-            
+
+            response = await self._send(params)
+
             return {
                 'success': True,
                 'email_id': response.get('id'),
                 'message': 'Cancellation email sent'
             }
-            
+
         except Exception as e:
             print(f"Email send error: {e}")
             return {
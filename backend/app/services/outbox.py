@@ -0,0 +1,168 @@
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, List, Any, Optional
+from datetime import datetime
+from app.config import get_settings, WORKER_ID
+from app.models import OutboxStatus
+from app.services.bulk_sender import is_retryable
+from app.services.email import email_service
+from app.repositories import outbox_repository
+
+settings = get_settings()
+
+MEETING_CONFIRMATION = "meeting_confirmation"
+
+# Message kind -> coroutine delivering its payload; each takes the dedupe key as idempotency_key
+OUTBOX_HANDLERS = {
+    MEETING_CONFIRMATION: email_service.send_meeting_confirmation,
+}
+
+
+class EmailOutbox:
+    """
+    Delivers transactional emails in the background.
+
+    Callers enqueue a message and return immediately; a worker loop claims
+    due messages, sends them and records the outcome. Failed sends are
+    retried with exponential backoff. A message is dead-lettered after a
+    permanent provider error (a 4xx other than rate limiting) or once it
+    runs out of attempts, and can be requeued from the API.
+    """
+
+    def __init__(self):
+        self.messages = outbox_repository
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], dedupe_key: str) -> bool:
+        """Queue a message for delivery; returns False if one with the same dedupe key was already queued"""
+        if kind not in OUTBOX_HANDLERS:
+            raise ValueError(f"Unknown outbox message kind: {kind}")
+        stored = self.messages.enqueue({
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "dedupe_key": dedupe_key,
+            "payload": payload,
+            "status": OutboxStatus.PENDING.value,
+            "attempts": 0,
+            "next_attempt_at": time.time(),
+            "last_error": None,
+            "owner": None,
+            "lease_until": None,
+            "created_at": datetime.now().isoformat(),
+            "sent_at": None
+        })
+        if stored and self._wake:
+            self._wake.set()
+        return stored
+
+    def enqueue_meeting_confirmation(
+        self,
+        booking_key: str,
+        to_email: str,
+        attendee_name: str,
+        meeting_title: str,
+        meeting_time: str,
+        meeting_link: str = "",
+        calendar_link: str = "",
+        notes: str = ""
+    ) -> bool:
+        """Queue the confirmation email for a booking; each booking gets at most one"""
+        return self.enqueue(
+            MEETING_CONFIRMATION,
+            {
+                "to_email": to_email,
+                "attendee_name": attendee_name,
+                "meeting_title": meeting_title,
+                "meeting_time": meeting_time,
+                "meeting_link": meeting_link,
+                "calendar_link": calendar_link,
+                "notes": notes
+            },
+            dedupe_key=f"{MEETING_CONFIRMATION}:{booking_key}"
+        )
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(settings.outbox_retry_max_delay, settings.outbox_retry_base_delay * (2 ** (attempts - 1)))
+        return delay + random.uniform(0, delay / 2)
+
+    async def _deliver(self, message: Dict[str, Any]):
+        handler = OUTBOX_HANDLERS.get(message["kind"])
+        if handler is None:
+            self.messages.mark_dead(message["id"], f"Unknown message kind: {message['kind']}")
+            return
+
+        try:
+            result = await handler(**message["payload"], idempotency_key=message["dedupe_key"])
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if result.get("success"):
+            self.messages.mark_sent(message["id"])
+            return
+
+        error = result.get("error") or "Unknown error"
+        permanent = result.get("status_code") is not None and not is_retryable(result)
+        if permanent or message["attempts"] >= settings.outbox_max_attempts:
+            print(f"Outbox message {message['id']} dead-lettered after {message['attempts']} attempts: {error}")
+            self.messages.mark_dead(message["id"], error)
+        else:
+            self.messages.reschedule(message["id"], error, time.time() + self._retry_delay(message["attempts"]))
+
+    async def deliver_due(self) -> int:
+        """Claim and deliver the messages that are due; returns how many were claimed"""
+        # The lease outlives the provider timeout, so a live worker never loses a message mid-send
+        lease_seconds = max(settings.worker_lease_seconds, settings.email_timeout_seconds * 2)
+        messages = self.messages.claim_due(WORKER_ID, lease_seconds, settings.outbox_batch_size)
+        if messages:
+            await asyncio.gather(*(self._deliver(message) for message in messages))
+        return len(messages)
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await self.deliver_due()
+            except Exception as e:
+                print(f"Outbox delivery failed: {e}")
+                claimed = 0
+            if claimed >= settings.outbox_batch_size:
+                # There may be more due right away
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.outbox_poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start the background delivery loop"""
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        """Stop the delivery loop; messages being sent are claimed again after their lease"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._wake = None
+
+    def get_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Get a message"""
+        return self.messages.get_message(message_id)
+
+    def list_messages(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get the newest messages, optionally only those in one status"""
+        return self.messages.list_messages(status, limit)
+
+    def requeue(self, message_id: str) -> bool:
+        """Retry a dead-lettered message"""
+        requeued = self.messages.requeue(message_id)
+        if requeued and self._wake:
+            self._wake.set()
+        return requeued
+
+
+email_outbox = EmailOutbox()
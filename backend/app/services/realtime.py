@@ -1,15 +1,73 @@
 import json
 import asyncio
 import base64
-from typing import Dict, Any, Optional
+import re
+from typing import Dict, List, Any, Optional
 from fastapi import WebSocket, WebSocketDisconnect
 import httpx
-from app.config import get_settings
+from datetime import datetime
+from app.config import get_settings, WORKER_ID
 from app.services.agent import agent_service
+from app.repositories import realtime_session_repository
 from app.services.calcom import CALCOM_TOOLS
 
 settings = get_settings()
 
+# Messages to OpenAI that never change, serialized once
+AUDIO_COMMIT_MESSAGE = json.dumps({"type": "input_audio_buffer.commit"})
+RESPONSE_CREATE_MESSAGE = json.dumps({"type": "response.create"})
+RESPONSE_CANCEL_MESSAGE = json.dumps({"type": "response.cancel"})
+
+# input_audio_buffer.append around the base64 audio; base64 needs no JSON escaping
+AUDIO_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+AUDIO_APPEND_SUFFIX = '"}'
+
+
+# OpenAI events passed on to the client unchanged
+FORWARDED_EVENTS = frozenset({
+    "session.created",
+    "session.updated",
+    "response.audio.delta",
+    "response.audio.done",
+    "response.audio_transcript.delta",
+    "response.audio_transcript.done",
+    "response.text.delta",
+    "response.text.done",
+    "input_audio_buffer.speech_started",
+    "input_audio_buffer.speech_stopped",
+    "conversation.item.input_audio_transcription.completed",
+    "response.done",
+    "error"
+})
+TOOL_CALL_EVENT = "response.function_call_arguments.done"
+KNOWN_EVENTS = FORWARDED_EVENTS | {TOOL_CALL_EVENT}
+
+# An event's "type" sits among its first few fields (after a short event_id), so it is read from
+# the start of the message instead of parsing all of it
+EVENT_TYPE_PATTERN = re.compile(r'"type"\s*:\s*"([^"]+)"')
+EVENT_TYPE_SCAN_CHARS = 200
+
+
+def event_type(message: str) -> str:
+    """
+    The type of an OpenAI event, read from the start of the raw message.
+
+    A nested "type" could come first in principle, so a name that is not
+    one of KNOWN_EVENTS is confirmed by parsing the whole message.
+    """
+    match = EVENT_TYPE_PATTERN.search(message, 0, EVENT_TYPE_SCAN_CHARS)
+    if match and match.group(1) in KNOWN_EVENTS:
+        return match.group(1)
+    try:
+        return json.loads(message).get("type", "")
+    except (ValueError, AttributeError):
+        return ""
+
+
+def audio_append_message(pcm: memoryview) -> str:
+    """input_audio_buffer.append for raw PCM16 bytes, without building and serializing a dict"""
+    return f"{AUDIO_APPEND_PREFIX}{base64.b64encode(pcm).decode('ascii')}{AUDIO_APPEND_SUFFIX}"
+
 
 class RealtimeService:
     """Service for handling OpenAI Realtime API WebSocket connections"""
@@ -19,11 +77,19 @@ class RealtimeService:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.openai_connections: Dict[str, Any] = {}
+        # Shared with the other workers so any of them can tell who owns a call
+        self.sessions = realtime_session_repository
     
-    async def connect_client(self, websocket: WebSocket, session_id: str):
+    async def connect_client(self, websocket: WebSocket, session_id: str, agent_id: str):
         """Accept a new WebSocket connection from client"""
         await websocket.accept()
         self.active_connections[session_id] = websocket
+        self.sessions.register({
+            "id": session_id,
+            "agent_id": agent_id,
+            "owner": WORKER_ID,
+            "started_at": datetime.now().isoformat()
+        })
     
     def disconnect_client(self, session_id: str):
         """Remove a client connection"""
@@ -31,6 +97,24 @@ class RealtimeService:
             del self.active_connections[session_id]
         if session_id in self.openai_connections:
             del self.openai_connections[session_id]
+        self.sessions.unregister(session_id)
+    
+    def get_live_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get a live session on any worker"""
+        return self.sessions.get_session(session_id, settings.worker_lease_seconds)
+    
+    def list_live_sessions(self) -> List[Dict[str, Any]]:
+        """Get the live sessions of every worker"""
+        return self.sessions.list_sessions(settings.worker_lease_seconds)
+    
+    def heartbeat(self):
+        """Keep this worker's sessions from being treated as abandoned"""
+        if self.active_connections:
+            self.sessions.touch_owner(WORKER_ID)
+    
+    def shutdown(self):
+        """Forget this worker's sessions when it stops"""
+        self.sessions.remove_owner(WORKER_ID)
     
     async def handle_realtime_session(
         self, 
@@ -115,10 +199,35 @@ class RealtimeService:
         openai_ws: Any,
         session_id: str
     ):
-        """Forward messages from client to OpenAI"""
+        """
+        Forward messages from client to OpenAI.
+
+        Binary frames are raw PCM16 audio and go straight into an
+        input_audio_buffer.append message; text frames are JSON commands
+        (including base64 audio from older clients).
+        """
+        # The first byte of a sample split across two binary frames waits here for the second
+        carry = b""
         try:
             while True:
-                data = await client_ws.receive_text()
+                frame = await client_ws.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+
+                pcm = frame.get("bytes")
+                if pcm is not None:
+                    if carry:
+                        pcm = carry + pcm
+                    view = memoryview(pcm)
+                    whole = len(view) & ~1
+                    carry = bytes(view[whole:])
+                    if whole:
+                        await openai_ws.send(audio_append_message(view[:whole]))
+                    continue
+
+                data = frame.get("text")
+                if data is None:
+                    continue
                 message = json.loads(data)
                 
                 # Handle different message types from client
@@ -132,9 +241,7 @@ class RealtimeService:
                     
                 elif message.get("type") == "audio_commit":
                     # Commit audio buffer
-                    await openai_ws.send(json.dumps({
-                        "type": "input_audio_buffer.commit"
-                    }))
+                    await openai_ws.send(AUDIO_COMMIT_MESSAGE)
                     
                 elif message.get("type") == "text":
                     # Send text message
@@ -150,10 +257,10 @@ class RealtimeService:
                         }
                     }
                     await openai_ws.send(json.dumps(openai_message))
-                    await openai_ws.send(json.dumps({"type": "response.create"}))
+                    await openai_ws.send(RESPONSE_CREATE_MESSAGE)
                     
                 elif message.get("type") == "cancel":
-                    await openai_ws.send(json.dumps({"type": "response.cancel"}))
+                    await openai_ws.send(RESPONSE_CANCEL_MESSAGE)
                     
                 else:
                     # Forward other messages as-is
@@ -170,14 +277,25 @@ class RealtimeService:
         openai_ws: Any,
         session_id: str
     ):
-        """Forward messages from OpenAI to client"""
+        """
+        Forward messages from OpenAI to client.
+
+        Forwarded events (audio and transcript deltas above all) are passed
+        on as the original text without being parsed; only tool calls are
+        decoded, to run the tool.
+        """
         try:
             async for message in openai_ws:
-                data = json.loads(message)
-                event_type = data.get("type", "")
+                if isinstance(message, bytes):
+                    message = message.decode()
+                event = event_type(message)
+
+                if event in FORWARDED_EVENTS:
+                    await client_ws.send_text(message)
                 
                 # Handle tool calls
-                if event_type == "response.function_call_arguments.done":
+                elif event == TOOL_CALL_EVENT:
+                    data = json.loads(message)
                     tool_name = data.get("name")
                     arguments = json.loads(data.get("arguments", "{}"))
                     call_id = data.get("call_id")
@@ -198,27 +316,7 @@ class RealtimeService:
                         }
                     }
                     await openai_ws.send(json.dumps(tool_response))
-                    await openai_ws.send(json.dumps({"type": "response.create"}))
-                
-                # Forward relevant events to client
-                forward_events = [
-                    "session.created",
-                    "session.updated",
-                    "response.audio.delta",
-                    "response.audio.done",
-                    "response.audio_transcript.delta",
-                    "response.audio_transcript.done",
-                    "response.text.delta",
-                    "response.text.done",
-                    "input_audio_buffer.speech_started",
-                    "input_audio_buffer.speech_stopped",
-                    "conversation.item.input_audio_transcription.completed",
-                    "response.done",
-                    "error"
-                ]
-                
-                if event_type in forward_events:
-                    await client_ws.send_json(data)
+                    await openai_ws.send(RESPONSE_CREATE_MESSAGE)
                     
         except WebSocketDisconnect:
             pass
@@ -0,0 +1,212 @@
+import asyncio
+import time
+from bisect import bisect_left
+from datetime import datetime, date, timedelta, timezone
+from typing import Dict, List, Any, Optional, Awaitable, Callable, Iterable
+
+
+def parse_slot_time(value: str) -> datetime:
+    """Parse a slot time as naive UTC, like Cal.com's ('Z' dropped, any other offset converted)"""
+    parsed = datetime.fromisoformat(value.replace('Z', ''))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class SlotIndex:
+    """
+    Free slots over a window of days, sorted by start time.
+
+    Lookups bisect the sorted start times, so "next free slot after X" and
+    "slots between X and Y" cost O(log n) plus the slots returned.
+    """
+
+    __slots__ = ("first_day", "last_day", "starts", "times", "loaded_at")
+
+    def __init__(self, first_day: date, last_day: date, slot_times: Iterable[str]):
+        pairs = sorted((parse_slot_time(t), t) for t in slot_times)
+        self.first_day = first_day
+        self.last_day = last_day
+        self.starts: List[datetime] = [start for start, _ in pairs]
+        self.times: List[str] = [t for _, t in pairs]
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def covers(self, day: date) -> bool:
+        return self.first_day <= day <= self.last_day
+
+    def age(self) -> float:
+        return time.monotonic() - self.loaded_at
+
+    def _slot(self, i: int, duration_minutes: int) -> Dict[str, str]:
+        return {"start": self.times[i], "end": (self.starts[i] + timedelta(minutes=duration_minutes)).isoformat()}
+
+    def in_range(self, start: datetime, end: datetime, duration_minutes: int = 30, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """Free slots starting in [start, end)"""
+        lo = bisect_left(self.starts, start)
+        hi = bisect_left(self.starts, end, lo)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [self._slot(i, duration_minutes) for i in range(lo, hi)]
+
+    def next_free(self, after: datetime, duration_minutes: int = 30, count: int = 1) -> List[Dict[str, str]]:
+        """The first `count` free slots starting at or after `after`"""
+        lo = bisect_left(self.starts, after)
+        return [self._slot(i, duration_minutes) for i in range(lo, min(lo + count, len(self.starts)))]
+
+    def on_day(self, day: date, duration_minutes: int = 30) -> List[Dict[str, str]]:
+        """Free slots on one day"""
+        start = datetime.combine(day, datetime.min.time())
+        return self.in_range(start, start + timedelta(days=1), duration_minutes)
+
+    def remove(self, start: datetime) -> bool:
+        """Take a slot out of the index once it has been booked"""
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start:
+            del self.starts[i]
+            del self.times[i]
+            return True
+        return False
+
+
+class AvailabilityPrefetcher:
+    """
+    Keeps a rolling window of free slots loaded for one event type.
+
+    The window (today plus the next `days - 1` days) is fetched in a single
+    Cal.com request and swapped in as a new SlotIndex, refreshed in the
+    background every `refresh_seconds` and sooner after bookings or
+    cancellations. An index older than `max_age_seconds` is not served, so
+    callers fall back to a direct lookup if refreshing keeps failing.
+    """
+
+    def __init__(
+        self,
+        fetch_slots: Callable[[date, date], Awaitable[List[str]]],
+        days: int,
+        refresh_seconds: float,
+        max_age_seconds: float
+    ):
+        self.fetch_slots = fetch_slots
+        self.days = days
+        self.refresh_seconds = refresh_seconds
+        self.max_age_seconds = max_age_seconds
+        self.index: Optional[SlotIndex] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.served = 0
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        # (monotonic time, start) of recent bookings, re-applied to a window fetched before them
+        self._booked: List[tuple] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.days > 0
+
+    def current(self, day: Optional[date] = None) -> Optional[SlotIndex]:
+        """The loaded index if it is fresh enough (and covers `day`, when given)"""
+        index = self.index
+        if index is None or index.age() > self.max_age_seconds:
+            return None
+        if day is not None and not index.covers(day):
+            return None
+        return index
+
+    def slots_on(self, day: date, duration_minutes: int = 30) -> Optional[List[Dict[str, str]]]:
+        """Free slots on a day from the loaded window, or None if the window cannot answer"""
+        index = self.current(day)
+        if index is None:
+            return None
+        self.served += 1
+        return index.on_day(day, duration_minutes)
+
+    def next_free(self, after: datetime, duration_minutes: int = 30, count: int = 1) -> Optional[List[Dict[str, str]]]:
+        """The next free slots after `after` within the loaded window, or None if the window cannot answer"""
+        index = self.current(after.date())
+        if index is None:
+            return None
+        self.served += 1
+        return index.next_free(after, duration_minutes, count)
+
+    async def refresh(self) -> SlotIndex:
+        """Load the window now; concurrent calls share one request"""
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.ensure_future(self._load())
+        return await asyncio.shield(self._refreshing)
+
+    async def _load(self) -> SlotIndex:
+        first_day = datetime.now().date()
+        last_day = first_day + timedelta(days=self.days - 1)
+        fetch_started = time.monotonic()
+        try:
+            slot_times = await self.fetch_slots(first_day, last_day)
+        except Exception:
+            self.failures += 1
+            raise
+        index = SlotIndex(first_day, last_day, slot_times)
+        # Bookings made while the request was in flight may not be reflected in it yet
+        self._booked = [(at, start) for at, start in self._booked if at >= fetch_started]
+        for _, start in self._booked:
+            index.remove(start)
+        self.index = index
+        self.refreshes += 1
+        return index
+
+    def mark_booked(self, start: datetime):
+        """Drop a booked slot right away and refresh soon after"""
+        if self.index is not None:
+            self.index.remove(start)
+        self._booked.append((time.monotonic(), start))
+        self.request_refresh()
+
+    def request_refresh(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Availability prefetch failed: {e}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.refresh_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Start refreshing in the background"""
+        if not self.enabled:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._refreshing is not None:
+            self._refreshing.cancel()
+            await asyncio.gather(self._refreshing, return_exceptions=True)
+            self._refreshing = None
+        self._wake = None
+
+    def stats(self) -> Dict[str, Any]:
+        index = self.index
+        return {
+            "enabled": self.enabled,
+            "days": self.days,
+            "slots": len(index) if index else 0,
+            "first_day": index.first_day.isoformat() if index else None,
+            "last_day": index.last_day.isoformat() if index else None,
+            "age_seconds": round(index.age(), 1) if index else None,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "served": self.served
+        }
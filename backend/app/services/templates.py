@@ -0,0 +1,82 @@
+import hashlib
+import html
+import re
+from collections import OrderedDict
+from typing import Dict, List, Any, Iterable
+
+# {{ variable }} placeholders
+VARIABLE_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+class SafeHTML(str):
+    """A value that is already HTML and must not be escaped again"""
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal text and variable slots.
+
+    Rendering only joins the literals with the (escaped) values, so the
+    template text is never scanned again per recipient.
+    """
+
+    __slots__ = ("literals", "variables", "escape_html")
+
+    def __init__(self, source: str, escape_html: bool = True):
+        parts = VARIABLE_PATTERN.split(source)
+        self.literals = parts[0::2]
+        self.variables = parts[1::2]
+        self.escape_html = escape_html
+
+    def render(self, context: Dict[str, Any]) -> str:
+        """Fill in the variables; missing ones render as empty strings"""
+        out = [self.literals[0]]
+        for name, literal in zip(self.variables, self.literals[1:]):
+            value = context.get(name)
+            if value is None:
+                value = ""
+            elif self.escape_html and not isinstance(value, SafeHTML):
+                value = html.escape(str(value))
+            else:
+                value = str(value)
+            out.append(value)
+            out.append(literal)
+        return "".join(out)
+
+    def render_batch(self, contexts: Iterable[Dict[str, Any]]) -> List[str]:
+        """Render the template once per context"""
+        return [self.render(context) for context in contexts]
+
+
+class TemplateEngine:
+    """Compiles templates and caches them by content hash"""
+
+    def __init__(self, max_templates: int = 256):
+        self.max_templates = max_templates
+        self._cache: "OrderedDict[tuple, CompiledTemplate]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, source: str, escape_html: bool = True) -> CompiledTemplate:
+        """Get the compiled form of a template, compiling it on first use"""
+        key = (hashlib.sha256(source.encode("utf-8")).hexdigest(), escape_html)
+        template = self._cache.get(key)
+        if template is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return template
+
+        self.misses += 1
+        template = CompiledTemplate(source, escape_html)
+        self._cache[key] = template
+        if len(self._cache) > self.max_templates:
+            self._cache.popitem(last=False)
+        return template
+
+    def unknown_variables(self, source: str, allowed: Iterable[str]) -> List[str]:
+        """List the variables a template uses that are not in `allowed`"""
+        allowed = set(allowed)
+        return sorted({name for name in VARIABLE_PATTERN.findall(source) if name not in allowed})
+
+
+template_engine = TemplateEngine()
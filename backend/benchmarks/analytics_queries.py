@@ -0,0 +1,169 @@
+"""
+Query latency of the campaign analytics engine (app/services/analytics.py).
+
+Generates a synthetic status history (every contact is added, queued and
+emailed; some open, call, complete the call and book) spread over a month,
+loads it into the engine's columns and times the funnel, time-to-call and
+hourly time-series queries, unfiltered and filtered to a few campaigns.
+It also times catching up from a store through `get_events`, which is how
+the engine loads in the app.
+
+Run from the backend directory:
+
+    python benchmarks/analytics_queries.py --events 10000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+from app.models import AnalyticsGroup, ContactStatus  # noqa: E402
+from app.services.analytics import CampaignAnalytics, STATUSES, STATUS_CODES  # noqa: E402
+
+MONTH = 30 * 86400
+START = int(datetime(2026, 1, 1).timestamp())
+
+# Statuses in the order a contact moves through them, with the share of contacts reaching each
+PATH = (
+    (ContactStatus.PENDING.value, 1.0),
+    (ContactStatus.EMAIL_QUEUED.value, 1.0),
+    (ContactStatus.EMAIL_SENT.value, 1.0),
+    (ContactStatus.EMAIL_OPENED.value, 0.45),
+    (ContactStatus.CALL_STARTED.value, 0.2),
+    (ContactStatus.CALL_COMPLETED.value, 0.18),
+    (ContactStatus.MEETING_BOOKED.value, 0.08)
+)
+
+
+def synthetic_history(events: int, campaigns: int, agents: int, seed: int = 7):
+    """Columns of about `events` status changes, in the order they happened"""
+    rng = np.random.default_rng(seed)
+    per_contact = sum(share for _, share in PATH)
+    contacts = int(events / per_contact)
+    contact = np.arange(contacts, dtype=np.int32)
+    campaign = rng.integers(0, campaigns, contacts).astype(np.int32)
+    agent = (campaign % agents).astype(np.int32)
+    added = START + rng.integers(0, MONTH, contacts)
+
+    # How far along the path each contact got, and when it took each step
+    roll = rng.random(contacts)
+    depth = np.searchsorted(-np.array([share for _, share in PATH]), -roll, side="left")
+    delays = np.cumsum(np.stack([
+        np.zeros(contacts, np.int64),
+        rng.integers(1, 60, contacts),
+        rng.integers(1, 600, contacts),
+        rng.exponential(4 * 3600, contacts).astype(np.int64),
+        rng.exponential(12 * 3600, contacts).astype(np.int64),
+        rng.integers(60, 1800, contacts),
+        rng.integers(0, 5, contacts)
+    ]), axis=0)
+
+    columns = {"at": [], "campaign": [], "agent": [], "contact": [], "status": []}
+    for step, (status, _) in enumerate(PATH):
+        took = depth > step
+        columns["at"].append(added[took] + delays[step][took])
+        columns["campaign"].append(campaign[took])
+        columns["agent"].append(agent[took])
+        columns["contact"].append(contact[took])
+        columns["status"].append(np.full(int(took.sum()), STATUS_CODES[status], np.int8))
+    columns = {name: np.concatenate(parts) for name, parts in columns.items()}
+    order = np.argsort(columns["at"], kind="stable")
+    return {name: values[order] for name, values in columns.items()}, contacts
+
+
+def load(analytics: CampaignAnalytics, columns, contacts: int, campaigns: int, agents: int):
+    """Fill the engine's columns directly, as if it had caught up with a store holding this history"""
+    for i in range(campaigns):
+        analytics.campaign_codes.code(f"campaign-{i}")
+    for i in range(agents):
+        analytics.agent_codes.code(f"agent-{i}")
+    analytics.contact_codes.ids = [f"contact-{i}" for i in range(contacts)]
+    analytics.events.append(columns)
+    analytics._contact_campaign = np.zeros(contacts, np.int32)
+    analytics._contact_agent = np.zeros(contacts, np.int32)
+    analytics._contact_campaign[columns["contact"]] = columns["campaign"]
+    analytics._contact_agent[columns["contact"]] = columns["agent"]
+
+
+class HistoryStore:
+    """Serves the synthetic history through get_events, like a campaign repository"""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def get_events(self, after: int = 0, limit: int = 10000):
+        end = min(after + limit, len(self.columns["at"]))
+        at = self.columns["at"][after:end].tolist()
+        campaign = self.columns["campaign"][after:end].tolist()
+        agent = self.columns["agent"][after:end].tolist()
+        contact = self.columns["contact"][after:end].tolist()
+        status = self.columns["status"][after:end].tolist()
+        return [
+            (after + i + 1, at[i], f"campaign-{campaign[i]}", f"agent-{agent[i]}", f"contact-{contact[i]}", STATUSES[status[i]])
+            for i in range(end - after)
+        ]
+
+
+def timed(label: str, query, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query()
+        durations.append(time.perf_counter() - started)
+    print(f"  {label:<42} best {min(durations) * 1000:8.1f} ms   median {sorted(durations)[len(durations) // 2] * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=10000000)
+    parser.add_argument("--campaigns", type=int, default=500)
+    parser.add_argument("--agents", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ingest-events", type=int, default=500000, help="events loaded through get_events (0 skips)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    columns, contacts = synthetic_history(args.events, args.campaigns, args.agents)
+    print(f"{len(columns['at'])} events for {contacts} contacts generated in {time.perf_counter() - started:.1f}s")
+
+    if args.ingest_events:
+        count = min(args.ingest_events, len(columns["at"]))
+        store = HistoryStore({name: values[:count] for name, values in columns.items()})
+        analytics = CampaignAnalytics(store)
+        started = time.perf_counter()
+        analytics.refresh()
+        elapsed = time.perf_counter() - started
+        print(f"caught up with {count} stored events in {elapsed:.2f}s ({count / elapsed:,.0f} events/s)")
+
+    analytics = CampaignAnalytics(HistoryStore({name: values[:0] for name, values in columns.items()}))
+    load(analytics, columns, contacts, args.campaigns, args.agents)
+    print(f"columns hold {analytics.stats()['bytes'] / 2 ** 20:.0f} MiB")
+
+    few = [f"campaign-{i}" for i in range(5)]
+    since = datetime.fromtimestamp(START + 7 * 86400)
+    until = datetime.fromtimestamp(START + 14 * 86400)
+    print("queries:")
+    timed("funnel", lambda: analytics.funnel(), args.repeat)
+    timed("funnel by campaign", lambda: analytics.funnel(group_by=AnalyticsGroup.CAMPAIGN), args.repeat)
+    timed("funnel by agent, one week", lambda: analytics.funnel(since=since, until=until, group_by=AnalyticsGroup.AGENT), args.repeat)
+    timed("funnel, 5 campaigns", lambda: analytics.funnel(campaign_ids=few), args.repeat)
+    timed("time to call", lambda: analytics.time_to_call(), args.repeat)
+    timed("time to call, 5 campaigns", lambda: analytics.time_to_call(campaign_ids=few), args.repeat)
+    timed("hourly series, all statuses", lambda: analytics.timeseries(), args.repeat)
+    timed("hourly series, bookings in one week", lambda: analytics.timeseries(
+        since=since, until=until, statuses=[ContactStatus.MEETING_BOOKED.value]
+    ), args.repeat)
+
+    funnel = analytics.funnel()
+    print("funnel:", ", ".join(f"{s['stage']} {s['contacts']}" for s in funnel["stages"]))
+    ttc = analytics.time_to_call()
+    print("time to call:", ttc["percentiles"])
+
+
+if __name__ == "__main__":
+    main()
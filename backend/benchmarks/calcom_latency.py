@@ -0,0 +1,170 @@
+"""
+Tool-call latency against a local stub Cal.com server.
+
+Starts benchmarks/fake_calcom.py (over HTTPS with a throwaway self-signed
+certificate when openssl is available, so TLS setup is included) and runs
+check_availability / book_meeting style calls from C concurrent callers:
+
+  fresh    a new httpx.AsyncClient per call (the old CalComService)
+  pooled   CalComService's shared keep-alive client
+
+Reports per-call latency percentiles and how many connections the stub saw.
+
+Run from the backend directory:
+
+    python benchmarks/calcom_latency.py --calls 300 --concurrency 10 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_workers import BACKEND_DIR, free_port, stop_server  # noqa: E402
+
+
+def make_certificate(directory: str):
+    """Create a self-signed localhost certificate, or return None without openssl"""
+    if not shutil.which("openssl"):
+        return None
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+            "-keyout", keyfile, "-out", certfile
+        ],
+        check=True, capture_output=True
+    )
+    return certfile, keyfile
+
+
+async def wait_stub(base_url: str, verify, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(verify=verify) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/stats")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Stub Cal.com did not start in time")
+
+
+async def run_mode(mode: str, base_url: str, verify, calls: int, concurrency: int):
+    from app.services import calcom
+    service = calcom.calcom_service
+    # Keep the booking log lines out of the results table
+    calcom.print = lambda *args, **kwargs: None
+
+    async with httpx.AsyncClient(verify=verify) as admin:
+        await admin.post(f"{base_url}/stats/reset")
+
+    async def one_call(i: int):
+        if i % 10 == 9:
+            hour, minute = 9 + (i // 20) % 8, 30 * ((i // 10) % 2)
+            day = 1 + i // 320
+            return await service.create_booking(
+                start_time=f"2030-01-{day:02d}T{hour:02d}:{minute:02d}:00",
+                attendee_name="Load Test", attendee_email=f"caller{i}@example.com"
+            )
+        return await service.get_availability(f"2030-01-{1 + i % 28:02d}")
+
+    if mode == "fresh":
+        # The old code opened (and closed) a client on every call
+        def fresh_client():
+            return httpx.AsyncClient(base_url=base_url, headers=service._get_headers(), verify=verify)
+
+        class FreshClient:
+            async def request(self, *args, **kwargs):
+                async with fresh_client() as client:
+                    return await client.request(*args, **kwargs)
+
+        service._get_client = lambda: FreshClient()
+    else:
+        service._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=service._get_headers(),
+            verify=verify,
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+        service._client_loop = asyncio.get_running_loop()
+
+    latencies = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(calls):
+        queue.put_nowait(i)
+
+    async def worker():
+        while not queue.empty():
+            i = queue.get_nowait()
+            started = time.perf_counter()
+            await one_call(i)
+            latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        if mode == "fresh":
+            del service._get_client
+        await service.close()
+
+    async with httpx.AsyncClient(verify=verify) as admin:
+        stats = (await admin.get(f"{base_url}/stats")).json()
+    latencies.sort()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "connections": stats["connections"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the stub takes per request")
+    parser.add_argument("--no-tls", action="store_true", help="serve plain HTTP")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    with tempfile.TemporaryDirectory() as tmp:
+        certificate = None if args.no_tls else make_certificate(tmp)
+        scheme = "https" if certificate else "http"
+        command = [
+            sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_calcom.py"),
+            "--port", str(port := free_port()), "--latency", str(args.latency)
+        ]
+        verify = True
+        if certificate:
+            command += ["--certfile", certificate[0], "--keyfile", certificate[1]]
+            verify = ssl.create_default_context(cafile=certificate[0])
+        base_url = f"{scheme}://127.0.0.1:{port}"
+        stub = subprocess.Popen(command, start_new_session=True)
+        try:
+            asyncio.run(wait_stub(base_url, verify))
+            print(f"stub Cal.com over {scheme}, {args.calls} calls, {args.concurrency} concurrent")
+            print(f"{'client':>6} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8} {'connections':>11}")
+            for mode in ("fresh", "pooled"):
+                result = asyncio.run(run_mode(mode, base_url, verify, args.calls, args.concurrency))
+                print(
+                    f"{mode:>6} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+                    f"{result['mean_ms']:>8.1f} {result['connections']:>11}"
+                )
+        finally:
+            stop_server(stub)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compare single and batched campaign sends against the fake provider.
+
+Starts benchmarks/fake_resend.py and the API (pointed at it) for each batch
+size, creates a campaign with N contacts, sends it and waits for the
+dispatch job to finish. Reports wall time, provider requests and how many
+emails were delivered or failed.
+
+Run from the backend directory:
+
+    python benchmarks/campaign_send.py --contacts 2000 --batch-sizes 1 100 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_workers import BACKEND_DIR, free_port, stop_server, wait_ready  # noqa: E402
+
+
+def start_provider(port: int, latency: float, error_rate: float) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_resend.py"),
+            "--port", str(port), "--latency", str(latency), "--error-rate", str(error_rate)
+        ],
+        start_new_session=True
+    )
+
+
+def start_api(port: int, provider_url: str, db_path: str, batch_size: int, rate_limit: float) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": db_path,
+        "RESEND_API_URL": provider_url,
+        "RESEND_API_KEY": "re_benchmark",
+        "EMAIL_FROM": "benchmark@example.com",
+        "EMAIL_BATCH_SIZE": str(batch_size),
+        "EMAIL_RATE_LIMIT_PER_SECOND": str(rate_limit),
+        "EMAIL_RETRY_BASE_DELAY": "0.05",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log"
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        start_new_session=True
+    )
+
+
+async def wait_provider(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(f"{base_url}/stats")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Fake provider did not start in time")
+
+
+async def run_campaign(api_url: str, provider_url: str, contacts: int, invalid: int):
+    async with httpx.AsyncClient(base_url=api_url, timeout=60) as client:
+        campaign = (await client.post("/api/campaigns/", json={
+            "name": "Batch benchmark",
+            "agent_id": "default-agent"
+        })).json()
+        await client.post(f"/api/campaigns/{campaign['id']}/contacts", json={
+            "contacts": [
+                {
+                    "name": f"Contact {i}",
+                    "email": f"invalid{i}@example.com" if i < invalid else f"contact{i}@example.com"
+                }
+                for i in range(contacts)
+            ]
+        })
+
+        started = time.monotonic()
+        job = (await client.post(f"/api/campaigns/{campaign['id']}/send")).json()
+        while True:
+            progress = (await client.get(f"/api/campaigns/{campaign['id']}/jobs/{job['job_id']}")).json()
+            if progress["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.monotonic() - started
+
+    async with httpx.AsyncClient() as client:
+        stats = (await client.get(f"{provider_url}/stats")).json()
+    return elapsed, progress, stats
+
+
+async def bench(batch_size: int, args):
+    provider_port, api_port = free_port(), free_port()
+    provider_url = f"http://127.0.0.1:{provider_port}"
+    api_url = f"http://127.0.0.1:{api_port}"
+    provider = start_provider(provider_port, args.latency, args.error_rate)
+    with tempfile.TemporaryDirectory() as tmp:
+        api = start_api(api_port, provider_url, os.path.join(tmp, "callai.db"), batch_size, args.rate_limit)
+        try:
+            await wait_provider(provider_url)
+            await wait_ready(api_url)
+            return await run_campaign(api_url, provider_url, args.contacts, args.invalid)
+        finally:
+            stop_server(api)
+            stop_server(provider)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=2000)
+    parser.add_argument("--invalid", type=int, default=10, help="contacts with addresses the provider rejects")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=10.0, help="provider requests per second")
+    args = parser.parse_args()
+
+    print(f"{'batch':>5} {'seconds':>8} {'requests':>8} {'sent':>6} {'failed':>6} {'emails/s':>9}")
+    for batch_size in args.batch_sizes:
+        elapsed, progress, stats = asyncio.run(bench(batch_size, args))
+        print(
+            f"{batch_size:>5} {elapsed:>8.2f} {stats['requests']:>8} {progress['sent']:>6} "
+            f"{progress['failed']:>6} {progress['sent'] / elapsed:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
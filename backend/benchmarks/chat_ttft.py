@@ -0,0 +1,120 @@
+"""
+Time to first token for the text chat, blocking vs streamed.
+
+Starts benchmarks/fake_openai.py, benchmarks/fake_calcom.py and the API
+(memory storage), then sends the same messages to
+
+  POST /api/agents/{id}/sessions/{sid}/chat          (whole reply at once)
+  POST /api/agents/{id}/sessions/{sid}/chat/stream   (server-sent events)
+
+and reports when the first reply text reached the client and when the
+reply was complete. Each message makes the model call `--tool-calls`
+tools first, so the streamed run also shows tool progress events.
+
+Run from the backend directory:
+
+    python benchmarks/chat_ttft.py --messages 10 --tool-calls 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_workers import BACKEND_DIR, free_port, stop_server, wait_ready  # noqa: E402
+
+
+def start(args, env=None) -> subprocess.Popen:
+    return subprocess.Popen(args, cwd=BACKEND_DIR, env={**os.environ, **(env or {})}, start_new_session=True)
+
+
+async def blocking(client: httpx.AsyncClient, url: str, message: str):
+    started = time.perf_counter()
+    response = await client.post(url, json={"message": message})
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed, 0
+
+
+async def streamed(client: httpx.AsyncClient, url: str, message: str):
+    started = time.perf_counter()
+    first_token = None
+    tool_events = 0
+    async with client.stream("POST", f"{url}/stream", json={"message": message}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[6:])
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - started
+            elif event["type"] in ("tool_call", "tool_result"):
+                tool_events += 1
+            elif event["type"] == "error":
+                raise RuntimeError(event["message"])
+    return first_token, time.perf_counter() - started, tool_events
+
+
+async def run(base_url: str, messages: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        agent_id = (await client.get("/api/agents/")).json()[0]["id"]
+        results = {}
+        for mode, send in (("blocking", blocking), ("streamed", streamed)):
+            session_id = (await client.post(f"/api/agents/{agent_id}/sessions")).json()["id"]
+            url = f"/api/agents/{agent_id}/sessions/{session_id}/chat"
+            samples = [await send(client, url, f"Any free time tomorrow? ({i})") for i in range(messages)]
+            results[mode] = samples
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--tool-calls", type=int, default=2)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=80)
+    args = parser.parse_args()
+
+    openai_port, calcom_port, api_port = free_port(), free_port(), free_port()
+    stubs = [
+        start([
+            sys.executable, "benchmarks/fake_openai.py", "--port", str(openai_port),
+            "--first-token-latency", str(args.first_token_latency), "--token-latency", str(args.token_latency),
+            "--tokens", str(args.tokens), "--tool-calls", str(args.tool_calls)
+        ]),
+        start([sys.executable, "benchmarks/fake_calcom.py", "--port", str(calcom_port), "--latency", "0.05"]),
+    ]
+    api = start(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(api_port),
+         "--log-level", "warning", "--no-access-log"],
+        {
+            "STORAGE_BACKEND": "memory",
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+            "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+            "CALCOM_API_URL": f"http://127.0.0.1:{calcom_port}",
+        }
+    )
+    try:
+        base_url = f"http://127.0.0.1:{api_port}"
+        asyncio.run(wait_ready(base_url))
+        results = asyncio.run(run(base_url, args.messages))
+    finally:
+        for process in [api, *stubs]:
+            stop_server(process)
+
+    print(f"{args.messages} messages, {args.tool_calls} tool calls each, {args.tokens} tokens per reply")
+    print(f"{'endpoint':>9} {'first text ms':>14} {'complete ms':>12} {'tool events':>12}")
+    for mode, samples in results.items():
+        first = sorted(s[0] for s in samples)[len(samples) // 2] * 1000
+        complete = sorted(s[1] for s in samples)[len(samples) // 2] * 1000
+        print(f"{mode:>9} {first:>14.0f} {complete:>12.0f} {sum(s[2] for s in samples) // len(samples):>12}")
+
+
+if __name__ == "__main__":
+    main()
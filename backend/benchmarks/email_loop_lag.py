@@ -0,0 +1,149 @@
+"""
+Measure event-loop lag while emails are being sent.
+
+Runs the fake provider (benchmarks/fake_resend.py) in a subprocess, then
+sends N meeting-confirmation-sized emails with C concurrent senders while a
+ticker task sleeps 5 ms in a loop and records how late it wakes up. A
+relay that shares the loop with the sends sees the same delay.
+
+Transports compared:
+  blocking   the resend SDK called directly from the coroutine (the old code)
+  thread     the resend SDK in asyncio.to_thread
+  async      EmailService's pooled httpx client
+
+The first two need the `resend` package (`pip install resend`) and are
+skipped without it.
+
+Run from the backend directory:
+
+    python benchmarks/email_loop_lag.py --emails 200 --concurrency 20 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_workers import BACKEND_DIR, free_port, stop_server  # noqa: E402
+from campaign_send import wait_provider  # noqa: E402
+
+TICK_SECONDS = 0.005
+
+
+def email_params(i: int):
+    return {
+        "from": "benchmark@example.com",
+        "to": [f"contact{i}@example.com"],
+        "subject": "Meeting Confirmed: Sales Demo Call",
+        "html": "<p>" + "Your meeting is confirmed. " * 60 + "</p>",
+        "text": "Your meeting is confirmed. " * 60
+    }
+
+
+async def measure(send, emails: int, concurrency: int):
+    """Send every email with a bounded pool while sampling loop lag"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - started - TICK_SECONDS)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(emails):
+        queue.put_nowait(i)
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            i = queue.get_nowait()
+            try:
+                await send(email_params(i))
+            except Exception:
+                errors += 1
+
+    tick_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick_task
+
+    lags.sort()
+    return {
+        "elapsed": elapsed,
+        "errors": errors,
+        "p50_ms": lags[len(lags) // 2] * 1000 if lags else 0.0,
+        "p99_ms": lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0,
+        "max_ms": lags[-1] * 1000 if lags else 0.0,
+    }
+
+
+async def run_transport(name: str, provider_url: str, emails: int, concurrency: int):
+    if name == "async":
+        os.environ["RESEND_API_URL"] = provider_url
+        os.environ["RESEND_API_KEY"] = "re_benchmark"
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        from app.services.email import email_service
+        try:
+            return await measure(email_service._send, emails, concurrency)
+        finally:
+            await email_service.close()
+
+    import resend
+    resend.api_key = "re_benchmark"
+    resend.api_url = provider_url
+
+    if name == "blocking":
+        async def send(params):
+            return resend.Emails.send(params)
+    else:
+        async def send(params):
+            return await asyncio.to_thread(resend.Emails.send, params)
+    return await measure(send, emails, concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--emails", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the fake provider takes per request")
+    parser.add_argument("--transports", nargs="+", default=["blocking", "thread", "async"])
+    args = parser.parse_args()
+
+    port = free_port()
+    provider_url = f"http://127.0.0.1:{port}"
+    provider = subprocess.Popen(
+        [
+            sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "fake_resend.py"),
+            "--port", str(port), "--latency", str(args.latency)
+        ],
+        start_new_session=True
+    )
+    try:
+        asyncio.run(wait_provider(provider_url))
+        print(f"{'transport':>9} {'seconds':>8} {'errors':>6} {'lag p50 ms':>10} {'lag p99 ms':>10} {'lag max ms':>10}")
+        for name in args.transports:
+            if name != "async":
+                try:
+                    import resend  # noqa: F401
+                except ImportError:
+                    print(f"{name:>9}  skipped (resend package not installed)")
+                    continue
+            result = asyncio.run(run_transport(name, provider_url, args.emails, args.concurrency))
+            print(
+                f"{name:>9} {result['elapsed']:>8.2f} {result['errors']:>6} "
+                f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['max_ms']:>10.2f}"
+            )
+    finally:
+        stop_server(provider)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Local stand-in for the Cal.com v1 API used by CalComService.
+
+Implements `GET /availability`, `POST /bookings` and `DELETE
+/bookings/{id}`. Availability is every 30 minutes from 9:00 to 17:00 on
+the requested dates, minus slots that were booked. `GET /stats` shows the
+request and connection counters, which makes connection reuse visible.
+
+Run from the backend directory and point the app at it:
+
+    python benchmarks/fake_calcom.py --port 8026 --latency 0.02
+    CALCOM_API_URL=http://127.0.0.1:8026 uvicorn app.main:app
+
+Pass --certfile/--keyfile to serve HTTPS so TLS handshakes are included,
+and --slow-rate/--slow-latency to make a fraction of requests much slower
+(tail latency, for hedged availability reads).
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+
+def create_app(latency: float = 0.0, slow_rate: float = 0.0, slow_latency: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    stats = {"requests": 0, "connections": 0, "bookings": 0, "cancellations": 0}
+    connections = set()
+    booked: Dict[str, str] = {}  # start time -> booking id
+
+    @app.middleware("http")
+    async def count(request: Request, call_next):
+        stats["requests"] += 1
+        client = (request.client.host, request.client.port) if request.client else None
+        if client not in connections:
+            connections.add(client)
+            stats["connections"] += 1
+        if request.url.path != "/stats":
+            delay = slow_latency if random.random() < slow_rate else latency
+            if delay:
+                await asyncio.sleep(delay)
+        return await call_next(request)
+
+    @app.get("/availability")
+    async def availability(dateFrom: str, dateTo: str = ""):
+        start = datetime.strptime(dateFrom, "%Y-%m-%d")
+        end = datetime.strptime(dateTo or dateFrom, "%Y-%m-%d")
+        slots: Dict[str, Any] = {}
+        day = start
+        while day <= end:
+            times = []
+            slot = day.replace(hour=9)
+            while slot.hour < 17:
+                time = slot.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                if time not in booked:
+                    times.append({"time": time})
+                slot += timedelta(minutes=30)
+            slots[day.strftime("%Y-%m-%d")] = times
+            day += timedelta(days=1)
+        return {"slots": slots}
+
+    @app.post("/bookings")
+    async def create_booking(request: Request):
+        body = await request.json()
+        start = datetime.fromisoformat(body["start"].replace("Z", "")).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        if start in booked:
+            return JSONResponse({"message": "Slot is no longer available"}, status_code=409)
+        booking_id = len(booked) + 1000
+        booked[start] = str(booking_id)
+        stats["bookings"] += 1
+        return {
+            "id": booking_id,
+            "uid": str(uuid.uuid4()),
+            "title": "Sales Demo Call",
+            "metadata": {"videoCallUrl": f"https://cal.com/video/{uuid.uuid4().hex[:8]}"}
+        }
+
+    @app.delete("/bookings/{booking_id}")
+    async def cancel_booking(booking_id: str):
+        for start, existing in list(booked.items()):
+            if existing == booking_id:
+                del booked[start]
+                stats["cancellations"] += 1
+                return Response(status_code=204)
+        return JSONResponse({"message": "Booking not found"}, status_code=404)
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for name in stats:
+            stats[name] = 0
+        connections.clear()
+        booked.clear()
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8026)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of requests that take --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=1.0)
+    parser.add_argument("--certfile", default=None)
+    parser.add_argument("--keyfile", default=None)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.latency, args.slow_rate, args.slow_latency), host=args.host, port=args.port, log_level="warning", access_log=False,
+        ssl_certfile=args.certfile, ssl_keyfile=args.keyfile
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Local stand-in for the OpenAI Chat Completions API used by the text chat.
+
+Implements `POST /v1/chat/completions`, streamed (`stream: true`) or not.
+The reply is `--tokens` words, the first after `--first-token-latency`
+seconds and the rest `--token-latency` apart. When the request offers
+tools and the conversation has no tool results since the last user
+message, the reply is instead `--tool-calls` check_availability calls,
+streamed in fragments the way the real API sends them.
+
+Run from the backend directory and point the app at it:
+
+    python benchmarks/fake_openai.py --port 8027
+    OPENAI_BASE_URL=http://127.0.0.1:8027/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+def create_app(first_token_latency: float, token_latency: float, tokens: int, tool_calls: int) -> FastAPI:
+    app = FastAPI()
+
+    def wants_tools(body) -> bool:
+        if not body.get("tools") or not tool_calls:
+            return False
+        for message in reversed(body["messages"]):
+            if message["role"] == "tool":
+                return False
+            if message["role"] == "user":
+                return True
+        return False
+
+    def chunk(delta, finish_reason=None) -> str:
+        payload = {
+            "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": "fake", "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    def calls():
+        day = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+        return [
+            {"id": f"call_{i}", "type": "function",
+             "function": {"name": "check_availability", "arguments": json.dumps({"date": day})}}
+            for i in range(tool_calls)
+        ]
+
+    async def stream(body):
+        await asyncio.sleep(first_token_latency)
+        if wants_tools(body):
+            for i, call in enumerate(calls()):
+                arguments = call["function"]["arguments"]
+                head = {**call, "function": {"name": call["function"]["name"], "arguments": ""}}
+                yield chunk({"role": "assistant", "tool_calls": [{"index": i, **head}]})
+                for part in (arguments[:len(arguments) // 2], arguments[len(arguments) // 2:]):
+                    await asyncio.sleep(token_latency)
+                    yield chunk({"tool_calls": [{"index": i, "function": {"arguments": part}}]})
+            yield chunk({}, "tool_calls")
+        else:
+            for i in range(tokens):
+                if i:
+                    await asyncio.sleep(token_latency)
+                yield chunk({"role": "assistant", "content": f"word{i} "} if i == 0 else {"content": f"word{i} "})
+            yield chunk({}, "stop")
+        yield "data: [DONE]\n\n"
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(stream(body), media_type="text/event-stream")
+        await asyncio.sleep(first_token_latency + token_latency * max(tokens - 1, 0))
+        if wants_tools(body):
+            message = {"role": "assistant", "content": None, "tool_calls": calls()}
+        else:
+            message = {"role": "assistant", "content": "".join(f"word{i} " for i in range(tokens))}
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": "fake",
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}]
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8027)
+    parser.add_argument("--first-token-latency", type=float, default=0.4)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--tokens", type=int, default=80)
+    parser.add_argument("--tool-calls", type=int, default=0, help="tool calls per reply when tools are offered")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.first_token_latency, args.token_latency, args.tokens, args.tool_calls),
+        host=args.host, port=args.port, log_level="warning", access_log=False
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Local stand-in for the Resend API, for sending campaigns without a real account.
+
+Implements `POST /emails` and `POST /emails/batch` closely enough for the
+resend SDK: batches over 100 emails are refused, `x-batch-validation:
+permissive` reports bad emails per index instead of failing the request,
+and repeated `Idempotency-Key`s return the first response. Any recipient
+containing "invalid" is treated as a bad address. `GET /stats` shows the
+request counters.
+
+Run from the backend directory and point the app at it:
+
+    python benchmarks/fake_resend.py --port 8025 --latency 0.05
+    RESEND_API_URL=http://127.0.0.1:8025 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from typing import Dict, List, Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+BATCH_LIMIT = 100
+
+
+def create_app(latency: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    stats = {"requests": 0, "batch_requests": 0, "emails": 0, "rejected": 0, "rate_limited": 0, "errors": 0}
+    idempotent: Dict[str, Any] = {}
+
+    def error(status: int, name: str, message: str) -> JSONResponse:
+        return JSONResponse({"statusCode": status, "name": name, "message": message}, status_code=status)
+
+    def invalid_reason(email: Dict[str, Any]) -> str:
+        recipients = email.get("to") or []
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        if not recipients or not email.get("from") or not email.get("subject"):
+            return "Missing `to`, `from` or `subject` field."
+        if any("invalid" in r for r in recipients):
+            return "Invalid `to` field."
+        return ""
+
+    async def simulate() -> JSONResponse:
+        """Apply latency and random failures; return an error response or None"""
+        stats["requests"] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        roll = random.random()
+        if roll < rate_limit_rate:
+            stats["rate_limited"] += 1
+            return error(429, "rate_limit_exceeded", "Too many requests.")
+        if roll < rate_limit_rate + error_rate:
+            stats["errors"] += 1
+            return error(500, "internal_server_error", "Something went wrong.")
+        return None
+
+    @app.post("/emails")
+    async def send_email(request: Request):
+        failure = await simulate()
+        if failure:
+            return failure
+        email = await request.json()
+        reason = invalid_reason(email)
+        if reason:
+            stats["rejected"] += 1
+            return error(422, "validation_error", reason)
+        stats["emails"] += 1
+        return {"id": str(uuid.uuid4())}
+
+    @app.post("/emails/batch")
+    async def send_batch(request: Request):
+        key = request.headers.get("idempotency-key")
+        if key and key in idempotent:
+            return idempotent[key]
+
+        failure = await simulate()
+        if failure:
+            return failure
+        stats["batch_requests"] += 1
+        emails: List[Dict[str, Any]] = await request.json()
+        if len(emails) > BATCH_LIMIT:
+            return error(422, "validation_error", f"Too many emails in batch (max {BATCH_LIMIT}).")
+
+        permissive = request.headers.get("x-batch-validation") == "permissive"
+        errors = []
+        for index, email in enumerate(emails):
+            reason = invalid_reason(email)
+            if reason:
+                errors.append({"index": index, "message": reason})
+        if errors and not permissive:
+            stats["rejected"] += len(emails)
+            return error(422, "validation_error", errors[0]["message"])
+
+        data = [{"id": str(uuid.uuid4())} for _ in range(len(emails) - len(errors))]
+        stats["emails"] += len(data)
+        stats["rejected"] += len(errors)
+        response = {"data": data}
+        if permissive:
+            response["errors"] = errors
+        if key:
+            idempotent[key] = response
+        return response
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for name in stats:
+            stats[name] = 0
+        idempotent.clear()
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests failing with 429")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.error_rate, args.rate_limit_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Load test for running the API with several worker processes on one SQLite file.
+
+Starts `uvicorn app.main:app --workers N` against a fresh database for each
+worker count, seeds a campaign with contacts, then drives a mixed read/write
+workload (campaign stats, agent lookups, call token validation) from many
+concurrent clients and reports requests per second and latency.
+
+Run from the backend directory:
+
+    python benchmarks/load_workers.py --workers 1 2 4 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, db_path: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": db_path,
+        "WEB_CONCURRENCY": str(workers),
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+    }
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning", "--no-access-log"
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        start_new_session=True
+    )
+
+
+def stop_server(process: subprocess.Popen):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+async def seed(base_url: str, contacts: int):
+    """Create a campaign with contacts and return (campaign_id, call tokens)"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        response = await client.post("/api/campaigns/", json={
+            "name": "Load test",
+            "agent_id": "default-agent"
+        })
+        campaign_id = response.json()["id"]
+        response = await client.post(f"/api/campaigns/{campaign_id}/contacts", json={
+            "contacts": [
+                {"name": f"Contact {i}", "email": f"contact{i}@example.com"}
+                for i in range(contacts)
+            ]
+        })
+        tokens = [c["call_token"] for c in response.json()["contacts"]]
+    return campaign_id, tokens
+
+
+async def run_load(base_url: str, campaign_id: str, tokens, clients: int, duration: float):
+    latencies = []
+    errors = 0
+    paths = [
+        f"/api/campaigns/{campaign_id}/stats",
+        "/api/agents/default-agent",
+        "/api/realtime/sessions",
+    ]
+
+    async def client_loop(client: httpx.AsyncClient, deadline: float):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            if random.random() < 0.25:
+                path = f"/api/campaigns/validate-token/{campaign_id}/{random.choice(tokens)}"
+            else:
+                path = random.choice(paths)
+            started = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.monotonic() + duration
+        started = time.monotonic()
+        await asyncio.gather(*(client_loop(client, deadline) for _ in range(clients)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+    }
+
+
+async def bench(workers: int, clients: int, duration: float, contacts: int):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        process = start_server(workers, port, os.path.join(tmp, "callai.db"))
+        try:
+            await wait_ready(base_url)
+            campaign_id, tokens = await seed(base_url, contacts)
+            return await run_load(base_url, campaign_id, tokens, clients, duration)
+        finally:
+            stop_server(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--contacts", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'requests':>9} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'scaling':>8}")
+    baseline = None
+    for workers in args.workers:
+        result = asyncio.run(bench(workers, args.clients, args.duration, args.contacts))
+        baseline = baseline or result["rps"]
+        print(
+            f"{workers:>7} {result['requests']:>9} {result['errors']:>6} {result['rps']:>9.1f} "
+            f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['rps'] / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+CPU spent relaying OpenAI events to the caller, per concurrent call.
+
+Feeds RealtimeService._forward_to_client a stream of realtime events
+shaped like a spoken reply (mostly response.audio.delta with 100 ms of
+base64 audio, plus transcript deltas and a few events the client does not
+get) for `--calls` simultaneous calls, using in-process stand-ins for the
+two WebSockets. The same stream also goes through the previous
+implementation, which parsed every event and re-serialized the forwarded
+ones, for comparison. Both must deliver the same events to the client.
+
+Run from the backend directory:
+
+    python benchmarks/realtime_forward_cpu.py --calls 50 --seconds 60
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+from app.services.realtime import RealtimeService  # noqa: E402
+
+SAMPLE_RATE = 24000
+AUDIO_DELTA_MS = 100
+
+
+class FakeOpenAI:
+    """Yields pre-built upstream events, letting other calls run in between"""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def send(self, message):
+        pass
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for event in self.events:
+            await asyncio.sleep(0)
+            yield event
+
+
+class FakeClient:
+    """Records what reaches the caller"""
+
+    def __init__(self, keep: bool = False):
+        self.count = 0
+        self.keep = keep
+        self.received = []
+
+    async def send_text(self, text: str):
+        self.count += 1
+        if self.keep:
+            self.received.append(json.loads(text))
+
+    async def send_json(self, data):
+        self.count += 1
+        if self.keep:
+            self.received.append(json.loads(json.dumps(data)))
+
+
+async def legacy_forward_to_client(client_ws, openai_ws, session_id):
+    """_forward_to_client before the passthrough path (tool calls left out; the stream has none)"""
+    async for message in openai_ws:
+        data = json.loads(message)
+        event_type = data.get("type", "")
+        forward_events = [
+            "session.created",
+            "session.updated",
+            "response.audio.delta",
+            "response.audio.done",
+            "response.audio_transcript.delta",
+            "response.audio_transcript.done",
+            "response.text.delta",
+            "response.text.done",
+            "input_audio_buffer.speech_started",
+            "input_audio_buffer.speech_stopped",
+            "conversation.item.input_audio_transcription.completed",
+            "response.done",
+            "error"
+        ]
+        if event_type in forward_events:
+            await client_ws.send_json(data)
+
+
+def reply_events(seconds: float):
+    """Events of a spoken reply lasting `seconds`, serialized like OpenAI's"""
+    audio = base64.b64encode(bytes(range(256)) * (SAMPLE_RATE * 2 * AUDIO_DELTA_MS // 1000 // 256 + 1)).decode()
+    audio = audio[:SAMPLE_RATE * 2 * AUDIO_DELTA_MS // 1000 * 4 // 3]
+    ids = {"response_id": "resp_001", "item_id": "item_001", "output_index": 0, "content_index": 0}
+    events = []
+    for i in range(int(seconds * 1000 / AUDIO_DELTA_MS)):
+        events.append(json.dumps({"event_id": f"event_{i}a", "type": "response.audio.delta", **ids, "delta": audio}))
+        if i % 3 == 0:
+            events.append(json.dumps({"event_id": f"event_{i}t", "type": "response.audio_transcript.delta", **ids, "delta": "so we "}))
+        if i % 50 == 0:
+            # Not forwarded to the client
+            events.append(json.dumps({"event_id": f"event_{i}r", "type": "rate_limits.updated", "rate_limits": [
+                {"name": "tokens", "limit": 20000, "remaining": 19000, "reset_seconds": 3.2}
+            ]}))
+            events.append(json.dumps({"event_id": f"event_{i}c", "type": "response.content_part.added", **ids, "part": {
+                "type": "audio", "transcript": ""
+            }}))
+    events.append(json.dumps({"event_id": "event_done", "type": "response.done", "response": {
+        "id": "resp_001", "object": "realtime.response", "status": "completed",
+        "output": [{"id": "item_001", "type": "message", "role": "assistant"}]
+    }}))
+    return events
+
+
+async def relay(forward, events, calls: int, keep: bool = False):
+    clients = [FakeClient(keep) for _ in range(calls)]
+    await asyncio.gather(*(
+        forward(client, FakeOpenAI(events), f"call-{i}") for i, client in enumerate(clients)
+    ))
+    return clients
+
+
+def measure(label: str, forward, events, args):
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    clients = asyncio.run(relay(forward, events, args.calls))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    total = len(events) * args.calls
+    # Share of one core a call needs while the agent is speaking in real time
+    core_share = cpu / args.calls / args.seconds
+    print(f"{label:<12} {total:>8} events  forwarded {sum(c.count for c in clients):>8}  cpu {cpu:6.2f}s  "
+          f"wall {wall:6.2f}s  {cpu / total * 1e6:6.1f} us/event  {core_share * 100:6.3f}% of a core per call")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=60, help="seconds of agent speech per call")
+    args = parser.parse_args()
+
+    service = RealtimeService()
+    events = reply_events(args.seconds)
+
+    sample = events[:200] + events[-1:]
+    before = asyncio.run(relay(legacy_forward_to_client, sample, 1, keep=True))[0].received
+    after = asyncio.run(relay(service._forward_to_client, sample, 1, keep=True))[0].received
+    assert before == after, "passthrough delivered different events"
+
+    print(f"{args.calls} calls x {args.seconds:g}s of speech, {len(events)} events per call "
+          f"({len(events[0])} byte audio deltas)")
+    parsed = measure("parse all", legacy_forward_to_client, events, args)
+    passthrough = measure("passthrough", service._forward_to_client, events, args)
+    print(f"passthrough uses {passthrough / parsed * 100:.0f}% of the CPU ({parsed / passthrough:.1f}x less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+CPU spent relaying caller audio to OpenAI, per concurrent call.
+
+Drives RealtimeService._forward_to_openai for `--calls` simultaneous calls
+with in-process stand-ins for the two WebSockets, each call sending
+`--seconds` of 24 kHz PCM16 audio in `--chunk-ms` chunks, once as JSON text
+frames holding base64 (how clients sent audio before) and once as binary
+frames. It reports the relay's CPU time per audio chunk and the share of
+one core a call needs in real time, and checks that both paths send
+OpenAI the same messages.
+
+Run from the backend directory:
+
+    python benchmarks/realtime_relay_cpu.py --calls 50 --seconds 60
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+from app.services.realtime import RealtimeService  # noqa: E402
+
+SAMPLE_RATE = 24000
+
+
+class FakeClient:
+    """Hands the relay pre-built ASGI receive events, then a disconnect"""
+
+    def __init__(self, frames):
+        self.frames = iter(frames)
+
+    async def receive(self):
+        # Let the other calls run between frames, as a real socket would
+        await asyncio.sleep(0)
+        return next(self.frames, {"type": "websocket.disconnect", "code": 1000})
+
+
+class FakeOpenAI:
+    """Counts what the relay sends upstream"""
+
+    def __init__(self, keep: bool = False):
+        self.count = 0
+        self.keep = keep
+        self.sent = []
+
+    async def send(self, message):
+        self.count += 1
+        if self.keep:
+            self.sent.append(message)
+
+
+def audio_chunks(seconds: float, chunk_ms: int):
+    size = SAMPLE_RATE * 2 * chunk_ms // 1000
+    pattern = bytes(range(256)) * (size // 256 + 1)
+    return [pattern[i % 7:i % 7 + size] for i in range(int(seconds * 1000 / chunk_ms))]
+
+
+def json_frames(chunks):
+    return [
+        {"type": "websocket.receive", "text": json.dumps({"type": "audio", "audio": base64.b64encode(c).decode()})}
+        for c in chunks
+    ]
+
+
+def binary_frames(chunks):
+    return [{"type": "websocket.receive", "bytes": c} for c in chunks]
+
+
+async def relay(service: RealtimeService, frames_per_call, keep: bool = False):
+    upstreams = [FakeOpenAI(keep) for _ in frames_per_call]
+    await asyncio.gather(*(
+        service._forward_to_openai(FakeClient(frames), upstream, f"call-{i}")
+        for i, (frames, upstream) in enumerate(zip(frames_per_call, upstreams))
+    ))
+    return upstreams
+
+
+def measure(label: str, service: RealtimeService, build, chunks, args):
+    frames_per_call = [build(chunks) for _ in range(args.calls)]
+    frames = sum(len(f) for f in frames_per_call)
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    upstreams = asyncio.run(relay(service, frames_per_call))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    assert sum(u.count for u in upstreams) == frames
+
+    per_chunk_us = cpu / frames * 1e6
+    # One call produces 1000 / chunk_ms chunks per second of audio
+    core_share = per_chunk_us * (1000 / args.chunk_ms) / 1e6
+    print(f"{label:<8} {frames:>8} chunks  cpu {cpu:6.2f}s  wall {wall:6.2f}s  "
+          f"{per_chunk_us:6.1f} us/chunk  {core_share * 100:6.3f}% of a core per call")
+    return per_chunk_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--chunk-ms", type=int, default=20)
+    args = parser.parse_args()
+
+    service = RealtimeService()
+    chunks = audio_chunks(args.seconds, args.chunk_ms)
+
+    # Both paths must hand OpenAI the same messages
+    sample = chunks[:20]
+    as_json = asyncio.run(relay(service, [json_frames(sample)], keep=True))[0].sent
+    as_binary = asyncio.run(relay(service, [binary_frames(sample)], keep=True))[0].sent
+    assert [json.loads(m) for m in as_json] == [json.loads(m) for m in as_binary]
+
+    print(f"{args.calls} calls x {args.seconds:g}s of audio in {args.chunk_ms} ms chunks ({len(chunks[0])} bytes each)")
+    before = measure("json", service, json_frames, chunks, args)
+    after = measure("binary", service, binary_frames, chunks, args)
+    print(f"binary frames use {after / before * 100:.0f}% of the CPU per chunk of JSON frames")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Memory held per campaign contact and chat message by the memory backend.
+
+Builds the same contacts and messages twice, once as the plain dicts the
+backend used to keep and once as the slotted records it keeps now
+(app/repositories/records.py), and reports the bytes each layout holds
+according to tracemalloc. Strings both layouts hold the same way (ids,
+names, emails, message text) are shared and not counted.
+
+Run from the backend directory:
+
+    python benchmarks/record_memory.py --contacts 100000 --messages 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.repositories.records import ContactRecord, MessageRecord  # noqa: E402
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Tyrell"]
+STATUSES = ["pending", "email_queued", "email_sent", "call_started", "meeting_booked"]
+ROLES = ["user", "assistant"]
+
+
+def contact_dicts(n: int):
+    base = datetime(2026, 1, 1)
+    for i in range(n):
+        yield {
+            "id": str(uuid.uuid4()),
+            "name": f"Contact {i}",
+            "email": f"contact{i}@example.com",
+            "company": COMPANIES[i % len(COMPANIES)],
+            "status": STATUSES[i % len(STATUSES)],
+            "call_token": str(uuid.uuid4()),
+            "created_at": (base + timedelta(seconds=i)).isoformat(),
+            "last_activity": (base + timedelta(seconds=2 * i)).isoformat() if i % 2 else None
+        }
+
+
+def message_dicts(n: int):
+    base = datetime(2026, 1, 1)
+    for i in range(n):
+        yield {
+            "role": ROLES[i % 2],
+            "content": f"Message {i}: could we find a slot on Thursday afternoon?",
+            "timestamp": (base + timedelta(seconds=i)).isoformat(),
+            "tokens": 16
+        }
+
+
+def fresh(value):
+    """A new copy of a string, as a parsed request body or stored row would hold"""
+    return "".join(value) if isinstance(value, str) else value
+
+
+def as_dict(record, fields):
+    return dict(record) | {field: fresh(record[field]) for field in fields}
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def report(label: str, n: int, as_dicts: int, as_records: int):
+    print(f"{label:<9} {n:>8}  dicts {as_dicts / n:7.1f} B each   records {as_records / n:7.1f} B each   "
+          f"saved {100 * (1 - as_records / as_dicts):4.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--messages", type=int, default=100000)
+    args = parser.parse_args()
+
+    contacts = list(contact_dicts(args.contacts))
+    report(
+        "contacts", args.contacts,
+        measure(lambda: [as_dict(c, ("company", "status", "created_at", "last_activity")) for c in contacts]),
+        measure(lambda: [ContactRecord.from_dict(c) for c in contacts])
+    )
+    del contacts
+
+    messages = list(message_dicts(args.messages))
+    report(
+        "messages", args.messages,
+        measure(lambda: [as_dict(m, ("role", "timestamp")) for m in messages]),
+        measure(lambda: [MessageRecord.from_dict(m) for m in messages])
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -37,9 +37,10 @@ import {
 import Link from 'next/link';
 import { 
   getCampaign, 
-  addContactsToCampaign, 
+  importContacts, 
   removeContact, 
   sendCampaignEmails,
+  getDispatchJob,
   getCampaignStats,
   type Campaign,
   type CampaignStats
@@ -85,23 +86,14 @@ export default function CampaignDetailPage({ params }: { params: Promise<{ id: s
 
     setAddingContacts(true);
     try {
-      const lines = bulkInput.trim().split('\n');
-      const contacts = lines.map(line => {
-        const parts = line.split(',').map(p => p.trim());
-        return {
-          name: parts[0] || '',
-          email: parts[1] || '',
-          company: parts[2] || undefined
-        };
-      }).filter(c => c.name && c.email);
-
-      if (contacts.length === 0) {
-        toast.error('No valid contacts found. Format: name,email or name,email,company');
+      const result = await importContacts(id, bulkInput.trim(), 'csv', false);
+      if (result.imported === 0) {
+        toast.error('No new valid contacts found. Format: name,email or name,email,company');
         return;
       }
 
-      const result = await addContactsToCampaign(id, contacts);
-      toast.success(`Added ${result.added_count} contacts`);
+      const skipped = result.duplicates + result.invalid;
+      toast.success(`Added ${result.imported} contacts${skipped ? ` (${skipped} skipped)` : ''}`);
       setShowAddDialog(false);
       setBulkInput('');
       loadCampaign();
@@ -140,8 +132,17 @@ export default function CampaignDetailPage({ params }: { params: Promise<{ id: s
 
     setSending(true);
     try {
-      const result = await sendCampaignEmails(id);
-      toast.success(`Sent ${result.sent_count} emails`);
+      let job = await sendCampaignEmails(id);
+      // Sending runs in the background; poll until the job finishes
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        job = await getDispatchJob(id, job.job_id);
+      }
+      if (job.status === 'failed') {
+        toast.error('Sending stopped early');
+      } else {
+        toast.success(`Sent ${job.sent} emails`);
+      }
       loadCampaign();
     } catch (error) {
       toast.error('Failed to send emails');
@@ -21,11 +21,11 @@ import {
   DropdownMenuItem,
   DropdownMenuTrigger,
 } from '@/components/ui/dropdown-menu';
-import { getCampaigns, deleteCampaign, type Campaign } from '@/lib/api';
+import { getCampaigns, deleteCampaign, type CampaignSummary } from '@/lib/api';
 import { toast } from 'sonner';
 
 export default function CampaignsPage() {
-  const [campaigns, setCampaigns] = useState<Campaign[]>([]);
+  const [campaigns, setCampaigns] = useState<CampaignSummary[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
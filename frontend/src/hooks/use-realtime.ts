@@ -93,12 +93,17 @@ export function useRealtime({
     stopListening();
   }, []);
 
-  const sendAudio = useCallback((audioData: string) => {
+  // Raw PCM16 goes out as a binary frame; a base64 string is still accepted as JSON
+  const sendAudio = useCallback((audioData: ArrayBuffer | string) => {
     if (wsRef.current?.readyState === WebSocket.OPEN) {
-      wsRef.current.send(JSON.stringify({
-        type: 'audio',
-        audio: audioData,
-      }));
+      if (typeof audioData === 'string') {
+        wsRef.current.send(JSON.stringify({
+          type: 'audio',
+          audio: audioData,
+        }));
+      } else {
+        wsRef.current.send(audioData);
+      }
     }
   }, []);
 
@@ -137,10 +142,7 @@ export function useRealtime({
           pcm16[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
         }
         
-        const base64 = btoa(
-          String.fromCharCode(...new Uint8Array(pcm16.buffer))
-        );
-        sendAudio(base64);
+        sendAudio(pcm16.buffer);
       };
 
       sourceRef.current.connect(processorRef.current);
@@ -31,7 +31,7 @@ export interface Contact {
   name: string;
   email: string;
   company?: string;
-  status: 'pending' | 'email_sent' | 'email_opened' | 'call_started' | 'call_completed' | 'meeting_booked' | 'not_interested';
+  status: 'pending' | 'email_queued' | 'email_sent' | 'email_opened' | 'call_started' | 'call_completed' | 'meeting_booked' | 'not_interested';
   call_token?: string;
   created_at: string;
   last_activity?: string;
@@ -53,9 +53,29 @@ export interface Campaign {
     emails_sent: number;
     calls_started: number;
     meetings_booked: number;
+    not_interested: number;
   };
 }
 
+export interface DispatchJob {
+  job_id: string;
+  campaign_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  total: number;
+  sent: number;
+  failed: number;
+  in_doubt: number;
+  remaining: number;
+  throughput_per_second: number;
+  eta_seconds: number | null;
+  error: string | null;
+  errors?: any[] | null;
+  worker: string | null;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface CampaignStats {
   total_contacts: number;
   emails_sent: number;
@@ -123,9 +143,56 @@ export async function sendMessage(agentId: string, sessionId: string, message: s
   return res.json();
 }
 
+export type ChatStreamEvent =
+  | { type: 'session'; session_id: string }
+  | { type: 'token'; content: string }
+  | { type: 'tool_call'; id: string; name: string; arguments: string }
+  | { type: 'tool_result'; id: string; name: string; result: string }
+  | { type: 'done'; session_id: string; response: string }
+  | { type: 'error'; message: string };
+
+// Streams the reply as server-sent events; resolves with the full reply text
+export async function streamMessage(
+  agentId: string,
+  sessionId: string,
+  message: string,
+  onEvent: (event: ChatStreamEvent) => void,
+): Promise<string> {
+  const res = await fetch(`${API_URL}/api/agents/${agentId}/sessions/${sessionId}/chat/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ message }),
+  });
+  if (!res.ok || !res.body) throw new Error('Failed to send message');
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let response = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const data = frame.split('\n').find((line) => line.startsWith('data: '));
+      if (!data) continue;
+      const event = JSON.parse(data.slice(6)) as ChatStreamEvent;
+      if (event.type === 'error') throw new Error(event.message);
+      if (event.type === 'done') response = event.response;
+      onEvent(event);
+    }
+  }
+  return response;
+}
+
 // Campaign API
-export async function getCampaigns(): Promise<Campaign[]> {
-  const res = await fetch(`${API_URL}/api/campaigns/`);
+export type CampaignSummary = Omit<Campaign, 'contacts'>;
+
+export async function getCampaigns(): Promise<CampaignSummary[]> {
+  const res = await fetch(`${API_URL}/api/campaigns/?include_contacts=false`);
   if (!res.ok) throw new Error('Failed to fetch campaigns');
   return res.json();
 }
@@ -182,6 +249,59 @@ export async function addContactsToCampaign(
   return res.json();
 }
 
+export interface ContactImportSummary {
+  success: boolean;
+  format: 'csv' | 'ndjson';
+  total_rows: number;
+  imported: number;
+  duplicates: number;
+  invalid: number;
+  errors: { row: number; email: string | null; error: string }[];
+  errors_truncated: boolean;
+}
+
+export async function importContacts(
+  campaignId: string,
+  body: Blob | string,
+  format: 'csv' | 'ndjson' = 'csv',
+  header = true
+): Promise<ContactImportSummary> {
+  const params = new URLSearchParams({ format, header: String(header) });
+  const res = await fetch(`${API_URL}/api/campaigns/${campaignId}/contacts/import?${params}`, {
+    method: 'POST',
+    headers: { 'Content-Type': format === 'csv' ? 'text/csv' : 'application/x-ndjson' },
+    body,
+  });
+  if (!res.ok) throw new Error('Failed to import contacts');
+  return res.json();
+}
+
+export interface ContactPage {
+  contacts: Contact[];
+  next_cursor: string | null;
+}
+
+export async function listContacts(
+  campaignId: string,
+  options: {
+    status?: Contact['status'];
+    company?: string;
+    email?: string;
+    sort?: 'created_at' | 'last_activity';
+    order?: 'asc' | 'desc';
+    limit?: number;
+    cursor?: string;
+  } = {}
+): Promise<ContactPage> {
+  const params = new URLSearchParams();
+  Object.entries(options).forEach(([key, value]) => {
+    if (value !== undefined && value !== '') params.set(key, String(value));
+  });
+  const res = await fetch(`${API_URL}/api/campaigns/${campaignId}/contacts?${params}`);
+  if (!res.ok) throw new Error('Failed to fetch contacts');
+  return res.json();
+}
+
 export async function removeContact(campaignId: string, contactId: string): Promise<void> {
   const res = await fetch(`${API_URL}/api/campaigns/${campaignId}/contacts/${contactId}`, {
     method: 'DELETE',
@@ -192,7 +312,7 @@ export async function removeContact(campaignId: string, contactId: string): Prom
 export async function sendCampaignEmails(
   campaignId: string,
   contactIds?: string[]
-): Promise<{ success: boolean; sent_count: number; total_contacts: number; errors?: any[] }> {
+): Promise<DispatchJob> {
   const res = await fetch(`${API_URL}/api/campaigns/${campaignId}/send`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
@@ -202,6 +322,12 @@ export async function sendCampaignEmails(
   return res.json();
 }
 
+export async function getDispatchJob(campaignId: string, jobId: string): Promise<DispatchJob> {
+  const res = await fetch(`${API_URL}/api/campaigns/${campaignId}/jobs/${jobId}`);
+  if (!res.ok) throw new Error('Failed to fetch send job');
+  return res.json();
+}
+
 export async function getCampaignStats(campaignId: string): Promise<CampaignStats> {
   const res = await fetch(`${API_URL}/api/campaigns/${campaignId}/stats`);
   if (!res.ok) throw new Error('Failed to fetch campaign stats');